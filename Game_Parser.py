@@ -12,7 +12,10 @@ import parsers.power_summary_parser as psp
 import parsers.power_trace_parser as ptp
 import parsers.power_checker as pck
 import parsers.reporter as rpt
+import parsers.dataset_registry as dsr
 import parsers.fps_img_parser as fip_legacy
+import parsers.crawler as crw
+import parsers.manifest as mnf
 
 import argparse
 
@@ -23,6 +26,7 @@ parser.add_argument('-o', '--output', help='output path. location of file and fi
 parser.add_argument('-d', '--daq', help='DAQ power rail name dictionary')
 parser.add_argument('-st', '--swtarget', help='a list of dictionary objects that you want to parse from the socwatch summary')
 parser.add_argument('-hb', '--hobl', action='store_true', help='if the data is collected via HOBL, looking for .PASS or .FAIL file in the folder to set file path as data set ID')
+parser.add_argument('--manifest', help='crawl manifest from crawl_manifest.py, replayed instead of walking the input tree. -i defaults to the crawled folder')
 
 # parser.print_help()
 args = parser.parse_args()
@@ -53,11 +57,17 @@ MED = "MED"
 # BASE = "\\\\10.54.63.126\\Pnpext\\Siwoo\\WW17.1_LNL32_ov20252\\test_data"
 BASE = args.input
 result_csv = args.output
+# folder listings replayed from the crawl manifest, None walks the file system
+folder_listings = None
+if args.manifest is not None :
+    BASE, folder_listings = mnf.loadListings(args.manifest, BASE)
 # Get script directory for relative paths
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
 
-hobl_sets = list()
+# data sets indexed by ID path, hobl_sets is the ordered list handed to the checker and reporters
+dataset_registry = dsr.DatasetRegistry("\\")
+hobl_sets = dataset_registry.datasets
 picks = {
         "SOC_POWER_RAIL_NAME":'', "PCORE_POWER_RAIL_NAME":'', "SA_POWER_RAIL_NAME":'', "GT_POWER_RAIL_NAME":'', 
         'power_pick':MED,
@@ -151,17 +161,14 @@ def getDatasetLabel(abs_path) :
 
 def createDataset(abs_path) :
     # print("[abs_path] ", abs_path)
-    hobl_sets.append({
+    dataset_registry.add({
         "ID_path":abs_path,
         "data_label":getDatasetLabel(abs_path),
         "data_type":[]
     })
 
 def pullData(abs_path) :
-    for item in hobl_sets:
-        if (abs_path.find(item["ID_path"]) == 0) : 
-            return item
-    return None
+    return dataset_registry.find(abs_path)
 
 def calFromPowerModel(block) :
     if 'power_obj' in block and 'model_output_obj' in block :
@@ -296,12 +303,12 @@ def fileClassifier(abs_path, f):
 
 def detectAndParseFile(path) :
 
-    # listdir gives back all file system list, including file and folder
-    for f in os.listdir(path):
+    # the folder listing (live scandir or crawl manifest) gives back files and folders
+    for f, is_file, is_dir, size, mtime_ns in crw.listFolder(path, folder_listings):
         abs_path = os.path.join(path, f)
         # if f == "Model_A3_v1_2_3_qdq_proxy_stripped":
         #     break
-        if os.path.isfile(abs_path):
+        if is_file:
             fType = fileClassifier(abs_path, f)
             if fType == CL_SOCWATCH :
                 # after detecting first Socwatch ETL, and it's summary, no need to go further
@@ -33,51 +33,21 @@ from pathlib import Path
 from os import listdir
 from os.path import isfile, join
 import parsers.tools as tools
-import parsers.vpt_output_parser as vop
-import parsers.model_output_parser as mop
-import parsers.bm_llama_output_parser as lop
-import parsers.pcie_socwatch_summary_parser as psoc
 import parsers.socwatch_summary_parser as soc
-import parsers.lpmode_full_parser as lpf
-import parsers.power_summary_parser as psp
-import parsers.power_trace_parser as ptp
-import parsers.procyon_parser as pxp
+import parsers.bucket_spec as bspec
+import parsers.change_point as cpt
 import parsers.power_checker as pck
 import parsers.reporter as rpt
+import parsers.crawler as crw
+import parsers.parse_jobs as pj
+import parsers.parse_context as pctx
+import parsers.parse_cache as pcache
+import parsers.incremental_state as inc
+import parsers.manifest as mnf
+import parsers.file_classifier as fcl
 
 import argparse
 
-parser = argparse.ArgumentParser(prog='AI summary parser')
-parser.add_argument('-c', '--config', help='configuration path. json format, need to have all of -d -st and others')
-parser.add_argument('-i', '--input', help='input path. this will be the bese of the summray, will detect all files and folders from that path tree')
-parser.add_argument('-o', '--output', help='output path. location of file and file name')
-parser.add_argument('-d', '--daq', help='DAQ power rail name dictionary')
-parser.add_argument('-st', '--swtarget', help='a list of dictionary objects that you want to parse from the socwatch summary')
-parser.add_argument('-hb', '--hobl', action='store_true', help='if the data is collected via HOBL, looking for .PASS or .FAIL file in the folder to set file path as data set ID')
-
-# parser.print_help()
-args = parser.parse_args()
-print("args: ", args)
-
-
-CL_UNCLASSIFIED = "unclassified"
-CL_PROCYON_RESULT_XML = ["1h_bl_", ".xml"]
-CL_PROCYON_RESULT_ARIELLE = ".procyon-result"
-CL_LPMODE_FULL = "lpmode_full_run.json"
-CL_ETL = ".etl"
-CL_CATAPULT_V3 = ["catav3", "catapult_v3"]
-CL_AI_MODELS = ['_qdq_proxy_', '_output.txt', 'PU_llama']
-CL_POWERTRACE_REPORT = ['power_trace_report', '.csv']
-CL_SOCWATCH = 'Session.etl'
-CL_SOCWATCH_CSV = ["socwatch_regular", ".csv"]
-CL_PCIE_SOCWATCH_CSV = ["socwatch_minimal", ".csv"]
-CL_FLEX_RESULTS = '-results.json'
-CL_MS_AI_MODEL = '_qdq_proxy_'
-CL_POWER_SUMMARIES = ['pacs-summary.csv', 'Raw_Summary.csv', '_summary.csv']
-CL_DAQ_TRACES = 'pacs-traces'
-CL_PASS = ".PASS"
-CL_FAIL = ".FAIL"
-CL_VPT = "vpt_output.log"
 
 ETL = "ETL"
 POWER = "POWER"
@@ -95,16 +65,30 @@ MIN = "MIN"
 MAX = "MAX"
 MED = "MED"
 
-#BASE = os.getcwd()
-# BASE = "\\\\10.54.63.126\\Pnpext\\Siwoo\\WW17.1_LNL32_ov20252\\test_data"
-BASE = args.input
-result_csv = args.output
+
 # Get script directory for relative paths
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CONFIG_PATH = f"{SCRIPT_DIR}\\config\\PTL_default.config"
 
+skip_folder_list = ["MSTeamsLogs", "Training", "Report"]
 
-hobl_sets = list()
-picks = {
+# parse_tree options, named after the command line arguments
+DEFAULT_OPTIONS = {
+    "hobl":False,
+    "crawl_threads":crw.DEFAULT_CRAWL_THREADS,
+    "jobs":1,
+    "no_cache":False,
+    "cache_dir":None,
+    "incremental":False,
+    "manifest":None,
+    # output prefix of the reports, the parse cache and the incremental state live next to it
+    "output":None,
+    "path_splitter":"\\",
+}
+
+
+def defaultPicks() :
+    return {
         "SOC_POWER_RAIL_NAME":'', "PCORE_POWER_RAIL_NAME":'', "SA_POWER_RAIL_NAME":'', "GT_POWER_RAIL_NAME":'', 
         'power_pick':MED,
         'inferencingOnlyPower':True, 
@@ -116,106 +100,138 @@ picks = {
         }
 
 
-config_json = dict()
-
-if args.config is None:
-    print("============== No external default config JSON provided")
-    config_json = tools.jsonLoader(f"{SCRIPT_DIR}\\config\\PTL_default.config", picks)
-else :
-    config_json = tools.jsonLoader(args.config, picks)
-    print(config_json)
-
-
-
-socwatch_targets = config_json["socwatch_targets"]
-PCIe_targets = config_json["PCIe_targets"]
-DAQ_target = config_json["DAQ_target"]
-second_folder_list = config_json["Second_folder_list"]
-picks["second_folder_list"] = second_folder_list
-AI_parsing_items = config_json["AI_parsing_items"] if "AI_parsing_items" in config_json else None
-BM_parsing_items = config_json["BM_parsing_items"] if "BM_parsing_items" in config_json else None
-loaded_file_num = 0
+def loadConfig(config_path=None, daq_path=None, swtarget_path=None) :
+    # config as the command line loads it. the picks (rail names, power pick) come from the config file,
+    # -d and -st only replace the DAQ / SocWatch targets
+    picks = defaultPicks()
+    if config_path is None:
+        print("============== No external default config JSON provided")
+        config_json = tools.jsonLoader(DEFAULT_CONFIG_PATH, picks)
+    else :
+        config_json = tools.jsonLoader(config_path, picks)
+        print(config_json)
 
+    if daq_path is None:
+        print("============== No external DAQ.json provided")
+    else :
+        with open(daq_path, 'r') as f:
+            config_json["DAQ_target"] = json.load(f)
+            print(config_json["DAQ_target"])
 
+    if swtarget_path is None:
+        print("============== No external Socwatch_target.json provided")
+    else :
+        with open(swtarget_path, 'r') as f:
+            config_json["socwatch_targets"] = json.load(f)
+            print(config_json["socwatch_targets"])
+
+    # the bucket lists are compiled (and checked) here once, not per parsed table
+    bspec.compileTargets(config_json.get("socwatch_targets"))
+    bspec.compileTargets(config_json.get("PCIe_targets"))
+    cpt.configDetection(config_json)
+
+    config_json["picks"] = picks
+    return config_json
+
+
+class ParseResult:
+    """One parse_tree run: its config and options, the queued parse jobs and the parsed data sets.
+
+    Everything a run collects lives here (and in its ParseContext), so one process can parse
+    any number of trees one after another. write_reports turns it into the Excel reports.
+    """
+
+    def __init__(self, input_path, config, options=None):
+        self.options = dict(DEFAULT_OPTIONS)
+        self.options.update(options or {})
+        self.input_path = input_path
+        self.path_splitter = self.options["path_splitter"]
+
+        self.socwatch_targets = config["socwatch_targets"]
+        self.PCIe_targets = config["PCIe_targets"]
+        self.DAQ_target = config["DAQ_target"]
+        self.second_folder_list = config["Second_folder_list"]
+        self.AI_parsing_items = config["AI_parsing_items"] if "AI_parsing_items" in config else None
+        self.BM_parsing_items = config["BM_parsing_items"] if "BM_parsing_items" in config else None
+        if "picks" in config :
+            self.picks = dict(config["picks"])
+        else :
+            # a config dict that did not go through loadConfig
+            self.picks = defaultPicks()
+            tools.parsePowerRailNames(self.DAQ_target, self.picks)
+        self.picks["second_folder_list"] = self.second_folder_list
+        # rail and change point detector per device for the inferencing only power
+        detection = cpt.configDetection(config)
+        if detection :
+            self.picks[cpt.CONFIG_KEY] = detection
+
+        # everything this run collects (data sets, loaded file count, report headers) lives in the parse context
+        self.context = pctx.ParseContext(self.path_splitter)
+        # data sets indexed by ID path, hobl_sets is the ordered list handed to the checker and reporters
+        self.dataset_registry = self.context.dataset_registry
+        self.hobl_sets = self.context.hobl_sets
+        self.parse_jobs = list()
+        # folder listings replayed from the crawl manifest, None walks the file system
+        self.folder_listings = None
+        # folder listings of the crawl and the SocWatch collections already resolved from them
+        self.sibling_index = crw.SiblingIndex()
+        self.resolved_socwatch_sessions = set()
+        # built-in rules plus "file_classifier_rules" of the config, compiled once into one regex
+        self.file_rules = fcl.FileClassifier(fcl.configRules(config), file_handlers.keys())
+        # incremental runs only
+        self.config_hash = None
+        self.fingerprints = None
+
+    @property
+    def loaded_file_num(self):
+        return self.context.loaded_file_num
+
+    def outputPrefix(self):
+        if self.options["output"] is not None :
+            return self.options["output"]
+        return f"{self.input_path}{self.path_splitter}parseAll"
+
+    def configHash(self):
+        return pcache.configHash([self.socwatch_targets, self.PCIe_targets, self.DAQ_target, self.AI_parsing_items, self.BM_parsing_items, self.picks])
 
-path_splitter = "\\"
 
 def replaceSplitter(Abs_path) :
     Abs_path = Abs_path.replace("/", "\\")
     return Abs_path
 
-if BASE is None:
-    from tools.tk_dialogs import select_folder_dialog
-
-    folder_path = select_folder_dialog(
-        title="Select a folder",
-        storage_name="last_opened_folder",
-        base_dir=Path(SCRIPT_DIR),
-    )
-    if folder_path:
-        BASE = replaceSplitter(folder_path)
-        print(f"Selected folder: {BASE}")
-    else:
-        tools.errorAndExit("No folder selected")
-
-if args.daq is None:
-    print("============== No external DAQ.json provided")
-else :
-    with open(args.daq, 'r') as f:
-        DAQ_target = json.load(f)
-        print(DAQ_target)
 
-if args.swtarget is None:
-    print("============== No external Socwatch_target.json provided")
-else :
-    with open(args.swtarget, 'r') as f:
-        socwatch_targets = json.load(f)
-        print(socwatch_targets)
+def getDatasetLabel(run, abs_path) :
 
-print("===== args hobl: ", args.hobl)
-
-if result_csv == None : 
-    result_csv = f"{BASE}\\parseAll"
-
-
-
-def getDatasetLabel(abs_path) :
-
-    folder_list = abs_path.split(path_splitter)
-    folder_structure_detector = abs_path.split(path_splitter)[:-1]
+    folder_list = abs_path.split(run.path_splitter)
+    folder_structure_detector = abs_path.split(run.path_splitter)[:-1]
     last_folder = folder_structure_detector[-1]
     sl_upper = last_folder.upper()
-    if sl_upper in second_folder_list:
+    if sl_upper in run.second_folder_list:
         return [folder_list[-4], folder_list[-2]]
     else :
         return [folder_list[-3], folder_list[-2]]
 
-def createDataset(abs_path) :
+def createDataset(run, abs_path) :
     # print("[abs_path] ", abs_path)
     return {
         "ID_path":abs_path,
-        "data_label":getDatasetLabel(abs_path),
+        "data_label":getDatasetLabel(run, abs_path),
         "data_type":[]
     }
 
-def folderScructureRouter(abs_path) :
-    folder_list = abs_path.split(path_splitter)
+def folderScructureRouter(run, abs_path) :
+    folder_list = abs_path.split(run.path_splitter)
     if (len(folder_list) > 1 and folder_list[-1].lower() == folder_list[-2].lower()) or (len(folder_list) > 0 and folder_list[-1].lower() == "socwatch") :
-        return tools.splitLastItem(abs_path, path_splitter, 1)[0]
+        return tools.splitLastItem(abs_path, run.path_splitter, 1)[0]
     else :
         return abs_path
 
-def pullData(abs_path) :
-    retrieved = None
+def pullData(run, abs_path) :
+    retrieved = run.dataset_registry.find(abs_path)
 
-    for item in hobl_sets:
-        if abs_path == item["ID_path"] or abs_path.startswith(item["ID_path"] + path_splitter):
-            retrieved = item
-            break
-    if retrieved is None and args.hobl != True:
+    if retrieved is None and run.options["hobl"] != True:
         
-        retrieved = createDataset(folderScructureRouter(abs_path))
-        hobl_sets.append(retrieved)
+        retrieved = run.dataset_registry.add(createDataset(run, folderScructureRouter(run, abs_path)))
     
     return retrieved
 
@@ -229,254 +245,404 @@ def calFromPowerModel(block) :
             block['power_obj']['power_data']['Eng(J)/Frame'] = "n/a"
 
 
-def fileLoadingCounter(num) :
-    global loaded_file_num
-    loaded_file_num += num
+def fileLoadingCounter(run, num) :
+    run.context.countLoadedFiles(num)
+
+def queueParseJob(run, dataset, parser_name, abs_path) :
+    # classification phase only records what to parse, the parse phase runs the jobs (optionally on a process pool)
+    run.parse_jobs.append({"dataset":dataset, "parser":parser_name, "path":abs_path})
+
+def jobConfig(run, parser_name) :
+    if parser_name == pj.POWER_SUMMARY :
+        return run.DAQ_target
+    elif parser_name == pj.SOCWATCH_SUMMARY :
+        return run.socwatch_targets
+    elif parser_name == pj.PCIE_SOCWATCH_SUMMARY :
+        return run.PCIe_targets
+    elif parser_name == pj.MS_AI_MODEL_OUTPUT :
+        return run.AI_parsing_items
+    elif parser_name == pj.LLAMA_OUTPUT :
+        return run.BM_parsing_items
+    else :
+        return None
 
-def add_vpt_out(abs_path):
-    path_set = tools.splitLastItem(abs_path, "\\", 1)
-    dataset = pullData(path_set[0])
+def add_vpt_out(run, abs_path):
+    path_set = tools.splitLastItem(abs_path, run.path_splitter, 1)
+    dataset = pullData(run, path_set[0])
     if dataset == None:
         tools.errorAndExit("pulling data failed by using the Path as ID: " + abs_path)
     if VPT_FPS not in dataset["data_type"] :
         dataset["data_type"].insert(0, VPT_FPS)
-        dataset["vpt_output_obj"] = vop.parseVptResults(abs_path)
-        # calFromPowerModel(dataset)
-        fileLoadingCounter(1)
+        queueParseJob(run, dataset, pj.VPT_OUTPUT, abs_path)
 
-def add_etl(abs_path):
-    path_set = tools.splitLastItem(abs_path, path_splitter, 1)
-    dataset = pullData(path_set[0])
+def add_etl(run, abs_path):
+    path_set = tools.splitLastItem(abs_path, run.path_splitter, 1)
+    dataset = pullData(run, path_set[0])
     if dataset == None:
         tools.errorAndExit("pulling data failed by using the Path as ID: " + abs_path)
     if ETL not in dataset["data_type"] :
         dataset["data_type"].insert(0, ETL)
         dataset["etl_path"] = abs_path
 
-def add_llama_model_output(abs_path):
-    path_set = tools.splitLastItem(abs_path, "\\", 1)
-    dataset = pullData(path_set[0])
+def add_llama_model_output(run, abs_path):
+    path_set = tools.splitLastItem(abs_path, run.path_splitter, 1)
+    dataset = pullData(run, path_set[0])
     if dataset == None : 
         tools.errorAndExit("pulling data failed by using the Path as ID: " + abs_path)
-    if BM_parsing_items is None:
+    if run.BM_parsing_items is None:
         tools.errorAndExit("BM_parsing_items is not defined in config, cannot parse BM model output: " + abs_path)
     if LLAMA not in dataset["data_type"] :
         dataset["data_type"].insert(0, LLAMA)
-        dataset["model_output_obj"] = lop.parseModelResults(abs_path, BM_parsing_items)
-        # calFromPowerModel(dataset)
-        fileLoadingCounter(1)
+        queueParseJob(run, dataset, pj.LLAMA_OUTPUT, abs_path)
 
-def add_MS_AI_model_output(abs_path):
-    path_set = tools.splitLastItem(abs_path, "\\", 1)
-    dataset = pullData(path_set[0])
+def add_MS_AI_model_output(run, abs_path):
+    path_set = tools.splitLastItem(abs_path, run.path_splitter, 1)
+    dataset = pullData(run, path_set[0])
     if dataset == None :
         tools.errorAndExit("pulling data failed by using the Path as ID: " + abs_path)
-    if  AI_parsing_items is None:
+    if run.AI_parsing_items is None:
         tools.errorAndExit("AI_parsing_items is not defined in config, cannot parse AI model output: " + abs_path)
     if MS_AI_MODEL not in dataset["data_type"] :
         dataset["data_type"].insert(0, MS_AI_MODEL)
-        dataset["model_output_obj"] = mop.parseModelResults(abs_path, AI_parsing_items)
-        calFromPowerModel(dataset)
-        fileLoadingCounter(1)
+        queueParseJob(run, dataset, pj.MS_AI_MODEL_OUTPUT, abs_path)
 
-def add_power(abs_path):
-    path_set = tools.splitLastItem(abs_path, path_splitter, 1)
-    dataset = pullData(path_set[0])
+def add_power(run, abs_path):
+    path_set = tools.splitLastItem(abs_path, run.path_splitter, 1)
+    dataset = pullData(run, path_set[0])
     if dataset == None:
         tools.errorAndExit("pulling data failed by using the Path as ID: " + abs_path)
     if POWER not in dataset["data_type"] :
         dataset["data_type"].append(POWER)
-        dataset["power_obj"] = psp.parsePowerSummaryCSV(abs_path, DAQ_target)
-        # calFromPowerModel(dataset)
-        fileLoadingCounter(1)
+        queueParseJob(run, dataset, pj.POWER_SUMMARY, abs_path)
 
-def add_power_runtime(abs_path):
-    path_set = tools.splitLastItem(abs_path, "\\", 1)
-    dataset = pullData(path_set[0])
+def add_power_runtime(run, abs_path):
+    path_set = tools.splitLastItem(abs_path, run.path_splitter, 1)
+    dataset = pullData(run, path_set[0])
     if dataset == None:
         tools.errorAndExit("pulling data failed by using the Path as ID: " + abs_path)
-    if "power_obj" in dataset and "power_data" in dataset["power_obj"] :
-        dataset["power_obj"]["power_data"]["Run Time"] = psp.parseHopperRuntime(abs_path, None)
-        calFromPowerModel(dataset)
-        fileLoadingCounter(1)
+    # files are classified in crawl order, so POWER is there exactly when the power summary came first
+    if POWER in dataset["data_type"] :
+        queueParseJob(run, dataset, pj.POWER_RUNTIME, abs_path)
 
-def add_trace(abs_path):
-    path_set = tools.splitLastItem(abs_path, path_splitter, 1)
-    dataset = pullData(path_set[0])
+def add_trace(run, abs_path):
+    path_set = tools.splitLastItem(abs_path, run.path_splitter, 1)
+    dataset = pullData(run, path_set[0])
     if dataset == None:
         tools.errorAndExit("pulling data failed by using the Path as ID: " + abs_path)
     if POWER_RAW_TRACE not in dataset["data_type"] :
         dataset["data_type"].insert(0, POWER_RAW_TRACE)
-        dataset["trace_obj"] = ptp.parsePowerTraceCSV(abs_path)
-        fileLoadingCounter(1)
+        queueParseJob(run, dataset, pj.POWER_TRACE, abs_path)
 
-def add_socwatch(abs_path):
-    path_set = tools.splitLastItem(abs_path, path_splitter, 1)
-    dataset = pullData(path_set[0])
+def add_socwatch(run, abs_path):
+    path_set = tools.splitLastItem(abs_path, run.path_splitter, 1)
+    dataset = pullData(run, path_set[0])
     if dataset == None:
         tools.errorAndExit("pulling data failed by using the Path as ID: " + abs_path)
     if SOCWATCH not in dataset["data_type"] :
         dataset["data_type"].insert(0, SOCWATCH)
-        dataset["socwatch_obj"] = soc.parseSocwatch(abs_path, socwatch_targets)
-        fileLoadingCounter(1)
+        queueParseJob(run, dataset, pj.SOCWATCH_SUMMARY, abs_path)
 
-def add_pcie_only(abs_path):
-    path_set = tools.splitLastItem(abs_path, path_splitter, 1)
-    dataset = pullData(path_set[0])
+def add_pcie_only(run, abs_path):
+    path_set = tools.splitLastItem(abs_path, run.path_splitter, 1)
+    dataset = pullData(run, path_set[0])
     if dataset == None:
         tools.errorAndExit("pulling data failed by using the Path as ID: " + abs_path)
     if PCIE not in dataset["data_type"] :
         dataset["data_type"].insert(0, PCIE)
-        dataset["pcie_socwatch_obj"] = psoc.parsePCIe(abs_path, PCIe_targets)
-        fileLoadingCounter(1)
+        queueParseJob(run, dataset, pj.PCIE_SOCWATCH_SUMMARY, abs_path)
 
-def add_procyon_xml_result(abs_path):
-    path_set = tools.splitLastItem(abs_path, path_splitter, 1)
-    dataset = pullData(path_set[0])
+def add_procyon_xml_result(run, abs_path):
+    path_set = tools.splitLastItem(abs_path, run.path_splitter, 1)
+    dataset = pullData(run, path_set[0])
     if dataset == None:
         tools.errorAndExit("pulling data failed by using the Path as ID: " + abs_path)
     if PROCYON not in dataset["data_type"] :
         dataset["data_type"].insert(0, PROCYON)
-    pxp.parseProcyonResultScore(dataset, abs_path)
-    fileLoadingCounter(1)
+    queueParseJob(run, dataset, pj.PROCYON_XML, abs_path)
 
-def add_procyon_arielle_result(abs_path):
-    path_set = tools.splitLastItem(abs_path, path_splitter, 1)
-    dataset = pullData(path_set[0])
+def add_procyon_arielle_result(run, abs_path):
+    path_set = tools.splitLastItem(abs_path, run.path_splitter, 1)
+    dataset = pullData(run, path_set[0])
     if dataset == None:
         tools.errorAndExit("pulling data failed by using the Path as ID: " + abs_path)
     if PROCYON not in dataset["data_type"] :
         dataset["data_type"].insert(0, PROCYON)
-    pxp.parseProcyonResultArielle(dataset, abs_path)
-    fileLoadingCounter(1)
+    queueParseJob(run, dataset, pj.PROCYON_ARIELLE, abs_path)
 
-def add_lpmode_full(abs_path):
-    path_set = tools.splitLastItem(abs_path, path_splitter, 1)
-    dataset = pullData(path_set[0])
+def add_lpmode_full(run, abs_path):
+    path_set = tools.splitLastItem(abs_path, run.path_splitter, 1)
+    dataset = pullData(run, path_set[0])
     if dataset == None:
         tools.errorAndExit("pulling data failed by using the Path as ID: " + abs_path)
     if LPMODE_FULL not in dataset["data_type"] :
         dataset["data_type"].insert(0, LPMODE_FULL)
-        dataset["lpmode_full_obj"] = lpf.parseLPmodeFull(abs_path)
-        fileLoadingCounter(1)
+        queueParseJob(run, dataset, pj.LPMODE_FULL, abs_path)
 
-def add_Catapult_V3(abs_path):
-    path_set = tools.splitLastItem(abs_path, path_splitter, 1)
-    dataset = pullData(path_set[0])
+def add_Catapult_V3(run, abs_path):
+    path_set = tools.splitLastItem(abs_path, run.path_splitter, 1)
+    dataset = pullData(run, path_set[0])
     if dataset == None:
         tools.errorAndExit("pulling data failed by using the Path as ID: " + abs_path)
     if CATAPULT_V3 not in dataset["data_type"] :
         dataset["data_type"].insert(0, CATAPULT_V3)
-        dataset["catapult_v3_obj"] = psp.parseCatapultV3CSV(abs_path)
-        fileLoadingCounter(1)
-
-
-
-def fileClassifier(abs_path, f):
-
-    file_type = CL_UNCLASSIFIED
-    
-    if args.hobl == True and (f == CL_PASS or f == CL_FAIL):
-        hobl_sets.append(createDataset(tools.splitLastItem(abs_path, path_splitter, 1)[0]))
-    elif f == CL_VPT:
-        add_vpt_out(abs_path)
-        file_type = CL_VPT
-    elif f.find(CL_ETL) >= 0 and f.find(CL_SOCWATCH) == -1 : 
-        # print("ETL detected ", abs_path, f)
-        add_etl(abs_path)
-        file_type = CL_ETL
-    elif any(f.find(key) >= 0 for key in CL_POWER_SUMMARIES):
-        add_power(abs_path)
-        file_type = CL_POWER_SUMMARIES
-    elif f.find(CL_DAQ_TRACES) >= 0 and f.find('sr.csv') >= 0:
-        add_trace(abs_path)
-        file_type = CL_DAQ_TRACES
-    elif f.find(CL_FLEX_RESULTS) >= 0:
-        add_power_runtime(abs_path)
-        file_type = CL_FLEX_RESULTS
-    elif f.lower().find(CL_LPMODE_FULL) >= 0:
-        add_lpmode_full(abs_path)
-        file_type = CL_LPMODE_FULL
-    elif any(f.find(key) >= 0 for key in CL_CATAPULT_V3):
-        add_Catapult_V3(abs_path)
-        file_type = CL_CATAPULT_V3
-    elif any(f.find(item) >= 0 for item in CL_AI_MODELS):
-        if f.find("llama") >= 0:
-            add_llama_model_output(abs_path)
-            file_type = CL_AI_MODELS
-        else :
-            add_MS_AI_model_output(abs_path)
-        file_type = CL_AI_MODELS
-    elif f.find(CL_SOCWATCH) >= 0:
-        workload_name = tools.splitLastItem(f, "_", 1)[0]
-        upto_path = tools.splitLastItem(abs_path, path_splitter, 1)[0]
-        
-        # Check for both naming patterns: {workload_name}.csv and {workload_name}_summary.csv
-        soc_summary = workload_name + ".csv"
-        soc_summary_alt = workload_name + "_summary.csv"
-        summary_fullPath = os.path.join(upto_path, soc_summary)
-        summary_fullPath_alt = os.path.join(upto_path, soc_summary_alt)
-        
-        # Use the alternative summary if the first one doesn't exist
-        if not os.path.exists(summary_fullPath) and os.path.exists(summary_fullPath_alt):
-            summary_fullPath = summary_fullPath_alt
-        
-        osSession_fullPath = os.path.join(upto_path, workload_name+"_osSession.etl")
-        if os.path.exists(summary_fullPath) and os.path.exists(osSession_fullPath):
-            add_socwatch(summary_fullPath)
-            file_type = CL_SOCWATCH
-        elif os.path.exists(summary_fullPath) and not os.path.exists(osSession_fullPath):
-            add_pcie_only(summary_fullPath)
-            file_type = CL_SOCWATCH
-        else :
-            print("===== No Socwatch summary, Socwatch post-process may have interrupted or socwatch summary file name has altered", abs_path)
-    elif f.lower().find(CL_SOCWATCH_CSV[0]) >= 0 and f.lower().endswith(CL_SOCWATCH_CSV[1]):
-        # file_size = os.path.getsize(abs_path)
-        add_socwatch(abs_path)
-        file_type = CL_SOCWATCH
-    elif f.lower().find(CL_PCIE_SOCWATCH_CSV[0]) >= 0 and f.lower().endswith(CL_PCIE_SOCWATCH_CSV[1]):
-        add_pcie_only(abs_path)
-        file_type = CL_SOCWATCH
-    elif f.lower().find(CL_PROCYON_RESULT_XML[0]) >= 0 and f.lower().endswith(CL_PROCYON_RESULT_XML[1]):
-        add_procyon_xml_result(abs_path)
-        file_type = CL_PROCYON_RESULT_XML 
-    elif f.lower().endswith(CL_PROCYON_RESULT_ARIELLE) :
-        add_procyon_arielle_result(abs_path)
-        file_type = CL_PROCYON_RESULT_ARIELLE
+        queueParseJob(run, dataset, pj.CATAPULT_V3, abs_path)
+
+
+def mergeParsedResult(run, job, parsed) :
+    # replayed in crawl order, so the dataset ends up the same as with the old inline parsing
+    dataset = job["dataset"]
+    parser_name = job["parser"]
+
+    if parser_name == pj.VPT_OUTPUT :
+        dataset["vpt_output_obj"] = parsed
+        fileLoadingCounter(run, 1)
+    elif parser_name == pj.LLAMA_OUTPUT :
+        dataset["model_output_obj"] = parsed
+        fileLoadingCounter(run, 1)
+    elif parser_name == pj.MS_AI_MODEL_OUTPUT :
+        dataset["model_output_obj"] = parsed
+        calFromPowerModel(dataset)
+        fileLoadingCounter(run, 1)
+    elif parser_name == pj.POWER_SUMMARY :
+        dataset["power_obj"] = parsed
+        fileLoadingCounter(run, 1)
+    elif parser_name == pj.POWER_RUNTIME :
+        if "power_obj" in dataset and "power_data" in dataset["power_obj"] :
+            dataset["power_obj"]["power_data"]["Run Time"] = parsed
+            calFromPowerModel(dataset)
+            fileLoadingCounter(run, 1)
+    elif parser_name == pj.POWER_TRACE :
+        dataset["trace_obj"] = parsed
+        fileLoadingCounter(run, 1)
+    elif parser_name == pj.SOCWATCH_SUMMARY :
+        dataset["socwatch_obj"] = parsed
+        fileLoadingCounter(run, 1)
+    elif parser_name == pj.PCIE_SOCWATCH_SUMMARY :
+        dataset["pcie_socwatch_obj"] = parsed
+        fileLoadingCounter(run, 1)
+    elif parser_name == pj.PROCYON_XML or parser_name == pj.PROCYON_ARIELLE :
+        for key in parsed :
+            if key not in dataset :
+                dataset[key] = dict()
+            dataset[key].update(parsed[key])
+        fileLoadingCounter(run, 1)
+    elif parser_name == pj.LPMODE_FULL :
+        dataset["lpmode_full_obj"] = parsed
+        fileLoadingCounter(run, 1)
+    elif parser_name == pj.CATAPULT_V3 :
+        dataset["catapult_v3_obj"] = parsed
+        fileLoadingCounter(run, 1)
+
+def runParseJobs(run) :
+    jobs = [(job["parser"], job["path"], jobConfig(run, job["parser"])) for job in run.parse_jobs]
+    parse_cache = None
+    if not run.options["no_cache"] :
+        # unchanged files (same path, size, mtime, parser and config section) are served from the cache
+        cache_dir = run.options["cache_dir"] if run.options["cache_dir"] is not None else (os.path.dirname(run.outputPrefix()) or ".")
+        parse_cache = pcache.ParseCache(cache_dir)
+    parsed_list = pj.runParseJobs(jobs, run.options["jobs"], parse_cache, run.context)
+    if parse_cache is not None :
+        parse_cache.printStats()
+        parse_cache.close()
+    for job, parsed in zip(run.parse_jobs, parsed_list) :
+        mergeParsedResult(run, job, parsed)
+
+
+
+def add_hobl_marker(run, abs_path):
+    # .PASS / .FAIL mark the data set folder only when collected through HOBL
+    if run.options["hobl"] == True :
+        run.dataset_registry.add(createDataset(run, tools.splitLastItem(abs_path, run.path_splitter, 1)[0]))
+
+
+def add_socwatch_session(run, abs_path):
+    upto_path, f = tools.splitLastItem(abs_path, run.path_splitter, 1)
+    workload_name = tools.splitLastItem(f, "_", 1)[0]
+
+    # the session ETLs of one collection (hw, os, ...) share the summary, resolve it once per collection
+    if (upto_path, workload_name) in run.resolved_socwatch_sessions :
+        return
+    run.resolved_socwatch_sessions.add((upto_path, workload_name))
+
+    # Check for both naming patterns: {workload_name}.csv and {workload_name}_summary.csv
+    # siblings are looked up in the crawl listing, not stat'ed on the share
+    soc_summary = workload_name + ".csv"
+    if not run.sibling_index.exists(upto_path, soc_summary) and run.sibling_index.exists(upto_path, workload_name + "_summary.csv"):
+        soc_summary = workload_name + "_summary.csv"
+    summary_fullPath = os.path.join(upto_path, soc_summary)
+
+    if run.sibling_index.exists(upto_path, soc_summary) and run.sibling_index.exists(upto_path, workload_name + "_osSession.etl"):
+        add_socwatch(run, summary_fullPath)
+    elif run.sibling_index.exists(upto_path, soc_summary):
+        add_pcie_only(run, summary_fullPath)
+    else :
+        print("===== No Socwatch summary, Socwatch post-process may have interrupted or socwatch summary file name has altered", abs_path)
+
+
+# classification tag -> handler, the tags come from the rule registry in parsers/file_classifier.py
+file_handlers = {
+    fcl.TAG_PASS_FAIL: add_hobl_marker,
+    fcl.TAG_VPT: add_vpt_out,
+    fcl.TAG_ETL: add_etl,
+    fcl.TAG_POWER_SUMMARY: add_power,
+    fcl.TAG_DAQ_TRACE: add_trace,
+    fcl.TAG_FLEX_RESULTS: add_power_runtime,
+    fcl.TAG_LPMODE_FULL: add_lpmode_full,
+    fcl.TAG_CATAPULT_V3: add_Catapult_V3,
+    fcl.TAG_LLAMA_OUTPUT: add_llama_model_output,
+    fcl.TAG_MS_AI_MODEL: add_MS_AI_model_output,
+    fcl.TAG_SOCWATCH_SESSION: add_socwatch_session,
+    fcl.TAG_SOCWATCH_CSV: add_socwatch,
+    fcl.TAG_PCIE_SOCWATCH_CSV: add_pcie_only,
+    fcl.TAG_PROCYON_XML: add_procyon_xml_result,
+    fcl.TAG_PROCYON_ARIELLE: add_procyon_arielle_result,
+}
+
+
+def fileClassifier(run, abs_path, f):
+
+    file_type = run.file_rules.classify(f)
+    if file_type != fcl.TAG_UNCLASSIFIED :
+        file_handlers[file_type](run, abs_path)
     return file_type
 
-skip_folder_list = ["MSTeamsLogs", "Training", "Report"]
-
-def detectAndParseFile(path) :
-
-    # listdir gives back all file system list, including file and folder
-    for f in os.listdir(path):
-        abs_path = os.path.join(path, f)
-        if os.path.isfile(abs_path):
-            fType = fileClassifier(abs_path, f)
-
-        elif f not in skip_folder_list:
-
-            #recursive on a folder detection
-            detectAndParseFile(abs_path)
-
-
-def main():
-    detectAndParseFile(BASE)
-    pck.checkAndMarkPower(hobl_sets, picks)
-    print("====[hobl_sets]", hobl_sets)
-    rpt.writeParsedAllInExcel(result_csv, hobl_sets, socwatch_targets, PCIe_targets, picks)
-
-
-start_time = time.perf_counter()
-main()
-end_time = time.perf_counter()
-elapsed_time = end_time - start_time
-print(f"Parsing {loaded_file_num} files Successful! [Elapsed time:::] {elapsed_time} seconds")
-
-
-
-
-
-
-
+def detectAndParseFile(run, path) :
+
+    # folders are listed in parallel (scandir), then files are classified in the same order as the serial walk
+    listings = run.folder_listings
+    if listings is None :
+        listings = crw.listTree(path, skip_folder_list, run.options["crawl_threads"])
+    # keep the listings, so SocWatch sibling files are resolved in memory
+    run.sibling_index = crw.SiblingIndex(listings)
+    for abs_path, f in crw.orderedFiles(path, listings, skip_folder_list):
+        fType = fileClassifier(run, abs_path, f)
+
+
+def datasetFingerprints(run) :
+    # ID_path -> fingerprint of every file classified into that data set
+    dataset_files = dict()
+    for dataset in run.hobl_sets :
+        files = dataset_files.setdefault(dataset["ID_path"], [])
+        if "etl_path" in dataset :
+            files.append(dataset["etl_path"])
+    for job in run.parse_jobs :
+        dataset_files[job["dataset"]["ID_path"]].append(job["path"])
+    return {id_path: inc.datasetFingerprint(files) for id_path, files in dataset_files.items()}
+
+def reuseReportedDatasets(run) :
+    # swap unchanged data sets for the ones reported last time and drop their parse jobs.
+    # returns the data_label groups that have to be re-checked for the power pick
+    previous = inc.loadState(inc.statePath(run.outputPrefix()), run.config_hash)
+    hobl_sets = run.hobl_sets
+    affected_labels = set()
+    reused = set()
+    seen = set()
+
+    for idx, dataset in enumerate(hobl_sets) :
+        id_path = dataset["ID_path"]
+        stored = previous.get(id_path)
+        if id_path not in seen and stored is not None and stored["fingerprint"] == run.fingerprints[id_path] :
+            hobl_sets[idx] = stored["dataset"]
+            reused.add(id(dataset))
+        else :
+            affected_labels.add(" ".join(dataset["data_label"]))
+        seen.add(id_path)
+
+    for id_path in previous :
+        if id_path not in seen :
+            # removed since the last run, its group has to be picked again
+            affected_labels.add(" ".join(previous[id_path]["dataset"]["data_label"]))
+
+    run.parse_jobs[:] = [job for job in run.parse_jobs if id(job["dataset"]) not in reused]
+    print(f"[incremental] reused {len(reused)} data sets, parsing {len(hobl_sets) - len(reused)} new or changed")
+    return affected_labels
+
+
+def parse_tree(input_path, config, options=None) :
+    """Crawl input_path, parse every detected file and pick the power of each data set.
+
+    config is the loaded config dict (see loadConfig), options overrides DEFAULT_OPTIONS.
+    input_path may be None when options["manifest"] is given, the crawled folder is used then.
+    Nothing is written except the parse cache, call write_reports with the returned ParseResult.
+    """
+    run = ParseResult(input_path, config, options)
+    if run.options["manifest"] is not None :
+        run.input_path, run.folder_listings = mnf.loadListings(run.options["manifest"], input_path)
+    if run.input_path is None :
+        raise ValueError("parse_tree needs an input path or a crawl manifest")
+
+    # phase 1: crawl and classify into a job list, phase 2: parse the jobs and merge them back in crawl order
+    detectAndParseFile(run, run.input_path)
+    affected_labels = None
+    if run.options["incremental"] :
+        run.config_hash = run.configHash()
+        run.fingerprints = datasetFingerprints(run)
+        affected_labels = reuseReportedDatasets(run)
+    runParseJobs(run)
+    pck.checkAndMarkPower(run.hobl_sets, run.picks, affected_labels)
+    return run
+
+
+def write_reports(result, output_prefix=None) :
+    """Write the Excel reports of a parse_tree result, output_prefix defaults to the output option."""
+    if output_prefix is None :
+        output_prefix = result.outputPrefix()
+    print("====[hobl_sets]", result.hobl_sets)
+    rpt.writeParsedAllInExcel(output_prefix, result.hobl_sets, result.socwatch_targets, result.PCIe_targets, result.picks, result.context)
+    if result.options["incremental"] :
+        inc.saveState(inc.statePath(output_prefix), result.config_hash, result.hobl_sets, result.fingerprints)
+
+
+def buildArgParser() :
+    parser = argparse.ArgumentParser(prog='AI summary parser')
+    parser.add_argument('-c', '--config', help='configuration path. json format, need to have all of -d -st and others')
+    parser.add_argument('-i', '--input', help='input path. this will be the bese of the summray, will detect all files and folders from that path tree')
+    parser.add_argument('-o', '--output', help='output path. location of file and file name')
+    parser.add_argument('-d', '--daq', help='DAQ power rail name dictionary')
+    parser.add_argument('-st', '--swtarget', help='a list of dictionary objects that you want to parse from the socwatch summary')
+    parser.add_argument('-hb', '--hobl', action='store_true', help='if the data is collected via HOBL, looking for .PASS or .FAIL file in the folder to set file path as data set ID')
+    parser.add_argument('--crawl-threads', type=int, default=crw.DEFAULT_CRAWL_THREADS, help='number of threads listing folders in parallel while crawling the input tree')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='number of worker processes parsing the detected files. 1 parses in this process, 0 uses every CPU core')
+    parser.add_argument('--no-cache', action='store_true', help='parse every file again instead of reusing the parse cache')
+    parser.add_argument('--incremental', action='store_true', help='only parse data sets that are new or changed since the last run with the same output, and rewrite the excel from the merged state')
+    parser.add_argument('--cache-dir', help='folder of the parse cache (parse_cache.sqlite). default is the output folder')
+    parser.add_argument('--manifest', help='crawl manifest from crawl_manifest.py, replayed instead of walking the input tree. -i defaults to the crawled folder')
+    return parser
+
+
+def main(argv=None):
+    args = buildArgParser().parse_args(argv)
+    print("args: ", args)
+
+    #BASE = os.getcwd()
+    # BASE = "\\\\10.54.63.126\\Pnpext\\Siwoo\\WW17.1_LNL32_ov20252\\test_data"
+    BASE = args.input
+    if BASE is None and args.manifest is None :
+        from tools.tk_dialogs import select_folder_dialog
+
+        folder_path = select_folder_dialog(
+            title="Select a folder",
+            storage_name="last_opened_folder",
+            base_dir=Path(SCRIPT_DIR),
+        )
+        if folder_path:
+            BASE = replaceSplitter(folder_path)
+            print(f"Selected folder: {BASE}")
+        else:
+            tools.errorAndExit("No folder selected")
+
+    config_json = loadConfig(args.config, args.daq, args.swtarget)
+    print("===== args hobl: ", args.hobl)
+
+    options = {name: getattr(args, name) for name in DEFAULT_OPTIONS if hasattr(args, name)}
+    start_time = time.perf_counter()
+    result = parse_tree(BASE, config_json, options)
+    write_reports(result, args.output)
+    end_time = time.perf_counter()
+    elapsed_time = end_time - start_time
+    print(f"Parsing {result.loaded_file_num} files Successful! [Elapsed time:::] {elapsed_time} seconds")
+
+
+# worker processes re-import this script on Windows (spawn), nothing may run at import
+if __name__ == "__main__":
+    main()
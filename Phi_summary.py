@@ -12,6 +12,8 @@ import parsers.power_summary_parser as psp
 import parsers.power_trace_parser as ptp
 import parsers.power_checker as pck
 import parsers.reporter as rpt
+import parsers.crawler as crw
+import parsers.manifest as mnf
 
 import argparse
 
@@ -23,6 +25,7 @@ parser.add_argument('-o', '--output', help='output path. location of file and fi
 parser.add_argument('-d', '--daq', help='DAQ power rail name dictionary')
 parser.add_argument('-st', '--swtarget', help='a list of dictionary objects that you want to parse from the socwatch summary')
 parser.add_argument('-hb', '--hobl', action='store_true', help='if the data is collected via HOBL, looking for .PASS or .FAIL file in the folder to set file path as data set ID')
+parser.add_argument('--manifest', help='crawl manifest from crawl_manifest.py, replayed instead of walking the input tree. -i defaults to the crawled folder')
 
 # parser.print_help()
 args = parser.parse_args()
@@ -57,6 +60,10 @@ MED = "MED"
 
 BASE = args.input
 result_csv = args.output
+# folder listings replayed from the crawl manifest, None walks the file system
+folder_listings = None
+if args.manifest is not None :
+    BASE, folder_listings = mnf.loadListings(args.manifest, BASE)
 # Get script directory for relative paths
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
@@ -267,11 +274,11 @@ def fileClassifier(abs_path, f):
 
 def detectAndParseFile(path) :
 
-    for f in os.listdir(path):
+    for f, is_file, is_dir, size, mtime_ns in crw.listFolder(path, folder_listings):
         abs_path = os.path.join(path, f)
         # if f == "Model_A3_v1_2_3_qdq_proxy_stripped":
         #     break
-        if os.path.isfile(abs_path):
+        if is_file:
             fType = fileClassifier(abs_path, f)
             if fType == CL_SOCWATCH :
                 # after detecting first Socwatch ETL, and it's summary, no need to go further
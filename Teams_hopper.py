@@ -12,6 +12,7 @@ import parsers.power_summary_parser as psp
 import parsers.power_trace_parser as ptp
 import parsers.power_checker as pck
 import parsers.reporter as rpt
+import parsers.dataset_registry as dsr
 
 import argparse
 
@@ -56,7 +57,9 @@ result_csv = args.output
 # Get script directory for relative paths
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
-hobl_sets = list()
+# data sets indexed by ID path, hobl_sets is the ordered list handed to the checker and reporters
+dataset_registry = dsr.DatasetRegistry("\\")
+hobl_sets = dataset_registry.datasets
 
 picks = {
         "SOC_POWER_RAIL_NAME":'', "PCORE_POWER_RAIL_NAME":'', "SA_POWER_RAIL_NAME":'', "GT_POWER_RAIL_NAME":'', 
@@ -154,17 +157,14 @@ def getDatasetLabel(abs_path) :
 
 def createDataset(abs_path) :
     # print("[abs_path] ", abs_path)
-    hobl_sets.append({
+    dataset_registry.add({
         "ID_path":abs_path,
         "data_label":getDatasetLabel(abs_path),
         "data_type":[]
     })
 
 def pullData(abs_path) :
-    for item in hobl_sets:
-        if (abs_path.find(item["ID_path"]) == 0) : 
-            return item
-    return None
+    return dataset_registry.find(abs_path)
 
 def calFromPowerModel(block) :
     
@@ -0,0 +1,42 @@
+"""
+Crawl manifest
+
+Crawls a data tree once and writes a compact manifest (path, size, mtime, classification tag).
+Every top-level parser (ParseAll, Teams++, Game_Parser, Phi_summary, MS_model_summary,
+bm_llama_parser, mlc_summary) accepts --manifest <file> and replays it instead of walking
+the (network) share again.
+
+Usage:
+    python crawl_manifest.py -i <input_folder> -o <manifest.json> [--crawl-threads N] [--skip Folder ...]
+"""
+
+import os
+import time
+import argparse
+from collections import Counter
+import parsers.crawler as crw
+import parsers.manifest as mnf
+
+
+def main() :
+    parser = argparse.ArgumentParser(prog='crawl manifest')
+    parser.add_argument('-i', '--input', required=True, help='input path, the tree to crawl')
+    parser.add_argument('-o', '--output', help='manifest file path. default is crawl_manifest.json in the input folder')
+    parser.add_argument('--crawl-threads', type=int, default=crw.DEFAULT_CRAWL_THREADS, help='number of threads listing folders in parallel')
+    parser.add_argument('--skip', nargs='*', default=[], help='folder names not to descend into (the parsers still apply their own skip lists)')
+    args = parser.parse_args()
+
+    output = args.output if args.output is not None else os.path.join(args.input, "crawl_manifest.json")
+
+    start = time.time()
+    manifest = mnf.buildManifest(args.input, args.skip, args.crawl_threads)
+    mnf.writeManifest(manifest, output)
+
+    tags = Counter(entry[4] for entries in manifest["folders"].values() for entry in entries if entry[1] == "f")
+    print(f"[manifest] {len(manifest['folders'])} folders, {sum(tags.values())} files in {time.time() - start:.2f}s -> {output}")
+    for tag, count in tags.most_common() :
+        print(f"    {tag:<20} {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import functools
+import numpy as np
+
+
+def bucketInterval(bucket, is_last) :
+    # "1900" -> (1900, 1900), the last bucket being a single value also takes every key above it.
+    # "1901-2900" -> (1901, 2900), both edges included
+    edges = bucket.split("-")
+    if len(edges) == 1 :
+        value = int(edges[0])
+        return value, (float("inf") if is_last else value)
+    if len(edges) == 2 :
+        return int(edges[0]), int(edges[1])
+    raise ValueError(f"bucket '{bucket}' is neither a value nor a 'min-max' range")
+
+
+def keyInterval(key) :
+    # MHz span of a table key, None when the key is not a frequency.
+    # "1900" -> one value, "4801-4900" (or "4801 -- 4900") -> the range, "0-idle" -> 0 and "<= 400" -> 400
+    text = str(key).strip()
+    if text == "0-idle" :
+        return 0, 0
+    if text.startswith("<=") :
+        text = text[2:]
+    edges = text.replace(" -- ", "-").split("-")
+    try :
+        if len(edges) == 1 :
+            value = int(edges[0])
+            return value, value
+        if len(edges) == 2 and int(edges[0]) <= int(edges[1]) :
+            return int(edges[0]), int(edges[1])
+    except ValueError :
+        pass
+    return None
+
+
+def residencyRows(values) :
+    # (keys x cores) matrix of per-core residency lists, or a vector of single values, and which keys
+    # hold numbers. a value that is not a number ("-"), or a list holding one, leaves its key out
+    if len(values) > 0 and isinstance(values[0], list) :
+        # the whole table in one conversion, row by row only when a cell is not a number or rows differ
+        try :
+            residency = np.array(values, dtype=np.float64)
+            if residency.ndim == 2 :
+                return residency, np.ones(len(values), dtype=bool)
+        except (ValueError, TypeError) :
+            pass
+    rows = list()
+    for value in values :
+        try :
+            rows.append(np.array(value, dtype=np.float64) if isinstance(value, list) else float(value))
+        except (ValueError, TypeError) :
+            rows.append(None)
+    shape = next((np.shape(row) for row in rows if row is not None), ())
+    valid = np.array([row is not None and np.shape(row) == shape for row in rows], dtype=bool)
+    residency = np.zeros((len(rows),) + shape, dtype=np.float64)
+    for idx in np.flatnonzero(valid) :
+        residency[idx] = rows[idx]
+    return residency, valid
+
+
+class BucketSpec:
+    """The "buckets" list of a SocWatch target as sorted, non-overlapping MHz intervals.
+
+    Keys are placed with np.searchsorted on the interval edges. A key covering a range of frequencies
+    (the CPU P-state "4801-4900" rows) is split over the buckets it straddles, in proportion to the
+    MHz of the range falling in each. Residency outside every bucket is dropped.
+    """
+
+    def __init__(self, buckets):
+        buckets = list(buckets)
+        self.names = list(dict.fromkeys(buckets))
+        intervals = sorted(bucketInterval(name, name == buckets[-1]) + (slot,) for slot, name in enumerate(self.names))
+        for previous, current in zip(intervals, intervals[1:]) :
+            if current[0] <= previous[1] :
+                raise ValueError(f"buckets '{self.names[previous[2]]}' and '{self.names[current[2]]}' overlap")
+        # disjoint and sorted by start, so the ends are sorted too
+        self.lows = np.array([interval[0] for interval in intervals], dtype=np.float64)
+        self.highs = np.array([interval[1] for interval in intervals], dtype=np.float64)
+        self.slots = np.array([interval[2] for interval in intervals], dtype=np.intp)
+        # keys -> (weights, keys that are not a frequency), the same keys come back in every summary
+        self.key_weights = dict()
+
+    def weights(self, keys):
+        """(buckets x keys) matrix of the fraction of each key falling in each bucket, and the keys that are not frequencies."""
+        keys = tuple(keys)
+        if keys not in self.key_weights :
+            spans = [keyInterval(key) for key in keys]
+            is_frequency = np.array([span is not None for span in spans], dtype=bool)
+            lows = np.array([span[0] if span is not None else 0 for span in spans], dtype=np.float64)
+            highs = np.array([span[1] if span is not None else 0 for span in spans], dtype=np.float64)
+            # a key falls in the buckets from the first one ending at or after its start
+            # to the last one starting at or before its end
+            first = np.searchsorted(self.highs, lows, side="left")
+            last = np.searchsorted(self.lows, highs, side="right") - 1
+            position = np.arange(len(self.names))[:, None]
+            overlap = np.minimum(highs, self.highs[:, None]) - np.maximum(lows, self.lows[:, None]) + 1
+            placed = (position >= first) & (position <= last) & is_frequency
+            weights = np.zeros((len(self.names), len(keys)), dtype=np.float64)
+            weights[self.slots] = np.where(placed, overlap, 0) / (highs - lows + 1)
+            self.key_weights[keys] = (weights, [key for key, span in zip(keys, spans) if span is None])
+        return self.key_weights[keys]
+
+    def bucketizeRows(self, keys, residency, valid):
+        """[summed residency per bucket] of the (keys x cores) or keys residency rows, rounded to 3 decimals.
+
+        rows that are not valid are skipped, so are keys that are not a frequency, which are reported.
+        a bucket no key falls in is 0.
+        """
+        weights, unknown_keys = self.weights(keys)
+        for key in unknown_keys :
+            print("unexpected key format for bucketizing: ", key)
+        weights = weights * valid
+        # the weight matrix applied to the residency matrix. the products are accumulated along the key
+        # axis, one key after the other, so every bucket adds its keys in the same order as a key-by-key
+        # walk and the rounded totals do not depend on how a matrix product would sum them
+        shares = weights.T.reshape(weights.shape[::-1] + (1,) * (residency.ndim - 1)) * residency[:, None]
+        shares[weights.T == 0] = 0
+        totals = np.add.accumulate(shares, axis=0)[-1].tolist() if len(keys) > 0 else [0] * len(self.names)
+        bucketized = list()
+        for total, used in zip(totals, (weights > 0).any(axis=1)) :
+            if not used :
+                bucketized.append(0)
+            elif isinstance(total, list) :
+                bucketized.append([round(value, 3) for value in total])
+            else :
+                bucketized.append(round(total, 3))
+        return bucketized
+
+    def bucketize(self, items):
+        """bucket -> summed residency of the (key, value) items, rounded to 3 decimals. 0 for an empty bucket.
+
+        values are numbers (or numeric strings) or per-core lists of them. keys that are not a
+        frequency are reported and skipped, so are values that are not a number ("-").
+        """
+        keys = list()
+        values = list()
+        for key, value in items :
+            keys.append(key)
+            values.append(value)
+        residency, valid = residencyRows(values)
+        return dict(zip(self.names, self.bucketizeRows(keys, residency, valid)))
+
+
+@functools.lru_cache(maxsize=None)
+def compiledSpec(buckets) :
+    return BucketSpec(buckets)
+
+
+def compileBuckets(buckets) :
+    # one BucketSpec per distinct bucket list, shared by every table of every summary
+    return compiledSpec(tuple(buckets))
+
+
+def compileTargets(targets) :
+    # at config load, so a malformed bucket list fails before any file is parsed
+    for target in targets or [] :
+        if "buckets" in target :
+            compileBuckets(target["buckets"])
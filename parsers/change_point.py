@@ -0,0 +1,205 @@
+import numpy as np
+
+
+# config section of the detector used per device, see deviceEntry
+CONFIG_KEY = "inference_detection"
+# a device without an entry (and no "default" one): the P-core rail with the slope rule
+DEFAULT_DETECTION = {"rail":"PCORE_POWER_RAIL_NAME", "detector":"slope"}
+
+
+def nearTie(values, digits) :
+    # values whose rounding to digits is next to a tie, there float error in how they were computed can flip round()
+    scaled = values * 10 ** digits
+    return np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+
+
+def roundLikePython(values, digits) :
+    # np.round picks the same decimal as round() everywhere but next to a tie, round() itself decides those
+    rounded = np.round(values, digits)
+    for idx in np.flatnonzero(nearTie(values, digits)).tolist() :
+        rounded[idx] = round(float(values[idx]), digits)
+    return rounded
+
+
+def stepAverages(power, steps) :
+    """(starts, averages) of power in blocks of steps samples (the last one may be shorter), rounded to 4 decimals.
+
+    The block sums come from one np.add.reduceat. A block whose average is next to a rounding tie is
+    summed again with sum(), so the rounded averages are the ones the sample by sample loop gave.
+    """
+    starts = np.arange(0, len(power), steps)
+    lengths = np.diff(np.append(starts, len(power)))
+    # data correction. physical power measurement can give the impossible negative power in very miniscule scale
+    # adjust is needed to avoid Zero related issues: smaller than 0.001 became 0 divided by Zero later
+    totals = np.maximum(np.add.reduceat(power, starts), 0.001)
+    averages = totals / lengths
+    for idx in np.flatnonzero(nearTie(averages, 4)).tolist() :
+        total = sum(power[starts[idx]:starts[idx] + lengths[idx]].tolist())
+        averages[idx] = (0.001 if total < 0.001 else total) / lengths[idx]
+    return starts, roundLikePython(averages, 4)
+
+
+# Every detector takes the power of one rail reversed (the last sample of the trace first, so the idle after
+# inferencing comes before it) and returns the index where the power surges, None when it does not.
+# time_scale is the ms between two samples.
+
+class SlopeDetector:
+    """The power surge as the first step of steps samples whose average is slope_min times the average of
+    the step before it, and at least delta_min W above it (slope and delta rounded to 2 decimals)."""
+
+    name = "slope"
+
+    def __init__(self, slope_min=2.3, delta_min=3, steps=10):
+        self.slope_min = slope_min
+        self.delta_min = delta_min
+        self.steps = steps
+
+    def settings(self):
+        return [self.slope_min, self.delta_min]
+
+    def stepChanges(self, power):
+        starts, step_avr = stepAverages(power, self.steps)
+        slopes = roundLikePython(step_avr[1:] / step_avr[:-1], 2)
+        derivatives = roundLikePython(step_avr[1:] - step_avr[:-1], 2)
+        return starts, step_avr, slopes, derivatives
+
+    def detect(self, power, time_scale=1):
+        if len(power) == 0 :
+            return None
+        starts, step_avr, slopes, derivatives = self.stepChanges(power)
+        surges = (slopes > self.slope_min) & (derivatives > self.delta_min)
+        if surges.any() :
+            # slopes start at the second step
+            return int(starts[np.argmax(surges) + 1])
+        return None
+
+    def notFound(self, power):
+        # data_set of every step : [index start, idx end, step average, slope, derivative], the last one and all of them
+        if len(power) == 0 :
+            return [[], []]
+        starts, step_avr, slopes, derivatives = self.stepChanges(power)
+        ends = np.minimum(starts + self.steps, len(power))
+        data_sets = [[start, end, avr, 1, 0] for start, end, avr in zip(starts.tolist()[:1], ends.tolist()[:1], step_avr.tolist()[:1])]
+        data_sets += [list(data_set) for data_set in zip(starts.tolist()[1:], ends.tolist()[1:], step_avr.tolist()[1:], slopes.tolist(), derivatives.tolist())]
+        return [data_sets[-1], data_sets]
+
+
+class CusumDetector:
+    """One-sided CUSUM of the power above its level in the first baseline_ms (the idle after inferencing).
+
+    Each sample adds how far it is above that level, in standard deviations of the baseline less drift,
+    to a sum that never goes below 0. The surge is where the sum that first passes threshold started rising.
+    """
+
+    name = "cusum"
+
+    def __init__(self, threshold=20.0, drift=3.0, baseline_ms=1000, min_sigma=0.05):
+        self.threshold = threshold
+        self.drift = drift
+        self.baseline_ms = baseline_ms
+        self.min_sigma = min_sigma
+
+    def settings(self):
+        return [self.name, self.threshold, self.drift]
+
+    def detect(self, power, time_scale=1):
+        baseline = max(2, int(self.baseline_ms / time_scale))
+        if len(power) <= baseline :
+            return None
+        level = power[:baseline].mean()
+        sigma = max(power[:baseline].std(), self.min_sigma)
+        sums = np.cumsum((power - level) / sigma - self.drift)
+        # s[t] = max(0, s[t-1] + x[t]) is the running sum less the lowest it has been so far (0 included)
+        cusum = sums - np.minimum(np.minimum.accumulate(sums), 0)
+        over = np.flatnonzero(cusum > self.threshold)
+        if len(over) == 0 :
+            return None
+        resets = np.flatnonzero(cusum[:over[0]] <= 0)
+        return int(resets[-1]) + 1 if len(resets) > 0 else 0
+
+    def notFound(self, power):
+        return []
+
+
+class ZScoreDetector:
+    """The power surge as the first step of steps samples whose average is threshold standard deviations
+    (at least min_sigma W each) and min_delta W above the mean of the steps in the window_ms before it."""
+
+    name = "zscore"
+
+    def __init__(self, threshold=8.0, window_ms=500, steps=10, min_sigma=0.05, min_delta=0.0):
+        self.threshold = threshold
+        self.window_ms = window_ms
+        self.steps = steps
+        self.min_sigma = min_sigma
+        self.min_delta = min_delta
+
+    def settings(self):
+        return [self.name, self.threshold, self.window_ms]
+
+    def detect(self, power, time_scale=1):
+        starts = np.arange(0, len(power), self.steps)
+        averages = np.add.reduceat(power, starts) / np.diff(np.append(starts, len(power))) if len(power) > 0 else power
+        window = max(2, int(self.window_ms / (time_scale * self.steps)))
+        if len(averages) <= window :
+            return None
+        # rolling mean and deviation of the window steps in front of each step, from running sums
+        sums = np.concatenate(([0.0], np.cumsum(averages)))
+        squares = np.concatenate(([0.0], np.cumsum(averages * averages)))
+        mean = (sums[window:-1] - sums[:-window - 1]) / window
+        sigma = np.sqrt(np.maximum((squares[window:-1] - squares[:-window - 1]) / window - mean * mean, 0))
+        rise = averages[window:] - mean
+        surges = (rise / np.maximum(sigma, self.min_sigma) > self.threshold) & (rise > self.min_delta)
+        if surges.any() :
+            return int(starts[window + np.argmax(surges)])
+        return None
+
+    def notFound(self, power):
+        return []
+
+
+DETECTORS = {detector.name: detector for detector in [SlopeDetector, CusumDetector, ZScoreDetector]}
+
+
+def makeDetector(name, params=None) :
+    if name not in DETECTORS :
+        raise ValueError(f"unknown change point detector '{name}', known ones are {sorted(DETECTORS)}")
+    try :
+        return DETECTORS[name](**(params or {}))
+    except TypeError as e :
+        raise ValueError(f"bad parameters for the {name} detector: {e}")
+
+
+def deviceEntry(detection, device) :
+    # the entry of the first key found in the device name ("GPU" for "GPU.0"), else "default"
+    for key, entry in detection.items() :
+        if key != "default" and key.upper() in str(device).upper() :
+            return entry
+    return detection.get("default", DEFAULT_DETECTION)
+
+
+def entryDetectors(entry) :
+    # every detector with the parameters the entry gives it, for comparing them on the same traces
+    return {name: makeDetector(name, entry.get(name)) for name in DETECTORS}
+
+
+def entryRail(entry, picks) :
+    # a picks key ("GT_POWER_RAIL_NAME") or the rail name itself
+    rail = entry.get("rail", DEFAULT_DETECTION["rail"])
+    return picks.get(rail, rail)
+
+
+def detectionFor(detection, device, picks) :
+    """(rail name, detector) that finds the inferencing of device, from the "inference_detection" config section."""
+    entry = deviceEntry(detection, device)
+    name = entry.get("detector", DEFAULT_DETECTION["detector"])
+    return entryRail(entry, picks), makeDetector(name, entry.get(name))
+
+
+def configDetection(config) :
+    # the config section, checked when the config is loaded so a typo fails before any file is parsed
+    detection = config.get(CONFIG_KEY, {}) if config else {}
+    for entry in detection.values() :
+        entryDetectors(entry)
+        makeDetector(entry.get("detector", DEFAULT_DETECTION["detector"]))
+    return detection
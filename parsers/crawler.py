@@ -0,0 +1,114 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+# directory listing is network-bound on UNC shares (\\server\Pnpext), so threads are enough here
+DEFAULT_CRAWL_THREADS = 8
+
+
+def scanFolder(path, with_stat=False) :
+    # os.scandir keeps the file type from the directory listing (DirEntry cache),
+    # so there is no extra os.path.isfile round-trip per entry.
+    # entries keep the os.listdir order, which is what the serial walk used to see
+    # entry : (name, is_file, is_dir, size, mtime_ns), size and mtime_ns are None unless with_stat
+    listing = list()
+    with os.scandir(path) as it:
+        for entry in it:
+            size = None
+            mtime_ns = None
+            try :
+                is_file = entry.is_file()
+                is_dir = False if is_file else entry.is_dir()
+                if with_stat and is_file :
+                    # free on Windows, the listing already carries it
+                    stat = entry.stat()
+                    size = stat.st_size
+                    mtime_ns = stat.st_mtime_ns
+            except OSError:
+                is_file = False
+                is_dir = False
+            listing.append((entry.name, is_file, is_dir, size, mtime_ns))
+    return listing
+
+
+def listTree(base, skip_folder_list, max_workers=DEFAULT_CRAWL_THREADS, with_stat=False) :
+    # fan out folder listing over a bounded thread pool.
+    # returns {folder_path: [(name, is_file, is_dir, size, mtime_ns), ...]} for every visited folder
+    listings = dict()
+    if max_workers is None or max_workers < 1 :
+        max_workers = 1
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = {pool.submit(scanFolder, base, with_stat): base}
+        while pending :
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done :
+                path = pending.pop(future)
+                listing = future.result()
+                listings[path] = listing
+                for name, is_file, is_dir, size, mtime_ns in listing :
+                    if is_dir and name not in skip_folder_list :
+                        sub_path = os.path.join(path, name)
+                        pending[pool.submit(scanFolder, sub_path, with_stat)] = sub_path
+    return listings
+
+
+def orderedFiles(base, listings, skip_folder_list) :
+    # replay the listings depth-first, exactly like the old recursive os.listdir walk,
+    # so fileClassifier sees files in the same order as the serial run
+    files = list()
+    stack = [iter(listings.get(base, []))]
+    folders = [base]
+    while stack :
+        entry = next(stack[-1], None)
+        if entry is None :
+            stack.pop()
+            folders.pop()
+            continue
+        name, is_file, is_dir = entry[:3]
+        abs_path = os.path.join(folders[-1], name)
+        if is_file :
+            files.append((abs_path, name))
+        elif is_dir and name not in skip_folder_list and abs_path in listings :
+            stack.append(iter(listings[abs_path]))
+            folders.append(abs_path)
+    return files
+
+
+def crawlFiles(base, skip_folder_list, max_workers=DEFAULT_CRAWL_THREADS) :
+    # returns [(abs_path, file_name), ...] in serial-walk order
+    listings = listTree(base, skip_folder_list, max_workers)
+    return orderedFiles(base, listings, skip_folder_list)
+
+
+def listFolder(path, listings=None) :
+    # one folder's entries, from pre-built listings (crawl manifest) when given, otherwise from the file system
+    if listings is not None :
+        return listings.get(path, [])
+    return scanFolder(path)
+
+
+class SiblingIndex:
+    """Answers "does this file exist next to that one" from the crawl listings instead of the file system.
+
+    Folders that were not crawled fall back to os.path.exists.
+    """
+
+    def __init__(self, listings=None):
+        self.listings = listings if listings is not None else dict()
+        # folder -> set of normcase'd file names, built on first use
+        self.names = dict()
+
+    def fileNames(self, folder):
+        names = self.names.get(folder)
+        if names is None and folder in self.listings :
+            # normcase keeps the Windows case-insensitive match os.path.exists used to give
+            names = {os.path.normcase(entry[0]) for entry in self.listings[folder] if entry[1]}
+            self.names[folder] = names
+        return names
+
+    def exists(self, folder, name):
+        names = self.fileNames(folder)
+        if names is None :
+            return os.path.exists(os.path.join(folder, name))
+        return os.path.normcase(name) in names
@@ -0,0 +1,49 @@
+class DatasetRegistry:
+    """Owns the parsed data sets (hobl_sets) and finds the data set a file belongs to.
+
+    Data sets are indexed by their ID_path, so a lookup walks up the folders of the
+    file path (O(path depth)) instead of comparing against every data set.
+    """
+
+    def __init__(self, path_splitter="\\"):
+        self.path_splitter = path_splitter
+        # insertion ordered list, this is what reporters and power_checker get as hobl_sets
+        self.datasets = list()
+        # normalised ID_path -> position in self.datasets
+        self.index = dict()
+
+    def normalise(self, abs_path):
+        if len(abs_path) > 1 and abs_path.endswith(self.path_splitter):
+            return abs_path[:-len(self.path_splitter)]
+        return abs_path
+
+    def add(self, dataset):
+        self.datasets.append(dataset)
+        key = self.normalise(dataset["ID_path"])
+        # the first registered data set wins, same as the old linear scan over hobl_sets
+        if key not in self.index:
+            self.index[key] = len(self.datasets) - 1
+        return dataset
+
+    def find(self, abs_path):
+        """Return the data set whose ID_path is abs_path or one of its parent folders, None if not registered.
+
+        When nested ID paths are registered, the one registered first is returned.
+        """
+        found_idx = None
+        candidate = self.normalise(abs_path)
+        while candidate:
+            idx = self.index.get(candidate)
+            if idx is not None and (found_idx is None or idx < found_idx):
+                found_idx = idx
+            cut = candidate.rfind(self.path_splitter)
+            if cut <= 0:
+                break
+            candidate = candidate[:cut]
+        return None if found_idx is None else self.datasets[found_idx]
+
+    def __iter__(self):
+        return iter(self.datasets)
+
+    def __len__(self):
+        return len(self.datasets)
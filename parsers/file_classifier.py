@@ -0,0 +1,129 @@
+import re
+
+
+# classification tags. ParseAll maps each tag to its add_* handler, the crawl manifest stores them per file
+TAG_PASS_FAIL = "pass_fail"
+TAG_VPT = "vpt_output"
+TAG_ETL = "etl"
+TAG_POWER_SUMMARY = "power_summary"
+TAG_DAQ_TRACE = "daq_trace"
+TAG_FLEX_RESULTS = "flex_results"
+TAG_LPMODE_FULL = "lpmode_full"
+TAG_CATAPULT_V3 = "catapult_v3"
+TAG_LLAMA_OUTPUT = "llama_output"
+TAG_MS_AI_MODEL = "ms_ai_model_output"
+TAG_SOCWATCH_SESSION = "socwatch_session"
+TAG_SOCWATCH_CSV = "socwatch_csv"
+TAG_PCIE_SOCWATCH_CSV = "pcie_socwatch_csv"
+TAG_PROCYON_XML = "procyon_xml"
+TAG_PROCYON_ARIELLE = "procyon_arielle"
+TAG_UNCLASSIFIED = "unclassified"
+
+# config key for workload specific rules, e.g.
+# "file_classifier_rules": [{"tag": "power_summary", "contains": ["_pwr_report.csv"], "priority": 5}]
+CONFIG_RULES_KEY = "file_classifier_rules"
+
+# rule fields, every given field must hold (AND), a list inside a field is any-of (OR) unless noted
+#   equals     : file name is one of these
+#   contains   : file name contains one of these
+#   requires   : file name contains all of these
+#   excludes   : file name contains none of these
+#   endswith   : file name ends with one of these
+#   ignore_case: match case insensitive (default False)
+#   priority   : lower is checked first, ties keep the list order (default 100)
+RULE_FIELDS = ["equals", "contains", "requires", "excludes", "endswith"]
+DEFAULT_PRIORITY = 100
+
+# same order and conditions as the old if/elif chain of ParseAll.fileClassifier
+DEFAULT_RULES = [
+    {"tag":TAG_PASS_FAIL, "equals":[".PASS", ".FAIL"], "priority":10},
+    {"tag":TAG_VPT, "equals":["vpt_output.log"], "priority":20},
+    {"tag":TAG_ETL, "contains":[".etl"], "excludes":["Session.etl"], "priority":30},
+    {"tag":TAG_POWER_SUMMARY, "contains":["pacs-summary.csv", "Raw_Summary.csv", "_summary.csv"], "priority":40},
+    {"tag":TAG_DAQ_TRACE, "requires":["pacs-traces", "sr.csv"], "priority":50},
+    {"tag":TAG_FLEX_RESULTS, "contains":["-results.json"], "priority":60},
+    {"tag":TAG_LPMODE_FULL, "contains":["lpmode_full_run.json"], "ignore_case":True, "priority":70},
+    {"tag":TAG_CATAPULT_V3, "contains":["catav3", "catapult_v3"], "priority":80},
+    {"tag":TAG_LLAMA_OUTPUT, "contains":["_qdq_proxy_", "_output.txt", "PU_llama"], "requires":["llama"], "priority":90},
+    {"tag":TAG_MS_AI_MODEL, "contains":["_qdq_proxy_", "_output.txt", "PU_llama"], "priority":91},
+    {"tag":TAG_SOCWATCH_SESSION, "contains":["Session.etl"], "priority":100},
+    {"tag":TAG_SOCWATCH_CSV, "contains":["socwatch_regular"], "endswith":[".csv"], "ignore_case":True, "priority":110},
+    {"tag":TAG_PCIE_SOCWATCH_CSV, "contains":["socwatch_minimal"], "endswith":[".csv"], "ignore_case":True, "priority":120},
+    {"tag":TAG_PROCYON_XML, "contains":["1h_bl_"], "endswith":[".xml"], "ignore_case":True, "priority":130},
+    {"tag":TAG_PROCYON_ARIELLE, "endswith":[".procyon-result"], "ignore_case":True, "priority":140},
+]
+
+
+def asList(value) :
+    return [value] if isinstance(value, str) else list(value)
+
+
+def anyOf(keys) :
+    return "(?:" + "|".join(re.escape(key) for key in asList(keys)) + ")"
+
+
+def ruleRegex(rule) :
+    # one rule becomes a chain of look-aheads anchored at the start of the name, so it consumes nothing
+    # and every rule can sit side by side in one alternation
+    if "tag" not in rule :
+        raise ValueError(f"file classifier rule without a tag: {rule}")
+    if not any(field in rule for field in RULE_FIELDS) :
+        raise ValueError(f"file classifier rule has no condition ({', '.join(RULE_FIELDS)}): {rule}")
+    parts = list()
+    if "equals" in rule :
+        parts.append(f"(?={anyOf(rule['equals'])}\\Z)")
+    if "contains" in rule :
+        parts.append(f"(?=.*{anyOf(rule['contains'])})")
+    for key in asList(rule.get("requires", [])) :
+        parts.append(f"(?=.*{re.escape(key)})")
+    if "excludes" in rule :
+        parts.append(f"(?!.*{anyOf(rule['excludes'])})")
+    if "endswith" in rule :
+        parts.append(f"(?=.*{anyOf(rule['endswith'])}\\Z)")
+    pattern = "".join(parts)
+    if rule.get("ignore_case", False) :
+        pattern = f"(?i:{pattern})"
+    return pattern
+
+
+def sortRules(rules) :
+    # stable, so rules with the same priority keep the order they were listed in
+    return sorted(rules, key=lambda rule: rule.get("priority", DEFAULT_PRIORITY))
+
+
+def configRules(config_json) :
+    # rules from the config go in front of the built-in ones with the same priority
+    extra = config_json.get(CONFIG_RULES_KEY, []) if config_json else []
+    return sortRules(list(extra) + DEFAULT_RULES)
+
+
+class FileClassifier:
+    """Classifies a file name into a tag with one regex match over every rule.
+
+    The rules are compiled once into a single alternation of named groups in priority
+    order, so the first rule that holds is the one reported, like the old if/elif chain.
+    """
+
+    def __init__(self, rules=None, known_tags=None):
+        self.rules = sortRules(DEFAULT_RULES if rules is None else rules)
+        if known_tags is not None :
+            unknown = [rule["tag"] for rule in self.rules if rule.get("tag") not in known_tags]
+            if unknown :
+                raise ValueError(f"file classifier rules with unknown tags {unknown}, known tags are {sorted(known_tags)}")
+        self.tags = [rule["tag"] for rule in self.rules]
+        alternation = "|".join(f"(?P<r{idx}>{ruleRegex(rule)})" for idx, rule in enumerate(self.rules))
+        self.regex = re.compile(f"(?:{alternation})", re.DOTALL)
+
+    def classify(self, f):
+        """Return the tag of the first matching rule, TAG_UNCLASSIFIED if none does."""
+        matched = self.regex.match(f)
+        if matched is None or matched.lastgroup is None :
+            return TAG_UNCLASSIFIED
+        return self.tags[int(matched.lastgroup[1:])]
+
+
+default_classifier = FileClassifier()
+
+
+def classify(f) :
+    return default_classifier.classify(f)
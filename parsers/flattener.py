@@ -4,9 +4,11 @@ import os
 import json
 import numpy as np
 import parsers.tools as tools
+import parsers.parse_context as pctx
 
 
-header_collection = dict()
+# column registry of the default ParseContext, kept for the callers that do not pass a context
+header_collection = pctx.default_context.header_collection
 
 
 
@@ -38,19 +40,19 @@ def get_rest_cpu_pstate(rest_dic_list, key, rest_cpu_p_residency_list):
                 tdic[key] = tools.tryRoundifNumber(rest_cpu_p_residency_list[idx]) # round(float(rest_cpu_p_residency_list[idx]), 2)
 
 
-def flatten_ETL_dic(entry) :
+def flatten_ETL_dic(entry, context=None) :
     
     if "etl_path" in entry :
 
         new_output = dict()
         new_output["etl_path"] = entry["etl_path"]
-        ETL_header_updater(entry)
+        ETL_header_updater(entry, context)
         return new_output
     else :
         return {}   
     
 
-def flatten_AI_model_dic(entry) :
+def flatten_AI_model_dic(entry, context=None) :
     
     if "model_output_obj" in entry and "model_output_data" in entry["model_output_obj"] :
         copied = entry["model_output_obj"]['model_output_data'].copy()
@@ -60,7 +62,7 @@ def flatten_AI_model_dic(entry) :
             updated_key = getMSmodelKeyUnit(key, value_list)
             new_output[updated_key] = value_list[0]
         new_output['model_output_path'] = entry["model_output_obj"]["model_output_path"]
-        AI_model_header_updater(entry["model_output_obj"])
+        AI_model_header_updater(entry["model_output_obj"], context)
         return new_output
     else :
         return {}
@@ -94,19 +96,19 @@ def flatten_mlc_output_dic(entry) :
     else :
         return {}
     
-def flatten_teams_vpt_camera_dic(entry):
+def flatten_teams_vpt_camera_dic(entry, context=None):
     if "vpt_output_obj" in entry and "vpt_output_data" in entry["vpt_output_obj"] :
         copied = entry["vpt_output_obj"].copy()
         new_output = dict()
         new_output['min_cam_fps'] = copied["min_cam_fps"]
         new_output['median_cam_fps'] = copied["median_cam_fps"]
         new_output['vpt_output_path'] = copied["vpt_output_path"]
-        teams_vpt_header_updater(entry["vpt_output_obj"])
+        teams_vpt_header_updater(entry["vpt_output_obj"], context)
         return new_output
     else :
         return {}
 
-def flatten_procyon_score_dic(entry):
+def flatten_procyon_score_dic(entry, context=None):
     new_output = dict()
 
     if "procyon_score_obj" in entry and "procyon_score_data" in entry["procyon_score_obj"] :
@@ -116,11 +118,11 @@ def flatten_procyon_score_dic(entry):
             new_output[key] = copied[key]
 
         new_output['procyon_score_path'] = entry["procyon_score_obj"]["procyon_score_path"]
-        procyon_score_header_updater(entry["procyon_score_obj"])
+        procyon_score_header_updater(entry["procyon_score_obj"], context)
 
     return new_output
     
-def flatten_procyon_arielle_dic(entry):
+def flatten_procyon_arielle_dic(entry, context=None):
     new_output = dict()
 
     if "procyon_arielle_obj" in entry and "procyon_arielle_data" in entry["procyon_arielle_obj"] :
@@ -130,7 +132,7 @@ def flatten_procyon_arielle_dic(entry):
             new_output[key] = copied[key]
 
         new_output['procyon_arielle_path'] = entry["procyon_arielle_obj"]["procyon_arielle_path"]
-        procyon_arielle_header_updater(entry["procyon_arielle_obj"])
+        procyon_arielle_header_updater(entry["procyon_arielle_obj"], context)
 
     return new_output
             
@@ -148,7 +150,7 @@ def flatten_trace_dic(entry):
     else :
         return {}
     
-def flatten_pcie_socwatch_dic(entry, pcie_socwatch_targets):
+def flatten_pcie_socwatch_dic(entry, pcie_socwatch_targets, context=None):
     if "pcie_socwatch_obj" in entry and "pcie_socwatch_tables" in entry["pcie_socwatch_obj"] :
         flat_socwatch = {}
         for table in entry["pcie_socwatch_obj"]["pcie_socwatch_tables"]:
@@ -162,7 +164,7 @@ def flatten_pcie_socwatch_dic(entry, pcie_socwatch_targets):
                 flat_socwatch[getSocwatchHeader(item, table["label"])] = tools.tryRoundifNumber(data[item])
             # flat_socwatch[table]
         flat_socwatch['pcie_socwatch_path'] = entry['pcie_socwatch_obj']['pcie_socwatch_path']
-        pcie_socwatch_header_updater(entry["pcie_socwatch_obj"])
+        pcie_socwatch_header_updater(entry["pcie_socwatch_obj"], context)
         return flat_socwatch
     else :
         return {}
@@ -195,7 +197,7 @@ def flatten_socwatch_dic_per_core(entry, socwatch_targets):
     else :
         return []
 
-def flatten_socwatch_dic(entry, socwatch_targets):
+def flatten_socwatch_dic(entry, socwatch_targets, context=None):
     if "socwatch_obj" in entry and "socwatch_tables" in entry["socwatch_obj"] :
         flat_socwatch = {}
         for table in entry["socwatch_obj"]["socwatch_tables"]:
@@ -209,12 +211,12 @@ def flatten_socwatch_dic(entry, socwatch_targets):
                 flat_socwatch[getSocwatchHeader(item, table["label"])] = data[item]
             # flat_socwatch[table]
         flat_socwatch['socwatch_path'] = entry['socwatch_obj']['socwatch_path']
-        socwatch_header_updater(entry["socwatch_obj"])
+        socwatch_header_updater(entry["socwatch_obj"], context)
         return flat_socwatch
     else :
         return {}
     
-def flatten_power_dic(entry, picks):
+def flatten_power_dic(entry, picks, context=None):
     if "power_obj" in entry and "power_data" in entry["power_obj"] :
         copied = entry["power_obj"]['power_data'].copy()
         if "power_type" in entry["power_obj"]:
@@ -222,7 +224,7 @@ def flatten_power_dic(entry, picks):
         if "picked" in entry["power_obj"]:
             copied[getPickedType(picks)] = entry['power_obj']['picked'] 
         copied["power_path"] = entry['power_obj']['power_path']
-        power_header_updater(entry["power_obj"], picks)
+        power_header_updater(entry["power_obj"], picks, context)
         return copied
     else :
         return {}
@@ -236,17 +238,18 @@ def flatten_LPmode_sr_dic(entry):
     else :
         return {}
         
-def flatten_lpmode_full_dic(entry):
+def flatten_lpmode_full_dic(entry, context=None):
     if "lpmode_full_obj" in entry and "lpmode_full_data" in entry["lpmode_full_obj"] :
         copied = entry["lpmode_full_obj"]['lpmode_full_data'].copy()
         copied["lpmode_full_path"] = entry['lpmode_full_obj']['lpmode_full_path']
-        lpmode_full_header_updater(entry["lpmode_full_obj"])
+        lpmode_full_header_updater(entry["lpmode_full_obj"], context)
         return copied
     else :
         return {}
 
     
-def power_header_updater(parsed_obj, picks):
+def power_header_updater(parsed_obj, picks, context=None):
+    header_collection = pctx.resolve(context).header_collection
     if "power" not in header_collection :
         header_collection["power"] = dict()
     for item in parsed_obj :
@@ -267,14 +270,16 @@ def power_header_updater(parsed_obj, picks):
     if "power_path" not in header_collection["power"] and "power_path" in parsed_obj :
         header_collection["power"]["power_path"] = ""
 
-def ETL_header_updater(parsed_obj):
+def ETL_header_updater(parsed_obj, context=None):
+    header_collection = pctx.resolve(context).header_collection
     if "ETL" not in header_collection :
         header_collection["ETL"] = dict()
 
     if "etl_path" not in header_collection["ETL"] and "etl_path" in parsed_obj :
         header_collection["ETL"]["etl_path"] = ""   
 
-def socwatch_header_updater(parsed_obj):
+def socwatch_header_updater(parsed_obj, context=None):
+    header_collection = pctx.resolve(context).header_collection
     if "socwatch" not in header_collection :
         header_collection["socwatch"] = dict()
     for table in parsed_obj["socwatch_tables"] :
@@ -292,7 +297,8 @@ def socwatch_header_updater(parsed_obj):
     if "socwatch_path" in parsed_obj and "socwatch_path" not in header_collection["socwatch"] :
         header_collection["socwatch"]["socwatch_path"] = ""
 
-def pcie_socwatch_header_updater(parsed_obj):
+def pcie_socwatch_header_updater(parsed_obj, context=None):
+    header_collection = pctx.resolve(context).header_collection
     if "PCIe_socwatch" not in header_collection :
         header_collection["PCIe_socwatch"] = dict()
     for table in parsed_obj["pcie_socwatch_tables"] :
@@ -308,7 +314,8 @@ def pcie_socwatch_header_updater(parsed_obj):
     if "pcie_socwatch_path" in parsed_obj and "pcie_socwatch_path" not in header_collection["PCIe_socwatch"] :
         header_collection["PCIe_socwatch"]["pcie_socwatch_path"] = ""
 
-def procyon_score_header_updater(parsed_obj):
+def procyon_score_header_updater(parsed_obj, context=None):
+    header_collection = pctx.resolve(context).header_collection
     if "procyon_score" not in header_collection :
         header_collection["procyon_score"] = dict()
     for key in parsed_obj["procyon_score_data"].keys() :
@@ -317,7 +324,8 @@ def procyon_score_header_updater(parsed_obj):
     if "procyon_score_path" in parsed_obj and "procyon_score_path" not in header_collection["procyon_score"] :
         header_collection["procyon_score"]["procyon_score_path"] = ""
 
-def procyon_arielle_header_updater(parsed_obj):
+def procyon_arielle_header_updater(parsed_obj, context=None):
+    header_collection = pctx.resolve(context).header_collection
     if "procyon_arielle" not in header_collection :
         header_collection["procyon_arielle"] = dict()
     for key in parsed_obj["procyon_arielle_data"].keys() :
@@ -326,7 +334,8 @@ def procyon_arielle_header_updater(parsed_obj):
     if "procyon_arielle_path" in parsed_obj and "procyon_arielle_path" not in header_collection["procyon_arielle"] :
         header_collection["procyon_arielle"]["procyon_arielle_path"] = ""
 
-def teams_vpt_header_updater(parsed_obj):
+def teams_vpt_header_updater(parsed_obj, context=None):
+    header_collection = pctx.resolve(context).header_collection
     if "teams_vpt" not in header_collection :
         header_collection["teams_vpt"] = dict()
     if "vpt_output_data" in parsed_obj and "min_cam_fps" in parsed_obj and "min_cam_fps" not in header_collection["teams_vpt"] :
@@ -336,7 +345,8 @@ def teams_vpt_header_updater(parsed_obj):
     if "vpt_output_path" in parsed_obj and "vpt_output_path" not in header_collection["teams_vpt"] :
         header_collection["teams_vpt"]["vpt_output_path"] = ""
 
-def AI_model_header_updater(parsed_obj):
+def AI_model_header_updater(parsed_obj, context=None):
+    header_collection = pctx.resolve(context).header_collection
     if "AI_model" not in header_collection :
         header_collection["AI_model"] = dict()
     if "model_output_data" in parsed_obj :
@@ -351,7 +361,8 @@ def AI_model_header_updater(parsed_obj):
     if "model_output_path" in parsed_obj and "model_output_path" not in header_collection["AI_model"] :
         header_collection["AI_model"]["model_output_path"] = ""
     
-def lpmode_full_header_updater(parsed_obj):
+def lpmode_full_header_updater(parsed_obj, context=None):
+    header_collection = pctx.resolve(context).header_collection
     if "lpmode_full" not in header_collection :
         header_collection["lpmode_full"] = dict()
     if "lpmode_full_data" in parsed_obj :
@@ -431,8 +442,9 @@ def get_lpmode_full_header_list(lpmode_header_dict) :
         lpmode_full_header.append(lpmode_item)
     return lpmode_full_header
 
-def getHeaderCollection():
+def getHeaderCollection(context=None):
     # this dictates the column order in the final excel, so the order of appending matters
+    header_collection = pctx.resolve(context).header_collection
     flatten_header = ["Data label", "Condition"]
     flatten_header.extend(get_power_header_list(header_collection["power"])) if "power" in header_collection else None
     flatten_header.append("Data Detected")
@@ -0,0 +1,52 @@
+import os
+import pickle
+import parsers.parse_cache as pcache
+
+
+# bump when the saved layout changes, older state files are ignored (full run) after that
+STATE_VERSION = 1
+
+
+def statePath(result_path) :
+    return result_path + "_incremental.pkl"
+
+
+def datasetFingerprint(file_paths) :
+    # every file classified into the data set, with size and mtime. a missing file simply drops out
+    fingerprint = list()
+    for abs_path in sorted(set(file_paths)) :
+        try :
+            size, mtime_ns = pcache.fileFingerprint(abs_path)
+        except OSError:
+            continue
+        fingerprint.append((abs_path, size, mtime_ns))
+    return tuple(fingerprint)
+
+
+def loadState(state_path, config_hash) :
+    # returns {ID_path: {"fingerprint":..., "dataset":...}} of the last reported run, empty if unusable
+    if not os.path.exists(state_path) :
+        return dict()
+    try :
+        with open(state_path, "rb") as state_file:
+            state = pickle.load(state_file)
+    except Exception as e:
+        print(f"[incremental] ignoring unreadable state {state_path}: {e}")
+        return dict()
+    if state.get("version") != STATE_VERSION or state.get("config_hash") != config_hash :
+        print("[incremental] config changed since the last run, parsing everything again")
+        return dict()
+    return state["datasets"]
+
+
+def saveState(state_path, config_hash, hobl_sets, fingerprints) :
+    datasets = dict()
+    for dataset in hobl_sets :
+        id_path = dataset["ID_path"]
+        if id_path in fingerprints and id_path not in datasets :
+            datasets[id_path] = {"fingerprint":fingerprints[id_path], "dataset":dataset}
+    state = {"version":STATE_VERSION, "config_hash":config_hash, "datasets":datasets}
+    tmp_path = state_path + ".tmp"
+    with open(tmp_path, "wb") as state_file:
+        pickle.dump(state, state_file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, state_path)
@@ -0,0 +1,77 @@
+import os
+import json
+import time
+import parsers.crawler as crw
+import parsers.file_classifier as fcl
+
+
+# bump when the manifest layout changes, older manifests are refused (crawl again)
+MANIFEST_VERSION = 1
+
+
+def relativeFolder(base, folder) :
+    # manifest keys are "/" separated and relative to the crawl base, "" is the base itself
+    rel = os.path.relpath(folder, base)
+    return "" if rel == "." else rel.replace(os.sep, "/")
+
+
+def buildManifest(base, skip_folder_list=(), max_workers=crw.DEFAULT_CRAWL_THREADS) :
+    # the whole tree is kept (every folder, file type, size, mtime and tag), the parsers apply their own skip rules on replay
+    listings = crw.listTree(base, skip_folder_list, max_workers, with_stat=True)
+    folders = dict()
+    for folder, listing in listings.items() :
+        entries = list()
+        for name, is_file, is_dir, size, mtime_ns in listing :
+            if is_file :
+                entries.append([name, "f", size, mtime_ns, fcl.classify(name)])
+            elif is_dir :
+                entries.append([name, "d"])
+            else :
+                entries.append([name, "o"])
+        folders[relativeFolder(base, folder)] = entries
+    return {"version":MANIFEST_VERSION, "base":base, "created":time.strftime("%Y-%m-%d %H:%M:%S"),
+            "skip_folder_list":list(skip_folder_list), "folders":folders}
+
+
+def writeManifest(manifest, manifest_path) :
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as manifest_file:
+        # compact on purpose, a campaign tree is tens of thousands of entries
+        json.dump(manifest, manifest_file, separators=(",", ":"))
+    os.replace(tmp_path, manifest_path)
+
+
+def readManifest(manifest_path) :
+    with open(manifest_path, "r", encoding="utf-8") as manifest_file:
+        manifest = json.load(manifest_file)
+    if manifest.get("version") != MANIFEST_VERSION :
+        raise ValueError(f"manifest version {manifest.get('version')} is not supported, crawl again: {manifest_path}")
+    return manifest
+
+
+def manifestListings(manifest, base=None) :
+    # rebuild {folder_path: [(name, is_file, is_dir, size, mtime_ns), ...]} (same shape as crawler.listTree)
+    # rooted at base, so the walk of each parser joins the very same paths it would join on the live tree
+    if base is None :
+        base = manifest["base"]
+    listings = dict()
+    for rel_folder, entries in manifest["folders"].items() :
+        folder = base if rel_folder == "" else os.path.join(base, *rel_folder.split("/"))
+        listing = list()
+        for entry in entries :
+            kind = entry[1]
+            if kind == "f" :
+                listing.append((entry[0], True, False, entry[2], entry[3]))
+            else :
+                listing.append((entry[0], False, kind == "d", None, None))
+        listings[folder] = listing
+    return listings
+
+
+def loadListings(manifest_path, base=None) :
+    # returns (base, listings). base defaults to the crawled folder of the manifest
+    manifest = readManifest(manifest_path)
+    if base is None :
+        base = manifest["base"]
+    print(f"[manifest] {manifest_path} : {len(manifest['folders'])} folders crawled {manifest['created']} from {manifest['base']}")
+    return base, manifestListings(manifest, base)
@@ -0,0 +1,86 @@
+import os
+import json
+import pickle
+import sqlite3
+import hashlib
+
+
+CACHE_FILE_NAME = "parse_cache.sqlite"
+# bump this when a parser changes the shape of what it returns, old entries are ignored after that
+CACHE_VERSION = 4
+
+
+def fileFingerprint(abs_path) :
+    stat = os.stat(abs_path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def configHash(parser_config) :
+    # only the config section the parser uses (socwatch_targets, DAQ_target, ...) goes into the key
+    text = json.dumps(parser_config, sort_keys=True, default=str)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class ParseCache:
+    """On-disk (SQLite) cache of parsed objects keyed by file fingerprint, parser and config section.
+
+    Unchanged files are served from here instead of being re-parsed from the network share.
+    """
+
+    def __init__(self, cache_dir):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.cache_path = os.path.join(cache_dir, CACHE_FILE_NAME)
+        self.connection = sqlite3.connect(self.cache_path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS parsed ("
+            " abs_path TEXT NOT NULL,"
+            " parser TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " mtime_ns INTEGER NOT NULL,"
+            " config_hash TEXT NOT NULL,"
+            " version INTEGER NOT NULL,"
+            " parsed_obj BLOB NOT NULL,"
+            " PRIMARY KEY (abs_path, parser))"
+        )
+        self.connection.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, parser_name, abs_path, parser_config):
+        """Return (True, parsed_obj) on a hit, (False, None) on a miss."""
+        try :
+            size, mtime_ns = fileFingerprint(abs_path)
+        except OSError:
+            self.misses += 1
+            return False, None
+
+        row = self.connection.execute(
+            "SELECT parsed_obj FROM parsed WHERE abs_path = ? AND parser = ? AND size = ? AND mtime_ns = ? AND config_hash = ? AND version = ?",
+            (os.path.abspath(abs_path), parser_name, size, mtime_ns, configHash(parser_config), CACHE_VERSION),
+        ).fetchone()
+        if row is None :
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        return True, pickle.loads(row[0])
+
+    def put(self, parser_name, abs_path, parser_config, parsed_obj):
+        try :
+            size, mtime_ns = fileFingerprint(abs_path)
+        except OSError:
+            return
+        self.connection.execute(
+            "INSERT OR REPLACE INTO parsed VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (os.path.abspath(abs_path), parser_name, size, mtime_ns, configHash(parser_config), CACHE_VERSION,
+             pickle.dumps(parsed_obj, protocol=pickle.HIGHEST_PROTOCOL)),
+        )
+
+    def commit(self):
+        self.connection.commit()
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+    def printStats(self):
+        print(f"[parse cache] hits: {self.hits}, misses: {self.misses} ({self.cache_path})")
@@ -0,0 +1,34 @@
+import parsers.dataset_registry as dsr
+
+
+class ParseContext:
+    """State of one parse run: the data sets and the registries the parsers and reporters fill.
+
+    Pass one ParseContext per input tree through the parsers and reporters, so several trees
+    can be parsed in one process (or in threads) without sharing headers or data sets.
+    """
+
+    def __init__(self, path_splitter="\\"):
+        # label -> keys seen in the SocWatch / PCIe SocWatch tables
+        self.socwatch_header_dict = dict()
+        self.pcie_socwatch_header_dict = dict()
+        # flattener column registry, dictates the Excel column order
+        self.header_collection = dict()
+        self.dataset_registry = dsr.DatasetRegistry(path_splitter)
+        self.loaded_file_num = 0
+
+    @property
+    def hobl_sets(self):
+        return self.dataset_registry.datasets
+
+    def countLoadedFiles(self, num):
+        self.loaded_file_num += num
+
+
+# used by the callers that do not pass a context (the older top-level scripts).
+# the module level names (socwatch_header_dict, header_collection, ...) point into this one
+default_context = ParseContext()
+
+
+def resolve(context) :
+    return default_context if context is None else context
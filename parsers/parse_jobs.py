@@ -0,0 +1,105 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import parsers.vpt_output_parser as vop
+import parsers.model_output_parser as mop
+import parsers.bm_llama_output_parser as lop
+import parsers.pcie_socwatch_summary_parser as psoc
+import parsers.socwatch_summary_parser as soc
+import parsers.lpmode_full_parser as lpf
+import parsers.power_summary_parser as psp
+import parsers.power_trace_parser as ptp
+import parsers.procyon_parser as pxp
+
+
+# parser names used in the job list. (dataset ID, parser name, path) is what the classification phase collects
+VPT_OUTPUT = "vpt_output"
+LLAMA_OUTPUT = "llama_output"
+MS_AI_MODEL_OUTPUT = "ms_ai_model_output"
+POWER_SUMMARY = "power_summary"
+POWER_RUNTIME = "power_runtime"
+POWER_TRACE = "power_trace"
+SOCWATCH_SUMMARY = "socwatch_summary"
+PCIE_SOCWATCH_SUMMARY = "pcie_socwatch_summary"
+PROCYON_XML = "procyon_xml"
+PROCYON_ARIELLE = "procyon_arielle"
+LPMODE_FULL = "lpmode_full"
+CATAPULT_V3 = "catapult_v3"
+
+
+def runParseJob(parser_name, abs_path, parser_config, context=None) :
+    # this runs in a worker process, so only the parser name, the path and the config section travel,
+    # the dataset itself stays in the main process and is updated in the merge step.
+    # context is the ParseContext of the run when parsing in process, a worker uses its own default one
+    if parser_name == VPT_OUTPUT :
+        return vop.parseVptResults(abs_path)
+    elif parser_name == LLAMA_OUTPUT :
+        return lop.parseModelResults(abs_path, parser_config)
+    elif parser_name == MS_AI_MODEL_OUTPUT :
+        return mop.parseModelResults(abs_path, parser_config)
+    elif parser_name == POWER_SUMMARY :
+        return psp.parsePowerSummaryCSV(abs_path, parser_config)
+    elif parser_name == POWER_RUNTIME :
+        return psp.parseHopperRuntime(abs_path, parser_config)
+    elif parser_name == POWER_TRACE :
+        return ptp.parsePowerTraceCSV(abs_path)
+    elif parser_name == SOCWATCH_SUMMARY :
+        return soc.parseSocwatch(abs_path, parser_config, context)
+    elif parser_name == PCIE_SOCWATCH_SUMMARY :
+        return psoc.parsePCIe(abs_path, parser_config, context)
+    elif parser_name == PROCYON_XML :
+        # procyon parsers fill the dataset in place, so hand them an empty one and ship back the fragment
+        fragment = dict()
+        pxp.parseProcyonResultScore(fragment, abs_path)
+        return fragment
+    elif parser_name == PROCYON_ARIELLE :
+        fragment = dict()
+        pxp.parseProcyonResultArielle(fragment, abs_path)
+        return fragment
+    elif parser_name == LPMODE_FULL :
+        return lpf.parseLPmodeFull(abs_path)
+    elif parser_name == CATAPULT_V3 :
+        return psp.parseCatapultV3CSV(abs_path)
+    else :
+        raise ValueError(f"unknown parser for the parse job: {parser_name}")
+
+
+def runJobTuple(job) :
+    return runParseJob(*job)
+
+
+def runParseJobs(jobs, max_jobs=1, parse_cache=None, context=None) :
+    # jobs : [(parser_name, abs_path, parser_config), ...]
+    # returns the parsed objects in the same order as jobs, so the merge can replay the crawl order
+    parsed_list = [None] * len(jobs)
+    missing = list()
+    for idx, job in enumerate(jobs) :
+        if parse_cache is not None :
+            hit, parsed = parse_cache.get(*job)
+            if hit :
+                parsed_list[idx] = parsed
+                continue
+        missing.append(idx)
+
+    fresh = runJobsOnPool([jobs[idx] for idx in missing], max_jobs, context)
+
+    for idx, parsed in zip(missing, fresh) :
+        parsed_list[idx] = parsed
+        if parse_cache is not None :
+            parse_cache.put(*jobs[idx], parsed)
+    if parse_cache is not None :
+        parse_cache.commit()
+    return parsed_list
+
+
+def runJobsOnPool(jobs, max_jobs, context=None) :
+    if max_jobs is None or max_jobs < 1 :
+        max_jobs = os.cpu_count() or 1
+
+    if max_jobs == 1 or len(jobs) < 2 :
+        return [runParseJob(*job, context) for job in jobs]
+
+    workers = min(max_jobs, len(jobs))
+    # a few jobs per round trip keeps the pickling overhead low for the many small files
+    chunk = max(1, len(jobs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(runJobTuple, jobs, chunksize=chunk))
@@ -1,9 +1,11 @@
 import os
-import csv
 import parsers.tools as tools
+import parsers.parse_context as pctx
+import parsers.socwatch_index as swi
 
 
-pcie_socwatch_header_dict = dict()
+# kept for the callers that do not pass a ParseContext
+pcie_socwatch_header_dict = pctx.default_context.pcie_socwatch_header_dict
 
 
 def NVMResidencyTable(table, target) :
@@ -39,8 +41,9 @@ def PCIeTableTypeChecker(table, target) :
     else :
         defaultResidencyTable(table, 0, 1)
 
-def extractHeader(table) :
+def extractHeader(table, context=None) :
 
+    pcie_socwatch_header_dict = pctx.resolve(context).pcie_socwatch_header_dict
     if table["label"] not in pcie_socwatch_header_dict:
         pcie_socwatch_header_dict[table["label"]] = [key for key in table['table_data']]
     else :
@@ -53,7 +56,7 @@ def extractHeader(table) :
         pcie_socwatch_header_dict[table["label"]] = set_keys
 
 
-def parsePCIe(tdic, pcie_targets) :
+def parsePCIe(tdic, pcie_targets, context=None, index=None) :
 
 
     abs_path = None
@@ -73,37 +76,28 @@ def parsePCIe(tdic, pcie_targets) :
     socwatch_obj['pcie_socwatch_path'] = abs_path
     socwatch_obj['pcie_socwatch_tables'] = []
 
-
-    with open(abs_path, encoding='utf-8-sig', newline='') as csvfile:
-
-        csvreader = csv.reader(csvfile)
-
-        for target in pcie_targets : 
-            tTable = dict()
-            for tlist in csvreader :
-                if 'isCompleted' in tTable and tTable['isCompleted'] == False :
-                    # if the table_data is initiated, 'isCompleted' exists, keep collecting line until empty line comes
-                    if all(item == "" for item in tlist) :
-                        tTable['isCompleted'] = True
-                        PCIeTableTypeChecker(tTable, target)
-                        # Socwatch data is being parsed, header is also being collected and expended for unified header later
-                        extractHeader(tTable)
-                        socwatch_obj['pcie_socwatch_tables'].append(tTable)
-                        break
-                    else :
-                        trimmed_list = tools.trim_list(tlist)
-                        if len(trimmed_list) > 0 :
-                            tset = set("".join(trimmed_list))
-                            if all(char in {" ", "-"} for char in tset) == False :
-                                tTable['table_data'].append(trimmed_list)
-
-                elif len(tlist) > 0 and tlist[0].rfind(target['lookup']) >=0 :
-                    tTable['label'] = target['key']
-                    tTable['table_data'] = list()
-                    tTable['isCompleted'] = False  
-
-
-        return socwatch_obj
-
-        
-
+    # the file is read once (or the index of the main SocWatch summary is shared),
+    # so every target is found whatever order the config and the SocWatch version put them in
+    if index is None :
+        index = swi.readSummaryIndex(abs_path)
+    hits = index.matchLookups([target['lookup'] for target in pcie_targets])
+    index.prefetch([line_num for line_nums in hits.values() for line_num in line_nums])
+
+    # a lookup matching several tables takes the first one after the previous target's table
+    start = 0
+    for target in pcie_targets : 
+        title_line = index.findTable(target['lookup'], start)
+        if title_line is None :
+            continue
+        table_data, end = index.tableRows(title_line)
+        if end is None :
+            # the file ends before the table does
+            continue
+        tTable = {'label':target['key'], 'table_data':table_data, 'isCompleted':True}
+        PCIeTableTypeChecker(tTable, target)
+        # Socwatch data is being parsed, header is also being collected and expended for unified header later
+        extractHeader(tTable, context)
+        socwatch_obj['pcie_socwatch_tables'].append(tTable)
+        start = end
+
+    return socwatch_obj
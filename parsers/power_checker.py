@@ -90,15 +90,19 @@ def pullSameLabel(whole_sets, full_data_label, picks) :
 
 
 
-def checkAndMarkPower(whole_sets, picks) :
+def checkAndMarkPower(whole_sets, picks, only_labels=None) :
+    # only_labels : set of " ".join(data_label) to re-check (incremental run), None checks every label
 
     done_model = set()
 
     for obj in whole_sets:
         full_data_label = " ".join(obj["data_label"])
-        if full_data_label not in done_model:
+        if full_data_label not in done_model and (only_labels is None or full_data_label in only_labels):
             done_model.add(full_data_label)
             objs = pullSameLabel(whole_sets, full_data_label, picks)
+            # a data set reused from an earlier run may still carry its old pick
+            for block in objs :
+                block['power_obj'].pop('picked', None)
             # if picks['only_picks'] is True:
             sortAndPick(objs, picks)
             
@@ -2,27 +2,16 @@ import csv
 import parsers.tools as tools
 
 
-fields = []
-rows = []
+def readRailRows(csv_path, target_column) :
+    """(target column index, {rail name: row}) of a power summary, the rail name being the first cell.
 
-# for LNL
-target_column = ""
-
-
-def parsePowerSummaryCSV(csv_path, DAQ_target) :
-    
-    target_column = DAQ_target["TARGET_COLUMN"] if "TARGET_COLUMN" in DAQ_target else "Average"
-    power_data = dict()
-    power_obj = {"power_data":power_data}
-    # reading csv file
+    A rail listed twice keeps its last row. The dict is built in one pass over this file only,
+    so every DAQ target is resolved by lookup.
+    """
     with open(csv_path, encoding='utf-8-sig', newline='') as csvfile:
-        
-        # creating a csv reader object
         csvreader = csv.reader(csvfile)
-        
         # extracting field names through first row
         fields = next(csvreader)
-        
 
         avr_index = -1
         try:
@@ -30,23 +19,24 @@ def parsePowerSummaryCSV(csv_path, DAQ_target) :
         except:
             tools.errorAndExit(f"{target_column} is NOT in the CSV header")
 
-        # print("=======", csvreader)
-        for row in csvreader:
-            rows.append(row)
+        rail_rows = {row[0]: row for row in csvreader if row}
+    return avr_index, rail_rows
 
-        P_SOC_power_W = 0
-        for target_rail in DAQ_target:
-            #print(type(rail), rail)
-            
-            for power_rail_index in range(len(rows)-1, -1, -1):
-                t_rail = rows[power_rail_index]
 
-                if t_rail[0]== target_rail:
-                    power_data[target_rail] = float(t_rail[avr_index])
-                    if target_rail == DAQ_target["SOC_POWER_RAIL_NAME"] :
-                        P_SOC_power_W = power_data[target_rail]
-                    break
-                    
+def parsePowerSummaryCSV(csv_path, DAQ_target) :
+    # a summary does not share anything with the ones parsed before it
+    target_column = DAQ_target["TARGET_COLUMN"] if "TARGET_COLUMN" in DAQ_target else "Average"
+    power_data = dict()
+    power_obj = {"power_data":power_data}
+    avr_index, rail_rows = readRailRows(csv_path, target_column)
+
+    P_SOC_power_W = 0
+    for target_rail in DAQ_target:
+        if target_rail in rail_rows :
+            power_data[target_rail] = float(rail_rows[target_rail][avr_index])
+            if target_rail == DAQ_target["SOC_POWER_RAIL_NAME"] :
+                P_SOC_power_W = power_data[target_rail]
+
     # this need to be updated for ARL
     if P_SOC_power_W > 0 and "Run Time" in power_data:
         power_data['Energy (J)'] = P_SOC_power_W * power_data["Run Time"]
@@ -55,6 +45,11 @@ def parsePowerSummaryCSV(csv_path, DAQ_target) :
     return power_obj
 
 
+def parsePowerSummaries(csv_paths, DAQ_target) :
+    # power_obj of every summary, in the order of csv_paths
+    return [parsePowerSummaryCSV(csv_path, DAQ_target) for csv_path in csv_paths]
+
+
 def parseHopperRuntime(result_path, DAQ_target) :
     
     result_json = tools.jsonLoader(result_path, None)
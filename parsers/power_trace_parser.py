@@ -1,11 +1,16 @@
+import io
+import os
 import csv
 import numbers
+import operator
+import itertools
+import warnings
+import numpy as np
 import parsers.tools as tools
+import parsers.change_point as cpt
+import parsers.trace_cache as tcache
 
 
-fields = []
-rows = []
-
 AVERAGE = "Average"
 P_SOC = "P_SOC"
 P_CORE = "P_VCCCORE"
@@ -18,6 +23,9 @@ P_NPU = "P_VCCSA"
 # power data collection ends after 2.2 seconds in most of the time, + 2.8 seconds more buffer, total 5000 ms.
 TIME_BUFFER = 5000
 
+# the trace is read backwards from the end in blocks of this size until the rows of the window are in
+TAIL_BLOCK_SIZE = 64 * 1024
+
 
 def getSamplingRate(file_path) :
     # file_name = file_path.split("\\")[-1]
@@ -35,85 +43,238 @@ def getTargetedRailIndexObject(header, DAQ_target) :
                 break
     return copied
 
-def getReversedPower(csv_list, total_row_num, infer_duration, time_scale, power_rail_name) :
+
+def cellFloat(row, column) :
+    # the fallback of TailRows.floatColumns, a missing or non-numeric cell is nan
+    try :
+        return float(row[column])
+    except (ValueError, IndexError) :
+        return float("nan")
+
+
+class TailRows:
+    """The last rows of a trace, indexed like the list of all its rows (0 is the row after the header).
+
+    Only the lines of the window are held in memory, split into cells the first time a row is asked
+    for. floatColumns() reads numeric columns straight from the lines instead. With every row of the
+    file in it, it behaves exactly like that list, negative indexes included.
+    """
+
+    def __init__(self, text, total_row_num):
+        self.text = text
+        self.total_row_num = total_row_num
+        self.first_row = total_row_num - tcache.lineCount(text)
+        self.parsed = None
+
+    @property
+    def rows(self):
+        if self.parsed is None :
+            self.parsed = list(csv.reader(io.StringIO(self.text, newline="")))
+        return self.parsed
+
+    def __len__(self):
+        return self.total_row_num
+
+    def localSlice(self, idx):
+        # a slice of the whole trace as positions in the tail
+        if self.first_row == 0 :
+            return idx
+        start, stop, step = idx.indices(self.total_row_num)
+        if start < self.first_row and start < stop :
+            raise IndexError(f"row {start} is before the tail read (from row {self.first_row})")
+        return slice(start - self.first_row, max(stop - self.first_row, 0), step)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice) :
+            return self.rows[self.localSlice(idx)]
+        if self.first_row == 0 :
+            return self.rows[idx]
+        if idx < 0 :
+            idx += self.total_row_num
+        if idx < self.first_row or idx >= self.total_row_num :
+            raise IndexError(f"row {idx} is not in the tail read (rows {self.first_row} to {self.total_row_num - 1})")
+        return self.rows[idx - self.first_row]
+
+    def floatColumns(self, columns):
+        """(rows x columns) float array of the tail, columns given by cell index (negative from the row end).
+
+        numpy converts the numbers straight from the text, without splitting rows into cells first.
+        A tail it cannot read that way (empty line, quoted or missing cell) is converted cell by cell
+        with float(), a cell that is not a number is then nan.
+        """
+        row_num = self.total_row_num - self.first_row
+        try :
+            with warnings.catch_warnings() :
+                # numpy warns about an empty tail
+                warnings.simplefilter("ignore", UserWarning)
+                power = np.loadtxt(io.StringIO(self.text), dtype=np.float64, delimiter=",", comments=None, usecols=columns, ndmin=2)
+            # numpy skips empty lines, the rows would not line up anymore
+            if power.shape == (row_num, len(columns)) :
+                return power
+        except ValueError :
+            pass
+        return np.array([[cellFloat(row, column) for column in columns] for row in self.rows], dtype=np.float64).reshape(row_num, len(columns))
+
+
+class CachedTail(TailRows):
+    """The last row_count rows of a trace converted to a .ptcol (parsers/trace_cache.py), indexed like TailRows.
+
+    floatColumns() slices the memory-mapped columns. Rows, and columns the cache does not hold as
+    numbers, are read from the CSV tail the first time they are asked for.
+    """
+
+    def __init__(self, file_path, cache, row_count):
+        self.file_path = file_path
+        self.cache = cache
+        self.row_count = row_count
+        self.total_row_num = len(cache)
+        self.first_row = max(self.total_row_num - row_count, 0)
+        self.parsed = None
+        self.csv_tail = None
+
+    @property
+    def text(self):
+        if self.csv_tail is None :
+            text = readTraceTail(self.file_path, self.row_count)[1].text
+            # a tail read up to the first row holds every row, keep the ones indexed from first_row
+            extra = tcache.lineCount(text) - (self.total_row_num - self.first_row)
+            self.csv_tail = text.split("\n", extra)[-1] if extra > 0 else text
+        return self.csv_tail
+
+    def floatColumns(self, columns):
+        if not all(self.cache.numeric(column) for column in columns) :
+            return super().floatColumns(columns)
+        power = np.empty((self.total_row_num - self.first_row, len(columns)), dtype=np.float64)
+        for idx, column in enumerate(columns) :
+            power[:, idx] = self.cache.column(column)[self.first_row:]
+        return power
+
+
+def countLines(trace_file, start, end) :
+    # line breaks between two offsets, counted block by block without decoding
+    trace_file.seek(start)
+    count = 0
+    while start < end :
+        block = trace_file.read(min(TAIL_BLOCK_SIZE * 16, end - start))
+        if not block :
+            break
+        count += block.count(b"\n")
+        start += len(block)
+    return count
+
+
+def readTraceTail(file_path, row_count) :
+    """(header, rows) of a pacs trace with only its last row_count rows decoded.
+
+    The file is read in blocks from the end until row_count rows are in, the rows before them are
+    only counted. rows is a TailRows, len(rows) is the number of rows of the whole trace. Lines are
+    expected to end in "\n" ("\r\n" included).
+    """
+    with open(file_path, "rb") as trace_file :
+        header_line = trace_file.readline()
+        header = next(csv.reader([header_line.decode("utf-8-sig")]))
+        data_start = trace_file.tell()
+        size = os.fstat(trace_file.fileno()).st_size
+
+        # blocks from the end until they hold row_count full lines (plus the unterminated last one)
+        blocks = list()
+        line_breaks = 0
+        pos = size
+        while pos > data_start and line_breaks <= row_count :
+            read_size = min(TAIL_BLOCK_SIZE, pos - data_start)
+            pos -= read_size
+            trace_file.seek(pos)
+            block = trace_file.read(read_size)
+            blocks.append(block)
+            line_breaks += block.count(b"\n")
+        tail = b"".join(reversed(blocks))
+
+        rows_before = 0
+        if pos > data_start :
+            # the first line of the tail is cut, it belongs to the rows that are only counted
+            cut = tail.index(b"\n") + 1
+            tail = tail[cut:]
+            rows_before = countLines(trace_file, data_start, pos + cut)
+
+    text = tail.decode("utf-8")
+    line_num = tcache.lineCount(text)
+    if rows_before > 0 and line_num > row_count :
+        # drop the lines in front of the last row_count
+        text = text.split("\n", line_num - row_count)[-1]
+    return header, TailRows(text, rows_before + line_num)
+
+
+def readTraceWindow(file_path, row_count) :
+    # readTraceTail, from the converted columns of the trace when it has them
+    cache = tcache.openTraceCache(file_path)
+    if cache is None :
+        return readTraceTail(file_path, row_count)
+    return cache.header, CachedTail(file_path, cache, row_count)
+
+
+def getReversedPower(power, first_row, total_row_num, infer_duration, time_scale) :
     # capture power data in reverse since the inferencing happens at the end of the power collection
-    target_power_reversed = list()
+    # power is the rail from row first_row to the end of the trace
     stop_row_num = total_row_num - (int((infer_duration+TIME_BUFFER) / time_scale))
-    for idx in range(total_row_num-1, stop_row_num, -1):
-        line = csv_list[idx]
-        target_power_reversed.append(line[power_rail_name])
-    # print(target_power_reversed, len(target_power_reversed))    
-    return target_power_reversed
+    row_idxs = np.arange(total_row_num-1, stop_row_num, -1)
+    if first_row > 0 and len(row_idxs) > 0 and row_idxs[-1] < first_row :
+        raise IndexError(f"row {row_idxs[-1]} is before the tail read (from row {first_row})")
+    return power[row_idxs - first_row]
+
+def detectInferencingStartReversed(target_power_reversed, rail, detector, time_scale, file_path) :
+    # index of the power surge in the reversed power of rail, found by a parsers/change_point.py detector.
+    # the last sample is not part of any step
+    power = np.asarray(target_power_reversed[:len(target_power_reversed)-1], dtype=np.float64)
+    infer_start_reversed = detector.detect(power, time_scale)
+    if infer_start_reversed is None :
+        print("======= not found: ", file_path, [rail] + detector.settings(), *detector.notFound(power))
+    return infer_start_reversed
+
 
 def getInferencingStartReversed(target_power_reversed, target_rail, file_path) :
+    # target_rail : [Power_rail_name, slope minimum, power delta minimum] of the slope rule
+    detector = cpt.SlopeDetector(target_rail[1], target_rail[2])
+    return detectInferencingStartReversed(target_power_reversed, target_rail[0], detector, 1, file_path)
 
-    # now have to find the power surge by checking power changes (slope and derivative)
-    step_avr = list()
-    steps = 10
-    length = len(target_power_reversed)-1
-    isInferencingFound = False
 
-    for idx in range(0, length, steps) :
-        upto = idx + steps
-        if upto > length :
-            upto = length
-            
-        # data_set will be 5 item list : [index start, idx end, step average, slope, derivative]
-        data_set = [idx, upto]
-
-        total = sum([float(item) for item in target_power_reversed[idx:upto]])
-
-        # ==========================================================================================================
-        # data correction. physical power measurement can give the impossible negative power in very miniscule scale
-        # adjust is needed to avoid Zero related issues
-        # ==========================================================================================================
-        total = 0.001 if total < 0.001 else total    # if you set smaller than 0.001 it became 0 divided by Zero later
-        data_set.append(round(total/len(target_power_reversed[idx:upto]), 4))
-        step_avr_idx = len(step_avr)-1
-        if step_avr_idx == -1:
-            data_set.append(1)
-            data_set.append(0)
-            step_avr.append(data_set)
-        else :
-            # print(step_avr[step_avr_idx],  step_avr[step_avr_idx-1], step_avr[step_avr_idx] - step_avr[step_avr_idx-1])
-            # slope = step_avr[key][step_avr_idx] / step_avr[step_avr_idx-1] if step_avr[step_avr_idx-1] else 0
-            # derivative = step_avr[step_avr_idx] - step_avr[step_avr_idx-1]
-            pre_data_set = step_avr[-1]
-            # print ("===================== : ", pre_data_set)
-            slope = round(data_set[2] / pre_data_set[2], 2)
-            derivative = round((data_set[2] - pre_data_set[2]), 2)
-            data_set.append(slope)
-            data_set.append(derivative)
-            step_avr.append(data_set)
-            if slope > target_rail[1] and derivative > target_rail[2]:
-                isInferencingFound = True
-                # print("== found inferencing start", file_path, target_rail, data_set, step_avr)
-                return data_set[0]
-
-    if isInferencingFound == False :
-        print("======= not found: ", file_path, target_rail, data_set, step_avr)   
-        return None                 
-    
+def railColumn(header, target_obj, rail) :
+    # column of a detected rail, the DAQ target ones are already looked up
+    if rail in target_obj :
+        return target_obj[rail]
+    if rail in header :
+        return len(header) - 1 - header[::-1].index(rail)
+    raise KeyError(rail)
+
+
+def averagedRails(target_obj) :
+    # the rails getAveragePowerByRails averages, in target order
+    return [rail for rail in target_obj if rail != "Run Time" and isinstance(target_obj[rail], numbers.Number)]
+
 
 def getAveragePowerByRails(csv_list, time_scale, target_obj, total_token_gen, P_SOC) :
+    # csv_list is the rows of the window, or already a (rows x averagedRails) float array of them
     trace_data = dict()
+    rails = averagedRails(target_obj)
+    averages = dict()
+    if len(rails) > 0 :
+        # every rail of the window in one (rows x rails) array, summed down the rows one row after the other
+        power = csv_list
+        if not isinstance(power, np.ndarray) :
+            pick = operator.itemgetter(*[target_obj[rail] for rail in rails])
+            cells = map(pick, csv_list) if len(rails) == 1 else itertools.chain.from_iterable(map(pick, csv_list))
+            power = np.fromiter(map(float, cells), dtype=np.float64, count=len(csv_list) * len(rails)).reshape(len(csv_list), len(rails))
+        averages = [total / len(csv_list) for total in np.add.reduce(power, axis=0).tolist()]
+        # an average next to a rounding tie is summed again with sum(), as it was rail by rail
+        for idx in np.flatnonzero(cpt.nearTie(np.array(averages), 3)).tolist() :
+            averages[idx] = sum(power[:, idx].tolist()) / len(csv_list)
+        averages = dict(zip(rails, averages))
+
     for rail in target_obj:
-        # print("==== rail name: ", len(csv_list), rail, target_obj[rail])
-        rail_idx = target_obj[rail]
         if rail == "Run Time" : 
             trace_data["Run Time"] = round((len(csv_list) * time_scale / 1000), 1) # in seconds 1st floating digit 
-        elif isinstance(rail_idx, numbers.Number) :
-            rail_list = [float(line[rail_idx]) for line in csv_list]
-            # if rail == "P_SOC+MEMORY" :
-            #     print(rail, rail_list)
-            trace_data[rail] = round(sum(rail_list) / len(csv_list), 3)
-            # print("==== ", rail, trace_obj[rail])
-            # if rail == "P_SOC+MEMORY" :
-        else :
-            #print("skipping rail: ", rail, rail_idx)
-            pass
+        elif rail in averages :
+            trace_data[rail] = round(averages[rail], 3)
 
-    # print(trace_obj)
     trace_data["Energy (J)"] = round(trace_data["Run Time"] * trace_data[P_SOC], 3)
     trace_data["Eng(J)/Token"] = round(trace_data["Energy (J)"] / total_token_gen, 3)
     return trace_data
@@ -122,9 +283,7 @@ def getAveragePowerByRails(csv_list, time_scale, target_obj, total_token_gen, P_
 def averageInferencingPower(filtered_data, DAQ_target, picks) :
     # reading csv file
     P_SOC = picks.get('SOC_POWER_RAIL_NAME')
-    P_CORE = picks.get('PCORE_POWER_RAIL_NAME')
-    P_GPU = picks.get('GT_POWER_RAIL_NAME')
-    P_NPU = picks.get('SA_POWER_RAIL_NAME')
+    detection = picks.get(cpt.CONFIG_KEY, {})
     
     for block in filtered_data:
 
@@ -136,53 +295,51 @@ def averageInferencingPower(filtered_data, DAQ_target, picks) :
             time_scale = 1000 / trace_sampling_rate
 
 
-            with open(block["trace_obj"]["file_path"], encoding='utf-8-sig', newline='') as tracefile:
-                
-                csvreader = csv.reader(tracefile)
-                header = next(csvreader)
-                target_obj = getTargetedRailIndexObject(header, DAQ_target)
-
-                if block["model_output_obj"]["model_output_data"]["duration"][1].lower() in ['s', 'sec', 'secs', 'second', 'seconds'] :
-                    infer_duration = block["model_output_obj"]["model_output_data"]["duration"][0] * 1000  # in ms
-                    block["model_output_obj"]["model_output_data"]["duration"][1] = "ms"
-                else :
-                    infer_duration = block["model_output_obj"]["model_output_data"]["duration"][0] # already in ms
-                
-                
-                device = block["model_output_obj"]["model_output_data"]["device"][0]
-                csv_list = list(csvreader)
-                total_row_num = len(csv_list)
-                # CPU uses P-core for inferencing, so default. 
-                # [Power_rail_name, slope minimum, power delta minimum]
-                target_rail = [P_CORE, 2.3, 3]
-                # if "GPU" in device:
-                #     target_rail = [P_GPU, 2.24, 3]  # after checking 50 files 
-                # elif "NPU" in device:
-                #     target_rail = [P_NPU, 1.7, 1] # slope is the main detector for power surge
-                
-                infer_start_idx = -1
-                infer_end_idx = -1
-
-                target_power_reversed = getReversedPower(csv_list, total_row_num, infer_duration, time_scale, target_obj[target_rail[0]])
-                infer_start_reversed = getInferencingStartReversed(target_power_reversed, target_rail, block["trace_obj"]["file_path"])
-                if infer_start_reversed is None :
-                    block["trace_obj"]["total_row"] = None
-                    block["trace_obj"]["duration_in_scale"] = None
-                    block["trace_obj"]["inf_start"] = None
-                    block["trace_obj"]["inf_end"] = None
-                    block["trace_obj"]["trace_data"] = None
-                else :
-                    infer_duration_in_scale = round((infer_duration / time_scale))
-                    infer_start_idx = total_row_num - infer_duration_in_scale - infer_start_reversed
-                    infer_end_idx = infer_start_idx + infer_duration_in_scale
-                    # print(f"=== total_row_num: {total_row_num}, infer_duration_in_scale: {infer_duration_in_scale}, infer_start_idx: {infer_start_idx}, infer_end_idx: {infer_end_idx}, path: {block["trace_obj"]["file_path"]}")
-                    block["trace_obj"]["total_row"] = total_row_num
-                    block["trace_obj"]["duration_in_scale"] = infer_duration_in_scale
-                    block["trace_obj"]["inf_start"] = infer_start_idx
-                    block["trace_obj"]["inf_end"] = infer_end_idx
-                    block["trace_obj"]["Device"] = device
-                    block["trace_obj"]["trace_data"] = getAveragePowerByRails(csv_list[infer_start_idx:infer_end_idx], time_scale, target_obj, block["model_output_obj"]["model_output_data"]["total_token_gen"][0], P_SOC)
-                    print("========", block["trace_obj"]["trace_data"])
+            if block["model_output_obj"]["model_output_data"]["duration"][1].lower() in ['s', 'sec', 'secs', 'second', 'seconds'] :
+                infer_duration = block["model_output_obj"]["model_output_data"]["duration"][0] * 1000  # in ms
+                block["model_output_obj"]["model_output_data"]["duration"][1] = "ms"
+            else :
+                infer_duration = block["model_output_obj"]["model_output_data"]["duration"][0] # already in ms
+
+            # only the end of the trace is decoded: the rows searched backwards for the power surge
+            # (inferencing duration + TIME_BUFFER) and, before them, up to one inferencing duration more
+            window_row_num = int((infer_duration + TIME_BUFFER) / time_scale) + round(infer_duration / time_scale) + 1
+            header, csv_list = readTraceWindow(block["trace_obj"]["file_path"], window_row_num)
+            target_obj = getTargetedRailIndexObject(header, DAQ_target)
+
+            device = block["model_output_obj"]["model_output_data"]["device"][0]
+            total_row_num = len(csv_list)
+            # rail and change point detector of the device from the "inference_detection" config section.
+            # CPU uses P-core for inferencing, so default: P-core with the slope rule (slope 2.3, delta 3 minimum).
+            # GPU was seen at P_VCCGT slope 2.24 / delta 3 after checking 50 files, NPU at P_VCCSA slope 1.7 / delta 1
+            target_rail, detector = cpt.detectionFor(detection, device, picks)
+            
+            infer_start_idx = -1
+            infer_end_idx = -1
+
+            # the detected rail and the averaged ones, converted to floats once for the whole window
+            rails = averagedRails(target_obj)
+            power = csv_list.floatColumns([railColumn(header, target_obj, target_rail)] + [target_obj[rail] for rail in rails])
+            target_power_reversed = getReversedPower(power[:, 0], csv_list.first_row, total_row_num, infer_duration, time_scale)
+            infer_start_reversed = detectInferencingStartReversed(target_power_reversed, target_rail, detector, time_scale, block["trace_obj"]["file_path"])
+            if infer_start_reversed is None :
+                block["trace_obj"]["total_row"] = None
+                block["trace_obj"]["duration_in_scale"] = None
+                block["trace_obj"]["inf_start"] = None
+                block["trace_obj"]["inf_end"] = None
+                block["trace_obj"]["trace_data"] = None
+            else :
+                infer_duration_in_scale = round((infer_duration / time_scale))
+                infer_start_idx = total_row_num - infer_duration_in_scale - infer_start_reversed
+                infer_end_idx = infer_start_idx + infer_duration_in_scale
+                # print(f"=== total_row_num: {total_row_num}, infer_duration_in_scale: {infer_duration_in_scale}, infer_start_idx: {infer_start_idx}, infer_end_idx: {infer_end_idx}, path: {block["trace_obj"]["file_path"]}")
+                block["trace_obj"]["total_row"] = total_row_num
+                block["trace_obj"]["duration_in_scale"] = infer_duration_in_scale
+                block["trace_obj"]["inf_start"] = infer_start_idx
+                block["trace_obj"]["inf_end"] = infer_end_idx
+                block["trace_obj"]["Device"] = device
+                block["trace_obj"]["trace_data"] = getAveragePowerByRails(power[csv_list.localSlice(slice(infer_start_idx, infer_end_idx)), 1:], time_scale, target_obj, block["model_output_obj"]["model_output_data"]["total_token_gen"][0], P_SOC)
+                print("========", block["trace_obj"]["trace_data"])
         else :
             # print("[Missing essential data]", )
             pass
@@ -37,34 +37,34 @@ def autoHideColumn(excel_path):
     workbook.save(excel_path)
     # print(auto_hide_row)
 
-def flatten_data_with_autohide(entry, picks, socwatch_targets, PCIe_targets):
+def flatten_data_with_autohide(entry, picks, socwatch_targets, PCIe_targets, context=None):
     flatten_list = list()
     flattened = {'Data_label': entry['data_label'], 'Condition': entry['condition']}
-    flattened.update(flattener.flatten_power_dic(entry, picks))
+    flattened.update(flattener.flatten_power_dic(entry, picks, context))
     flattened_socwatch_list = flattener.flatten_socwatch_dic_per_core(entry, socwatch_targets)
     
     addKeyAutoHide(entry['data_summary_type'], flattened_socwatch_list)
 
     flattened.update(flattened_socwatch_list[0]) if flattened_socwatch_list else None
-    flattened.update(flattener.flatten_pcie_socwatch_dic(entry, PCIe_targets))
+    flattened.update(flattener.flatten_pcie_socwatch_dic(entry, PCIe_targets, context))
     flatten_list.append(flattened)
     flatten_list.extend(flattened_socwatch_list[1:]) if len(flattened_socwatch_list) > 1 else None
     return flatten_list
 
-def flatten_data(entry, socwatch_targets, PCIe_targets, picks):
+def flatten_data(entry, socwatch_targets, PCIe_targets, picks, context=None):
     flattened = {'Data label': entry['data_label'][0], 'Condition': entry['data_label'][1]}
-    flattened.update(flattener.flatten_power_dic(entry, picks))
+    flattened.update(flattener.flatten_power_dic(entry, picks, context))
     flattened.update({"Data Detected": entry["data_type"]}) if "data_type" in entry else None
-    flattened.update(flattener.flatten_ETL_dic(entry))
-    flattened.update(flattener.flatten_AI_model_dic(entry))
+    flattened.update(flattener.flatten_ETL_dic(entry, context))
+    flattened.update(flattener.flatten_AI_model_dic(entry, context))
     flattened.update(flattener.flatten_fps_dic(entry))
-    flattened.update(flattener.flatten_lpmode_full_dic(entry))
+    flattened.update(flattener.flatten_lpmode_full_dic(entry, context))
     flattened.update(flattener.flatten_LPmode_sr_dic(entry))
-    flattened.update(flattener.flatten_procyon_score_dic(entry))
-    flattened.update(flattener.flatten_teams_vpt_camera_dic(entry))
-    flattened.update(flattener.flatten_socwatch_dic(entry, socwatch_targets))
-    flattened.update(flattener.flatten_pcie_socwatch_dic(entry, PCIe_targets))
-    flattened.update(flattener.flatten_procyon_arielle_dic(entry))
+    flattened.update(flattener.flatten_procyon_score_dic(entry, context))
+    flattened.update(flattener.flatten_teams_vpt_camera_dic(entry, context))
+    flattened.update(flattener.flatten_socwatch_dic(entry, socwatch_targets, context))
+    flattened.update(flattener.flatten_pcie_socwatch_dic(entry, PCIe_targets, context))
+    flattened.update(flattener.flatten_procyon_arielle_dic(entry, context))
     return flattened
 
 def create_V_H_Excel(df, result_path):
@@ -75,24 +75,24 @@ def create_V_H_Excel(df, result_path):
     df_v.to_excel(result_path+"_allPower_v.xlsx", index=False)
     print(f"Excel files created at {result_path}_allPower_h.xlsx and {result_path}_allPower_v.xlsx")
 
-def reportAllPowerAndType(result_path, hobl_data, socwatch_targets, PCIe_targets, picks) :
+def reportAllPowerAndType(result_path, hobl_data, socwatch_targets, PCIe_targets, picks, context=None) :
     #new_df_columns = flattener.getHeaderCollection(hobl_data, picks)
     flatten_data_list = list()
     for entry in hobl_data :
         if len(entry['data_type']) > 0 :
-            flatten_data_list.append(flatten_data(entry, socwatch_targets, PCIe_targets, picks))
+            flatten_data_list.append(flatten_data(entry, socwatch_targets, PCIe_targets, picks, context))
     
     # flatten_data_list = [flatten_data(entry, socwatch_targets, PCIe_targets, picks) if len(entry['data_type']) > 0 else None for entry in hobl_data]
-    df = pd.DataFrame(flatten_data_list, columns=flattener.getHeaderCollection())
+    df = pd.DataFrame(flatten_data_list, columns=flattener.getHeaderCollection(context))
     create_V_H_Excel(df, result_path)
 
 
 
 
-def reportCollectionWithAutohide(result_path, hobl_data, picks, socwatch_targets, PCIe_targets) :
+def reportCollectionWithAutohide(result_path, hobl_data, picks, socwatch_targets, PCIe_targets, context=None) :
     data_list = list()
     for entry in hobl_data :
-        data_list.extend(flatten_data_with_autohide(entry, picks, socwatch_targets, PCIe_targets))
+        data_list.extend(flatten_data_with_autohide(entry, picks, socwatch_targets, PCIe_targets, context))
     df = pd.DataFrame(data_list)
 
 
@@ -5,11 +5,11 @@ import parsers.socwatch_summary_parser as soc
 
 
 
-def flatten_picked_data(entry, socwatch_targets, picks, pulled_soc_entry):
+def flatten_picked_data(entry, socwatch_targets, picks, pulled_soc_entry, context=None):
     flattened = {'Condition': entry['data_label'][0], 'data_label': entry['data_label'][1]}
-    flattened.update(flattener.flatten_power_dic(entry, picks))
+    flattened.update(flattener.flatten_power_dic(entry, picks, context))
     flattened.update(flattener.flatten_MS_model_dic(entry))
-    flattened.update(flattener.flatten_socwatch_dic(pulled_soc_entry, socwatch_targets))
+    flattened.update(flattener.flatten_socwatch_dic(pulled_soc_entry, socwatch_targets, context))
     return flattened
 
 
@@ -20,14 +20,14 @@ def pulled_soc_entry(data_label_list, hobl_data):
     return {}
 
 
-def reportPickedData2(result_path, hobl_data, socwatch_targets, picks) :
+def reportPickedData2(result_path, hobl_data, socwatch_targets, picks, context=None) :
 
     picked_list = []
     for entry in hobl_data:
         if entry["power_obj"]["power_type"] == "POWER" and entry["power_obj"]["picked"] == "picked":
             
             # need to insert after similar data. not just at the end
-            picked_flatten_dict = flatten_picked_data(entry, socwatch_targets, picks, pulled_soc_entry(entry["data_label"], hobl_data))
+            picked_flatten_dict = flatten_picked_data(entry, socwatch_targets, picks, pulled_soc_entry(entry["data_label"], hobl_data), context)
             similar_model_index = None
             for index in range(len(picked_list)-1, -1, -1):
                 if picked_list[index]['data_label'].find(picked_flatten_dict['data_label']) >= 0:
@@ -0,0 +1,265 @@
+import io
+import os
+import re
+import csv
+import json
+import bisect
+import parsers.tools as tools
+
+
+class LookupMatcher:
+    """Every target lookup compiled into one regex, so a line is checked against all targets at once.
+
+    Most lines match none of the lookups and are rejected by a single search. The few that
+    match are checked for each lookup, so lookups contained in one another are all reported.
+    """
+
+    def __init__(self, lookups):
+        self.lookups = list(dict.fromkeys(lookups))
+        self.regex = None
+        if self.lookups :
+            self.regex = re.compile("|".join(re.escape(lookup) for lookup in self.lookups))
+
+    def match(self, line):
+        """Lookups contained in line, in the order they were given."""
+        if self.regex is None or self.regex.search(line) is None :
+            return []
+        return [lookup for lookup in self.lookups if lookup in line]
+
+
+# <summary name>.swidx next to a summary keeps its title lines and table byte spans, keyed by size and mtime,
+# so later runs seek straight to the tables instead of scanning the file again
+SIDECAR_SUFFIX = ".swidx"
+SIDECAR_VERSION = 1
+# smaller summaries are scanned every time, the sidecar pays off for the expanded (per-core) ones
+SIDECAR_MIN_SIZE = 1024 * 1024
+
+
+def lineCells(line) :
+    # cells of one raw CSV line, the csv module is only needed when a cell is quoted
+    text = line.decode("utf-8")
+    if '"' in text :
+        return next(csv.reader([text]), [])
+    return text.split(",")
+
+
+# a title line (first cell only) or an empty line (empty group), for summaries without quoted cells.
+# it starts at the line break and the first cell cannot hold a comma, so a data line fails at its
+# first comma without backtracking through the cell
+TITLE_OR_BLANK_LINE = re.compile(rb"\n([^,\"\r\n]*),*\r?(?=\n|\Z)")
+
+
+def closeEntries(open_entries, offset, end_line) :
+    for entry in open_entries :
+        entry[2] = offset - entry[1]
+        entry[3] = end_line
+    open_entries.clear()
+
+
+def scanLines(data, offset) :
+    # line by line, handles quoted cells
+    titles = dict()
+    open_entries = list()
+    line_num = 0
+    for line in data[offset:].splitlines(keepends=True) :
+        body = line.rstrip(b"\r\n")
+        if b'"' in body :
+            cells = lineCells(body)
+            blank = "".join(cells) == ""
+            title = None if blank or cells[0] == "" or any(cell != "" for cell in cells[1:]) else cells[0]
+        else :
+            stripped = body.rstrip(b",")
+            blank = stripped == b""
+            title = None if blank or b"," in stripped else stripped.decode("utf-8")
+
+        if blank :
+            closeEntries(open_entries, offset, line_num + 1)
+        elif title is not None :
+            entry = [line_num, offset + len(line), 0, None]
+            titles.setdefault(title, []).append(entry)
+            open_entries.append(entry)
+        offset += len(line)
+        line_num += 1
+
+    closeEntries(open_entries, offset, None)
+    return titles, line_num
+
+
+def scanRegex(data, offset) :
+    # the same result as scanLines, the regex only stops at title and empty lines
+    titles = dict()
+    open_entries = list()
+    # a leading line break lets the first line match like the others, match positions are then line starts in text
+    text = b"\n" + data[offset:]
+    text_length = len(text) - 1
+    line_num = 0
+    counted = 0
+    for matched in TITLE_OR_BLANK_LINE.finditer(text) :
+        start = matched.start()
+        if start == text_length :
+            # the empty match after the last line break is not a line
+            break
+        line_num += text.count(b"\n", counted + 1, start + 1)
+        counted = start
+        if matched.group(1) == b"" :
+            closeEntries(open_entries, offset + start, line_num + 1)
+        else :
+            entry = [line_num, offset + min(matched.end(), text_length), 0, None]
+            titles.setdefault(matched.group(1).decode("utf-8"), []).append(entry)
+            open_entries.append(entry)
+
+    closeEntries(open_entries, len(data), None)
+    line_count = text.count(b"\n") - 1
+    if text_length > 0 and not text.endswith(b"\n") :
+        line_count += 1
+    return titles, line_count
+
+
+def scanSummary(data) :
+    """One pass over the bytes of a summary: title lines (first cell only) and the span of their tables.
+
+    Returns (titles, line_count). titles maps a title to [line_num, body_offset, body_length, end_line]
+    entries in file order. The body is the lines after the title up to the closing empty line,
+    end_line the line after it (None when the file ends before the table does).
+    """
+    offset = 3 if data.startswith(b"\xef\xbb\xbf") else 0
+    if b'"' in data or data.count(b"\r") != data.count(b"\r\n") :
+        # quoted cells or bare \r line breaks
+        return scanLines(data, offset)
+    return scanRegex(data, offset)
+
+
+class SummaryIndex:
+    """Table title lines of a SocWatch summary CSV with the byte span of each table.
+
+    A title line holds only its first cell, its table spans the lines after it up to the next
+    empty line. Any target table is found by lookup whatever order the targets are configured
+    in, and only the bytes of the tables asked for are tokenised.
+    """
+
+    def __init__(self, abs_path, titles, line_count, data=None):
+        self.abs_path = abs_path
+        # title -> [line_num, body_offset, body_length, end_line] entries, in file order
+        self.titles = titles
+        self.line_count = line_count
+        self.entries = {entry[0]: entry for entries in titles.values() for entry in entries}
+        # the file content right after a scan. loaded from a sidecar, the tables are read with a seek
+        self.data = data
+        self.bodies = dict()
+        self.lookup_lines = dict()
+
+    def matchLookups(self, lookups):
+        """lookup -> line numbers of the title lines containing it.
+
+        The distinct titles go through one LookupMatcher for all lookups not resolved yet,
+        instead of one scan per lookup. The line numbers double as per-target hit positions.
+        """
+        pending = [lookup for lookup in dict.fromkeys(lookups) if lookup not in self.lookup_lines]
+        if pending :
+            matcher = LookupMatcher(pending)
+            found = {lookup: [] for lookup in pending}
+            for title, entries in self.titles.items() :
+                for lookup in matcher.match(title) :
+                    found[lookup].extend(entry[0] for entry in entries)
+            for lookup, line_nums in found.items() :
+                line_nums.sort()
+                self.lookup_lines[lookup] = line_nums
+        return {lookup: self.lookup_lines[lookup] for lookup in lookups}
+
+    def findLines(self, lookup):
+        return self.matchLookups([lookup])[lookup]
+
+    def findTable(self, lookup, start=0):
+        """Title line of the first table matching lookup at or after start, the first one in the file
+        if there is none after start. None if the file has no such table."""
+        line_nums = self.findLines(lookup)
+        if not line_nums :
+            return None
+        idx = bisect.bisect_left(line_nums, start)
+        return line_nums[idx] if idx < len(line_nums) else line_nums[0]
+
+    def prefetch(self, title_lines):
+        # read the tables about to be parsed with one open, in file order
+        entries = sorted((self.entries[line_num] for line_num in set(title_lines) if line_num not in self.bodies), key=lambda entry: entry[1])
+        if self.data is not None or not entries :
+            return
+        with open(self.abs_path, "rb") as summary_file :
+            for entry in entries :
+                summary_file.seek(entry[1])
+                self.bodies[entry[0]] = summary_file.read(entry[2])
+
+    def tableBytes(self, title_line):
+        entry = self.entries[title_line]
+        if self.data is not None :
+            return self.data[entry[1]:entry[1] + entry[2]]
+        if title_line not in self.bodies :
+            self.prefetch([title_line])
+        return self.bodies[title_line]
+
+    def tableRows(self, title_line):
+        """(rows, end) of the table under title_line. Separator lines ("----") and empty cells are dropped.
+        end is the line after the closing empty line, None when the file ends before the table does."""
+        table_data = list()
+        for tlist in csv.reader(io.StringIO(self.tableBytes(title_line).decode("utf-8"), newline="")) :
+            trimmed_list = tools.trim_list(tlist)
+            if len(trimmed_list) > 0 :
+                tset = set("".join(trimmed_list))
+                if all(char in {" ", "-"} for char in tset) == False :
+                    table_data.append(trimmed_list)
+        return table_data, self.entries[title_line][3]
+
+
+def targetHits(index, targets) :
+    # diagnostics, target key -> 1-based line numbers of every table its lookup matches
+    hits = index.matchLookups([target["lookup"] for target in targets])
+    return {target["key"]: [line_num + 1 for line_num in hits[target["lookup"]]] for target in targets}
+
+
+def indexBytes(data, abs_path=None) :
+    return SummaryIndex(abs_path, *scanSummary(data), data)
+
+
+def sidecarPath(abs_path) :
+    # wl_summary.csv -> wl_summary.swidx, the name must not end in .csv (or it is crawled as a summary itself)
+    return os.path.splitext(abs_path)[0] + SIDECAR_SUFFIX
+
+
+def writeSidecar(index, stat) :
+    sidecar = {"version":SIDECAR_VERSION, "size":stat.st_size, "mtime_ns":stat.st_mtime_ns,
+               "line_count":index.line_count, "titles":index.titles}
+    tmp_path = f"{sidecarPath(index.abs_path)}.{os.getpid()}.tmp"
+    try :
+        with open(tmp_path, "w", encoding="utf-8") as sidecar_file :
+            json.dump(sidecar, sidecar_file, separators=(",", ":"))
+        os.replace(tmp_path, sidecarPath(index.abs_path))
+    except OSError :
+        # read-only share or the like, the summary is simply scanned again next time
+        pass
+
+
+def loadSidecar(abs_path) :
+    # None when there is no sidecar or it was written for another version of the summary
+    try :
+        with open(sidecarPath(abs_path), "r", encoding="utf-8") as sidecar_file :
+            sidecar = json.load(sidecar_file)
+        stat = os.stat(abs_path)
+        if sidecar["version"] != SIDECAR_VERSION or sidecar["size"] != stat.st_size or sidecar["mtime_ns"] != stat.st_mtime_ns :
+            return None
+        return SummaryIndex(abs_path, sidecar["titles"], sidecar["line_count"])
+    except (OSError, ValueError, KeyError, TypeError) :
+        return None
+
+
+def readSummaryIndex(abs_path, use_sidecar=True) :
+    # the summary is read at most once, every table is served from the index afterwards
+    if use_sidecar and os.stat(abs_path).st_size >= SIDECAR_MIN_SIZE :
+        index = loadSidecar(abs_path)
+        if index is not None :
+            return index
+    with open(abs_path, "rb") as summary_file :
+        data = summary_file.read()
+        stat = os.fstat(summary_file.fileno())
+    index = indexBytes(data, abs_path)
+    if use_sidecar and stat.st_size >= SIDECAR_MIN_SIZE :
+        writeSidecar(index, stat)
+    return index
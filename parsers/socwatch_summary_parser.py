@@ -1,11 +1,16 @@
-import csv
 import os
+import numpy as np
 import parsers.tools as tools
+import parsers.parse_context as pctx
+import parsers.socwatch_index as swi
+import parsers.bucket_spec as bspec
+import parsers.pcie_socwatch_summary_parser as psoc
 # Socwatch Options:
 # Command line options: -s 0 -o c:\hobl_data\socwatch\AI_GPU_model_stripped -f temp -f npu -f gfx -f memss-pstate -f cpu-cstate -f hw-cpu-hwp -f hw-cpu-cstate -f hw-cpu-pstate -f os-cpu-cstate -f os-cpu-pstate -f hw-igfx-cstate -f hw-igfx-pstate -f display-state -f ddr-bw -f bw-all -f noc-pstate -f media-pstate -m -r auto --no-post-processing 
 
-# new socwatch header is being collected every time new header is detected
-socwatch_header_dict = dict()
+# new socwatch header is being collected every time new header is detected (per ParseContext).
+# kept for the callers that do not pass a context
+socwatch_header_dict = pctx.default_context.socwatch_header_dict
      
 
 def cpuModelTable(table) :
@@ -77,51 +82,62 @@ def coreFreqPerCoreResidencyTable(table, core_type_dict) :
 
     table['table_data'] = data
 
+    # (frequency bins x cores) residency matrix loaded in one conversion, bucketizedCpuPstate sums it
+    # without reading the cells again. the table keeps the cells as read
+    keys = list(data)[1:]
+    residency, valid = bspec.residencyRows(list(data.values())[1:])
+    return keys, residency, valid
+
 def coreFreqResidencyTable(table, core_type_dict):
     copied = table['table_data'].copy()
     header_start = copied[0][0]
 
-    combined_data = {header_start:[]}
+    core_names = list()
     if core_type_dict is not None :
         for TYPE in core_type_dict : 
             core_name = core_type_dict[TYPE]
-            if core_name not in combined_data[header_start]:
-                combined_data[header_start].append(core_name)
+            if core_name not in core_names:
+                core_names.append(core_name)
     
     header = copied[0][2:]
     top_bin = copied[1][2:]
 
-    for index in range(1, len(copied), 1) :  # this is excluding freq 0, idle. : for index in range(1, len(copied)-1, 1) :
-        row = copied[index]
-        line_dict = dict()
-        line_data_only = row[2:]
+    # residency columns averaged per core type, the same for every row
+    type_columns = {core_name: [] for core_name in core_names}
+    columns = list()
+    for cell_idx in range(len(header)) :
+        if "(%)" not in header[cell_idx] :
+            break
+        column_cpu = header[cell_idx].split("/")[2]
+        if column_cpu in core_type_dict and "(msec)" not in header[cell_idx] and int(float(top_bin[cell_idx])) != 100: 
+            type_columns[core_type_dict[column_cpu]].append(len(columns))
+            columns.append(cell_idx + 2)
+
+    rows = copied[1:]  # this is excluding freq 0, idle. : copied[1:-1]
+    keys = list()
+    for row in rows :
         key = "-".join(row[1].split(" -- "))
         if key == "0" : 
             key = "0-idle"
-        for cell_idx in range(len(header)) :
-            if "(%)" not in header[cell_idx] :
-                break
-            column_cpu = header[cell_idx].split("/")[2]
-            if column_cpu in core_type_dict and "(msec)" not in header[cell_idx] and int(float(top_bin[cell_idx])) != 100: 
-                core_name = core_type_dict[column_cpu]
-                if core_name not in line_dict :
-                    line_dict[core_name] = float(line_data_only[cell_idx])
-                    line_dict[core_name+"_num"] = 1
-                else :
-                    line_dict[core_name] += float(line_data_only[cell_idx])
-                    line_dict[core_name+"_num"] += 1
-
-        sum_list = ["-"] * len(combined_data[header_start])
-        for core_idx in range(len(combined_data[header_start])) :    
-            core_name = combined_data[header_start][core_idx]
-            if core_name in line_dict:
-                sum_list[core_idx] = round(line_dict[core_name] / line_dict[core_name+"_num"], 2)
-        combined_data[key] = sum_list.copy()
+        keys.append(key)
+
+    # (cores x frequency bins) residency matrix. the cores of a type are added up along the first axis,
+    # one core after the other like the per-cell sum it replaces, so the rounded averages do not change
+    residency = np.array([[row[column] for column in columns] for row in rows], dtype=np.float64).reshape(len(rows), len(columns)).T.copy()
+    averages = dict()
+    for core_name in core_names :
+        core_columns = type_columns[core_name]
+        if len(core_columns) > 0 :
+            averaged = np.add.reduce(residency[core_columns], axis=0) / len(core_columns)
+            averages[core_name] = [round(value, 2) for value in averaged.tolist()]
+        else :
+            averages[core_name] = ["-"] * len(rows)
 
     seperated_data = {}
-    for idx, core_name in enumerate(combined_data[header_start]):
-        for pstate in combined_data:
-            seperated_data[str(core_name)+" "+str(pstate)] = combined_data[pstate][idx]
+    for core_name in core_names :
+        seperated_data[str(core_name)+" "+str(header_start)] = core_name
+        for key, value in zip(keys, averages[core_name]) :
+            seperated_data[str(core_name)+" "+str(key)] = value
     
     table['table_data'] = seperated_data
 
@@ -179,79 +195,47 @@ def osWakeupsTable(table) :
         data[key] = value
     table['table_data'] = data
 
-def floatNumberOrArray(value, prev_value = None) : 
-    try :
-        return float(value)
-    except :
-        if prev_value is not None and isinstance(prev_value, list) :
-            summed = [round(float(a) + float(b), 3) for a, b in zip(value, prev_value)]
-            return summed
-        else :
-            return value
-
-
 def bucketizedTable(table, keyIdx, ValueIdx, buckets) :
     copied = table['table_data'].copy()
-    data = dict()
-    bucketized = {bk: 0 for bk in buckets}
 
     first_key = next(iter(copied))
     header_dict = {first_key: copied.pop(first_key)}
 
-    for key in copied:
-        value = copied[key]
-        for bucket in bucketized :
-            ranges = bucket.split("-")
-            if len(ranges) == 1 and bucket == key :
-                bucketized[bucket] = float(value)
-            elif len(ranges) == 1 and int(key) > int(ranges[0]) and bucket == buckets[-1]:
-                bucketized[bucket] = bucketized[bucket] + float(value) 
-            elif len(ranges) == 2:
-                min = int(ranges[0])
-                max = int(ranges[1])
-                if int(key) >= min and int(key) <= max :
-                    bucketized[bucket] = bucketized[bucket] + float(value)
-
-    header_dict.update(bucketized)
+    header_dict.update(bspec.compileBuckets(buckets).bucketize(copied.items()))
     table['bucketized_data'] = header_dict
 
 
-def bucketizedCpuPstate(table, keyIdx, ValueIdx, buckets) :
-    copied = table['table_data'].copy()
+def bucketizedCpuPstate(table, keyIdx, ValueIdx, buckets, residency_rows=None) :
+    # keys are frequency ranges such as "4801-4900", split over the buckets they straddle
+    spec = bspec.compileBuckets(buckets)
+    items = iter(table['table_data'].items())
+    first_key, first_value = next(items)
 
-    it = iter(copied.items())
-    first_key, first_value = next(it)
-    first_copied = {first_key: first_value}
-    bucketized = {bk: 0 for bk in buckets}
-    
-    for key, value in it:
-        # this is for mainly CPU P-State, marked as range such as "4801-4900"
-        # the feature requster aggreed with using the first value to represent the range.
-        check_key = key.split("-")
-        if key == "<= 400":
-            key = "400"
-        elif key == "0-idle":
-            key = "0"
-        elif len(check_key) == 2 :   
-            key = check_key[0]
+    if isinstance(first_value, list) :
+        # per core: the first row names the cores, every bucket holds one value per core.
+        # residency_rows is the (keys, residency, valid) matrix coreFreqPerCoreResidencyTable loaded
+        bucketized = {first_key: first_value}
+        if residency_rows is not None :
+            bucketized.update(zip(spec.names, spec.bucketizeRows(*residency_rows)))
         else :
-            print("unexpected key format for bucketizing: ", key)
-
-        for bucket in bucketized :
-            ranges = bucket.split("-")
-            if len(ranges) == 1 and bucket == key :
-                bucketized[bucket] = floatNumberOrArray(value)
-            elif len(ranges) == 1 and int(key) > int(ranges[0]) and bucket == buckets[-1]:
-                bucketized[bucket] = floatNumberOrArray(value, bucketized[bucket])
-            elif len(ranges) == 2:
-                min = int(ranges[0])
-                max = int(ranges[1])
-                digits_in_key = int("".join(filter(str.isdigit, key)))
-                if digits_in_key >= min and digits_in_key <= max :
-                    bucketized[bucket] = floatNumberOrArray(value, bucketized[bucket])
+            bucketized.update(spec.bucketize(items))
+        table['bucketized_data'] = bucketized
+        return
+
+    # averaged per core type: "<core type> <header>" opens the keys "<core type> <frequency>" of each type
+    groups = [(first_key, first_value, [])]
+    for key, value in items :
+        if isinstance(value, str) and key.startswith(value + " ") :
+            groups.append((key, value, []))
+        else :
+            groups[-1][2].append((key[len(groups[-1][1]) + 1:], value))
 
-    first_copied.update(bucketized)
-    table['bucketized_data'] = first_copied
+    bucketized = dict()
+    for header_key, core_name, core_items in groups :
+        bucketized[header_key] = core_name
+        for bucket, value in spec.bucketize(core_items).items() :
+            bucketized[f"{core_name} {bucket}"] = value
+    table['bucketized_data'] = bucketized
 
 
 def defaultResidencyTable(table, keyIdx, ValueIdx) :
@@ -294,7 +278,11 @@ def socwatchTableTypeChecker(table, core_type, soc_target, tdic) :
     elif label == 'CPU_Pavr' : 
         coreFreqAvrTable(table, 0, 1)
     elif label == 'CPU_Pstate' :        
-        coreFreqPerCoreResidencyTable(table, core_type) if "data_summary_type" in tdic else coreFreqResidencyTable(table, core_type)
+        residency_rows = None
+        if "data_summary_type" in tdic :
+            residency_rows = coreFreqPerCoreResidencyTable(table, core_type)
+        else :
+            coreFreqResidencyTable(table, core_type)
     elif label == 'DC_count':
         oneLineColonSeperater(table)
     elif surfix == "BW":
@@ -310,12 +298,13 @@ def socwatchTableTypeChecker(table, core_type, soc_target, tdic) :
 
     if "buckets" in soc_target :
         if label == 'CPU_Pstate' :
-            bucketizedCpuPstate(table, 0, 1, soc_target['buckets'])
+            bucketizedCpuPstate(table, 0, 1, soc_target['buckets'], residency_rows)
         else :
             bucketizedTable(table, 0, 1, soc_target['buckets'])
 
-def extractHeader(table) :
+def extractHeader(table, context=None) :
 
+    socwatch_header_dict = pctx.resolve(context).socwatch_header_dict
     if table["label"] not in socwatch_header_dict:
         socwatch_header_dict[table["label"]] = [key for key in table['table_data']]
     else :
@@ -328,34 +317,25 @@ def extractHeader(table) :
         socwatch_header_dict[table["label"]] = set_keys
 
 
-def parseTargetTable(target, csvreader, CORE_TYPE, tdic) :
+def parseTargetTable(target, index, start, CORE_TYPE, tdic, context=None) :
 
+    # returns the table and the line the next target is looked up from
     tTable = dict()
-    for tlist in csvreader :
-
-        if 'isCompleted' in tTable and tTable['isCompleted'] == False :
-            # if the table_data is initiated, 'isCompleted' exists, keep collecting line until empty line comes
-            if "".join(tlist) == "" :
-                tTable['isCompleted'] = True
-                socwatchTableTypeChecker(tTable, CORE_TYPE, target, tdic)
-                # When socwatch data is being parsed, header is also being collected and expended for unified header later
-                extractHeader(tTable)
-                break
-            else :
-                trimmed_list = tools.trim_list(tlist)
-                if len(trimmed_list) > 0 :
-                    tset = set("".join(trimmed_list))
-                    if all(char in {" ", "-"} for char in tset) == False :
-                        tTable['table_data'].append(trimmed_list)
-        elif len(tlist) > 0 and tlist[0].rfind(target['lookup']) >=0 :
-            tTable['label'] = target['key']
-            tTable['table_data'] = list()
-            tTable['isCompleted'] = False  
-    return tTable
-
-
-def parseSocwatch(tdic, socwatch_targets) :
-
+    title_line = index.findTable(target['lookup'], start)
+    if title_line is None :
+        return tTable, index.line_count
+    tTable['label'] = target['key']
+    tTable['table_data'], end = index.tableRows(title_line)
+    tTable['isCompleted'] = end is not None
+    if tTable['isCompleted'] :
+        socwatchTableTypeChecker(tTable, CORE_TYPE, target, tdic)
+        # When socwatch data is being parsed, header is also being collected and expended for unified header later
+        extractHeader(tTable, context)
+        return tTable, end
+    return tTable, index.line_count
+
+
+def socwatchSummaryPath(tdic) :
     abs_path = None
     if "socwatch_summary_path" in tdic :
         abs_path = tdic["socwatch_summary_path"] 
@@ -366,6 +346,12 @@ def parseSocwatch(tdic, socwatch_targets) :
         # tdic["data_summary_type"] = "compact"
     else :
         tools.errorAndExit("socwatch summary path is not supplied")
+    return abs_path
+
+
+def parseSocwatch(tdic, socwatch_targets, context=None, index=None) :
+
+    abs_path = socwatchSummaryPath(tdic)
 
     socwatch_obj = dict()
     socwatch_obj['socwatch_path'] = abs_path
@@ -373,36 +359,34 @@ def parseSocwatch(tdic, socwatch_targets) :
     socwatch_obj['core_number'] = 0
     CORE_TYPE = None
 
-    with open(abs_path, encoding='utf-8-sig', newline='') as csvfile:
-
-        csvreader = csv.reader(csvfile)
-        recheck_list = list()
-        nonexist_list = list()
-        for target in socwatch_targets : 
-            tTable = parseTargetTable(target, csvreader, CORE_TYPE, tdic)
-
-            if "label" in tTable and tTable['label'] == 'CPU_model':
-                CORE_TYPE = tTable['table_data'].copy()
-
-            if len(tTable) == 0:
-                # print("traget line not detected", tTable, target)
-                if target["key"] not in recheck_list:
-                    recheck_list.append(target["key"])
-                    csvfile.seek(0)
-                    csvreader = csv.reader(csvfile)
-                    tTable = parseTargetTable(target, csvreader, CORE_TYPE, tdic)
-                    if len(tTable) == 0:
-                        nonexist_list.append(target["key"])
-                    else :
-                        socwatch_obj['socwatch_tables'].append(tTable)
-            else :
-                socwatch_obj['socwatch_tables'].append(tTable)
-        if len(recheck_list) > 0 :
-            print("[re-looped table] : ", recheck_list, " you may want to match the order for ultimate performance") 
-        if len(nonexist_list) > 0 :
-            print("[nonexist searched table] : ", nonexist_list, " check socwatch summary source if the table is exist or check the look up text") 
+    # the file is read once, the targets are looked up in the index in any order
+    if index is None :
+        index = swi.readSummaryIndex(abs_path)
+    # every lookup is matched against the title lines in one pass, the matched tables are read in one go
+    hits = index.matchLookups([target['lookup'] for target in socwatch_targets])
+    index.prefetch([line_num for line_nums in hits.values() for line_num in line_nums])
+    nonexist_list = list()
+    # a lookup matching several tables takes the first one after the previous target's table
+    start = 0
+    for target in socwatch_targets : 
+        tTable, start = parseTargetTable(target, index, start, CORE_TYPE, tdic, context)
+
+        if "label" in tTable and tTable['label'] == 'CPU_model':
+            CORE_TYPE = tTable['table_data'].copy()
+
+        if len(tTable) == 0:
+            nonexist_list.append(target["key"])
+        else :
+            socwatch_obj['socwatch_tables'].append(tTable)
+    if len(nonexist_list) > 0 :
+        print("[nonexist searched table] : ", nonexist_list, " check socwatch summary source if the table is exist or check the look up text") 
     # tools.updateHeaderCollection("socwatch_obj", socwatch_obj)
     return socwatch_obj
 
-        
+
+def parseSocwatchAndPCIe(tdic, socwatch_targets, pcie_targets, context=None) :
+    # a summary collected with the PCIe features as well holds both table sets, one read serves the two parsers
+    abs_path = socwatchSummaryPath(tdic)
+    index = swi.readSummaryIndex(abs_path)
+    return parseSocwatch(tdic, socwatch_targets, context, index), psoc.parsePCIe(abs_path, pcie_targets, context, index)
 
@@ -0,0 +1,200 @@
+import io
+import os
+import csv
+import json
+import warnings
+import numpy as np
+import parsers.file_classifier as fcl
+
+
+# <trace name>.ptcol next to a pacs trace keeps every numeric column of it in binary, one after the other:
+# a JSON header line (padded so the columns start 64 byte aligned) then the values of each column,
+# little endian. A column is memory-mapped on its own, so a reader only touches the rails it asks for.
+# the name must not end in sr.csv (or it is crawled as a trace itself)
+CACHE_SUFFIX = ".ptcol"
+CACHE_VERSION = 1
+DATA_ALIGN = 64
+
+
+def cachePath(trace_path) :
+    return os.path.splitext(trace_path)[0] + CACHE_SUFFIX
+
+
+def lineCount(text) :
+    # lines of a text whose lines end in "\n", the last one may be unterminated
+    count = text.count("\n")
+    if text and not text.endswith("\n") :
+        count += 1
+    return count
+
+
+def findTraces(folder) :
+    # every file ParseAll would take as a DAQ trace, in walk order
+    traces = list()
+    for root, dirs, files in os.walk(folder) :
+        dirs.sort()
+        traces.extend(os.path.join(root, f) for f in sorted(files) if fcl.classify(f) == fcl.TAG_DAQ_TRACE)
+    return traces
+
+
+def readTraceText(trace_path) :
+    # (header, text of the data lines) of a whole trace
+    with open(trace_path, "r", encoding="utf-8-sig", newline="") as trace_file :
+        header = next(csv.reader([trace_file.readline()]), [])
+        return header, trace_file.read()
+
+
+def integerColumn(text, idx, values) :
+    # a column of integer literals only ("12", not "12.0") as int64, the dtype pandas reads it with. None otherwise
+    if len(values) == 0 or not np.all(np.isfinite(values)) or not np.all(values == np.floor(values)) :
+        return None
+    try :
+        return np.loadtxt(io.StringIO(text), dtype=np.int64, delimiter=",", comments=None, usecols=[idx], ndmin=1)
+    except (ValueError, OverflowError) :
+        return None
+
+
+def parseColumns(header, text) :
+    """(columns, uniform) of the data lines. columns holds an array or None per header column, None for
+    a column that is not all numbers. uniform is False when a row has more or fewer cells than the header.
+
+    numpy converts the whole text at once. A trace it cannot read that way (empty line, quoted,
+    missing or text cells) is split with csv and converted column by column.
+    """
+    row_num = lineCount(text)
+    columns = [None] * len(header)
+    uniform = True
+    try :
+        with warnings.catch_warnings() :
+            # numpy warns about a trace without data lines
+            warnings.simplefilter("ignore", UserWarning)
+            matrix = np.loadtxt(io.StringIO(text), dtype=np.float64, delimiter=",", comments=None, ndmin=2)
+        if matrix.shape == (row_num, len(header)) :
+            columns = [np.ascontiguousarray(matrix[:, idx]) for idx in range(len(header))]
+        else :
+            matrix = None
+    except ValueError :
+        matrix = None
+
+    if matrix is None :
+        rows = list(csv.reader(io.StringIO(text, newline="")))
+        if len(rows) != row_num :
+            # bare \r line breaks or quoted ones, the rows would not line up with the CSV readers
+            return columns, False
+        uniform = all(len(row) == len(header) for row in rows)
+        for idx in range(len(header)) :
+            try :
+                columns[idx] = np.fromiter((float(row[idx]) for row in rows), dtype=np.float64, count=len(rows))
+            except (ValueError, IndexError) :
+                columns[idx] = None
+
+    for idx, values in enumerate(columns) :
+        if values is not None :
+            integers = integerColumn(text, idx, values)
+            if integers is not None and len(integers) == len(values) :
+                columns[idx] = integers
+    return columns, uniform
+
+
+def writeCache(trace_path, header, columns, uniform, row_num, stat) :
+    specs = list()
+    offset = 0
+    for values in columns :
+        if values is None :
+            specs.append(None)
+        else :
+            specs.append({"dtype":values.dtype.newbyteorder("<").str, "offset":offset})
+            offset += values.nbytes
+    meta = {"version":CACHE_VERSION, "size":stat.st_size, "mtime_ns":stat.st_mtime_ns,
+            "rows":row_num, "uniform":uniform, "header":header, "columns":specs}
+    line = json.dumps(meta, separators=(",", ":")).encode("utf-8")
+    line += b" " * (-(len(line) + 1) % DATA_ALIGN) + b"\n"
+
+    tmp_path = f"{cachePath(trace_path)}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as cache_file :
+        cache_file.write(line)
+        for values in columns :
+            if values is not None :
+                cache_file.write(values.astype(values.dtype.newbyteorder("<"), copy=False).tobytes())
+    os.replace(tmp_path, cachePath(trace_path))
+
+
+def convertTrace(trace_path) :
+    """Write the .ptcol columns of a trace next to it, returns its path."""
+    stat = os.stat(trace_path)
+    header, text = readTraceText(trace_path)
+    writeCache(trace_path, header, *parseColumns(header, text), lineCount(text), stat)
+    return cachePath(trace_path)
+
+
+class TraceCache:
+    """Columns of a converted pacs trace, each memory-mapped from its .ptcol on first use.
+
+    header is the CSV header of the trace and len() its number of data rows. A column is asked for
+    by header index and comes back read-only, without being copied. A negative index counts from the
+    end of the rows, only possible when every row has a cell per header column.
+    """
+
+    def __init__(self, path, meta, data_start):
+        self.path = path
+        self.header = meta["header"]
+        self.specs = meta["columns"]
+        self.row_num = meta["rows"]
+        self.uniform = meta["uniform"]
+        self.data_start = data_start
+        self.mapped = dict()
+
+    def __len__(self):
+        return self.row_num
+
+    def numeric(self, idx):
+        if idx < 0 and not self.uniform :
+            return False
+        return -len(self.specs) <= idx < len(self.specs) and self.specs[idx] is not None
+
+    def column(self, idx):
+        if not self.numeric(idx) :
+            raise ValueError(f"column {idx} of {self.path} is not numeric")
+        idx %= len(self.specs)
+        if idx not in self.mapped :
+            spec = self.specs[idx]
+            if self.row_num == 0 :
+                self.mapped[idx] = np.empty(0, dtype=spec["dtype"])
+            else :
+                self.mapped[idx] = np.memmap(self.path, dtype=spec["dtype"], mode="r", offset=self.data_start + spec["offset"], shape=(self.row_num,))
+        return self.mapped[idx]
+
+    def columnIndex(self, name):
+        # the last column of that name, as the trace readers look rails up
+        return len(self.header) - 1 - self.header[::-1].index(name)
+
+
+def openTraceCache(trace_path) :
+    # None when the trace was not converted, or was changed since
+    path = cachePath(trace_path)
+    try :
+        with open(path, "rb") as cache_file :
+            line = cache_file.readline()
+            meta = json.loads(line)
+            stat = os.stat(trace_path)
+            if meta["version"] != CACHE_VERSION or meta["size"] != stat.st_size or meta["mtime_ns"] != stat.st_mtime_ns :
+                return None
+            cache_size = os.fstat(cache_file.fileno()).st_size
+        data_size = sum(meta["rows"] * np.dtype(spec["dtype"]).itemsize for spec in meta["columns"] if spec is not None)
+        if cache_size != len(line) + data_size :
+            # cut short
+            return None
+        return TraceCache(path, meta, len(line))
+    except (OSError, ValueError, KeyError, TypeError) :
+        return None
+
+
+def traceColumns(trace_path, names) :
+    """{rail: values} of the named columns of a trace, from its .ptcol when converted, else from the CSV.
+    Values are float64 or int64 arrays, None for a column that is not numeric. For notebooks and scripts."""
+    cache = openTraceCache(trace_path)
+    if cache is not None :
+        return {name: cache.column(cache.columnIndex(name)) if cache.numeric(cache.columnIndex(name)) else None for name in names}
+    header, text = readTraceText(trace_path)
+    columns = parseColumns(header, text)[0]
+    return {name: columns[len(header) - 1 - header[::-1].index(name)] for name in names}
@@ -108,3 +108,62 @@ def test_llama_throughput_attribute(tmp_path: Path):
         f"Llama throughput attribute missing. Found: {attributes}"
     )
 
+
+
+# ---------------------------------------------------------------------------
+# library API (in-process)
+# ---------------------------------------------------------------------------
+
+def test_import_has_no_side_effects(monkeypatch):
+    """Importing ParseAll must not parse argv, load a config or run the parse."""
+    import importlib
+    import sys
+    monkeypatch.setattr(sys, "argv", ["pytest", "--not-a-parseall-flag"])
+    sys.modules.pop("ParseAll", None)
+    ParseAll = importlib.import_module("ParseAll")
+    assert callable(ParseAll.parse_tree) and callable(ParseAll.write_reports)
+
+
+def test_parse_tree_and_write_reports(tmp_path: Path):
+    """parse_tree returns the data sets in process, write_reports writes the same Excel as the CLI."""
+    import os
+    import ParseAll
+    config = ParseAll.loadConfig(str(TEST_CONFIG))
+    result = ParseAll.parse_tree(str(FIXTURE_PARSEALL_INPUT), config,
+                                 {"path_splitter": os.sep, "no_cache": True})
+    assert [dataset["data_type"] for dataset in result.hobl_sets] == [["MS_AI_MODEL"], ["LLAMA"]]
+    assert result.loaded_file_num == 2
+    assert all(dataset["ID_path"].startswith(str(FIXTURE_PARSEALL_INPUT)) for dataset in result.hobl_sets)
+
+    out_prefix = str(tmp_path / "result")
+    ParseAll.write_reports(result, out_prefix)
+    attributes = _load_attribute_column(Path(out_prefix + "_allPower_v.xlsx"))
+    assert "Data label" in attributes
+    assert "throughput (FPS)" in attributes
+
+
+def test_parse_tree_runs_are_independent():
+    """Two parse_tree calls in one process do not share data sets."""
+    import os
+    import ParseAll
+    config = ParseAll.loadConfig(str(TEST_CONFIG))
+    options = {"path_splitter": os.sep, "no_cache": True}
+    first = ParseAll.parse_tree(str(FIXTURE_PARSEALL_INPUT), config, options)
+    second = ParseAll.parse_tree(str(FIXTURE_PARSEALL_INPUT), config, options)
+    assert len(first.hobl_sets) == len(second.hobl_sets)
+    assert first.loaded_file_num == second.loaded_file_num
+    assert first.context is not second.context
+
+
+def test_results_json_without_power_summary_is_not_parsed(tmp_path: Path):
+    """A -results.json only carries the power run time, a data set without power data does not read it."""
+    import os
+    import shutil
+    import ParseAll
+    input_dir = tmp_path / "input"
+    shutil.copytree(FIXTURE_PARSEALL_INPUT, input_dir)
+    (input_dir / "WW01_PTL_HW" / "GPU_model_run" / "run-results.json").write_text("{not json")
+    config = ParseAll.loadConfig(str(TEST_CONFIG))
+    result = ParseAll.parse_tree(str(input_dir), config, {"path_splitter": os.sep, "no_cache": True})
+    assert [dataset["data_type"] for dataset in result.hobl_sets] == [["MS_AI_MODEL"], ["LLAMA"]]
+    assert result.loaded_file_num == 2
@@ -10,10 +10,13 @@ do not invoke any top-level workload parser script.
 from __future__ import annotations
 
 import csv
+import json
 import sys
 from pathlib import Path
 
 import pytest
+import numpy as np
+import pandas as pd
 
 # ---------------------------------------------------------------------------
 # Put the project root on sys.path so "parsers.*" imports resolve.
@@ -28,6 +31,23 @@ import parsers.bm_llama_output_parser as lop
 import parsers.Phi_output_parser as pop
 import parsers.power_summary_parser as psp
 import parsers.flattener as flattener
+import parsers.crawler as crawler
+import parsers.parse_jobs as parse_jobs
+import parsers.dataset_registry as dataset_registry
+import parsers.parse_cache as parse_cache
+import parsers.power_checker as power_checker
+import parsers.power_trace_parser as power_trace_parser
+import parsers.incremental_state as incremental_state
+import parsers.manifest as manifest
+import parsers.file_classifier as file_classifier
+import parsers.parse_context as parse_context
+import parsers.socwatch_summary_parser as socwatch_summary_parser
+import parsers.socwatch_index as socwatch_index
+import parsers.pcie_socwatch_summary_parser as pcie_socwatch_summary_parser
+import parsers.bucket_spec as bucket_spec
+import parsers.change_point as change_point
+import parsers.trace_cache as trace_cache
+import trace_power_slicer
 
 FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
 
@@ -317,3 +337,951 @@ class TestFlattener:
         entry, _ = self._make_entry_with_power()
         result = flattener.flatten_AI_model_dic(entry)
         assert result == {}
+
+
+# ===========================================================================
+# parsers/parse_context.py
+# ===========================================================================
+
+class TestParseContext:
+    def test_header_collection_per_context(self):
+        entry, picks = TestFlattener()._make_entry_with_power()
+        first = parse_context.ParseContext()
+        second = parse_context.ParseContext()
+        flattener.flatten_power_dic(entry, picks, first)
+        assert "power" in first.header_collection
+        assert second.header_collection == {}
+        assert "P_SOC" in flattener.getHeaderCollection(first)
+        assert "P_SOC" not in flattener.getHeaderCollection(second)
+
+    def test_socwatch_headers_per_context(self, tmp_path):
+        summary = tmp_path / "wl.csv"
+        summary.write_text("CPU native model,,\nCPU/Package_0/Core_0 = P,,\n,,\n")
+        context = parse_context.ParseContext()
+        parsed = socwatch_summary_parser.parseSocwatch(str(summary), [{"key": "CPU_model", "lookup": "CPU native model"}], context)
+        assert parsed["socwatch_tables"][0]["table_data"] == {"Package_0": "P"}
+        assert context.socwatch_header_dict == {"CPU_model": ["Package_0"]}
+        assert "CPU_model" not in parse_context.ParseContext().socwatch_header_dict
+
+    def test_power_summaries_do_not_share_rows(self, tmp_path):
+        first = _write_power_summary(tmp_path / "run_a" / "pacs-summary.csv", 2.0)
+        second = tmp_path / "pacs-summary.csv"
+        second.write_text("Rail,Average,Min\nP_SOC,3.0,1\n")
+        psp.parsePowerSummaryCSV(first, TEST_DAQ_TARGET)
+        assert psp.parsePowerSummaryCSV(str(second), TEST_DAQ_TARGET)["power_data"] == {"P_SOC": 3.0}
+
+    def test_data_sets_and_file_count(self):
+        context = parse_context.ParseContext("/")
+        context.dataset_registry.add(_dataset("/data/WW01/run_a"))
+        context.countLoadedFiles(2)
+        assert context.hobl_sets[0]["ID_path"] == "/data/WW01/run_a"
+        assert context.loaded_file_num == 2
+        assert len(parse_context.ParseContext().hobl_sets) == 0
+
+
+# ===========================================================================
+# parsers/crawler.py
+# ===========================================================================
+
+def _serial_walk(path, skip_folder_list, found):
+    """Reference walk: the recursive os.listdir + os.path.isfile crawl ParseAll used before."""
+    import os
+    for f in os.listdir(path):
+        abs_path = os.path.join(path, f)
+        if os.path.isfile(abs_path):
+            found.append((abs_path, f))
+        elif f not in skip_folder_list:
+            _serial_walk(abs_path, skip_folder_list, found)
+    return found
+
+
+class TestCrawler:
+    def _make_tree(self, root: Path):
+        for rel in [
+            "WW01/run_a/pacs-summary.csv",
+            "WW01/run_a/Socwatch/wl_Session.etl",
+            "WW01/run_b/pacs-summary.csv",
+            "WW01/Report/skip_me.csv",
+            "WW02/deep/er/file.txt",
+            "top.txt",
+        ]:
+            target = root / rel
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_text("x")
+
+    def test_matches_serial_walk_order(self, tmp_path):
+        self._make_tree(tmp_path)
+        skip = ["Report"]
+        expected = _serial_walk(str(tmp_path), skip, [])
+        assert crawler.crawlFiles(str(tmp_path), skip, 4) == expected
+
+    def test_skip_folder_list_honoured(self, tmp_path):
+        self._make_tree(tmp_path)
+        names = [f for _, f in crawler.crawlFiles(str(tmp_path), ["Report"], 2)]
+        assert "skip_me.csv" not in names
+        assert "file.txt" in names
+
+    def test_single_thread(self, tmp_path):
+        self._make_tree(tmp_path)
+        assert len(crawler.crawlFiles(str(tmp_path), [], 1)) == 6
+
+    def test_sibling_index_uses_listing(self, tmp_path):
+        self._make_tree(tmp_path)
+        listings = crawler.listTree(str(tmp_path), [], 2)
+        siblings = crawler.SiblingIndex(listings)
+        socwatch = str(tmp_path / "WW01" / "run_a" / "Socwatch")
+        assert siblings.exists(socwatch, "wl_Session.etl")
+        # answered from the listing, a file created after the crawl is not seen
+        (tmp_path / "WW01" / "run_a" / "Socwatch" / "wl.csv").write_text("x")
+        assert not siblings.exists(socwatch, "wl.csv")
+
+    def test_sibling_index_falls_back_to_file_system(self, tmp_path):
+        self._make_tree(tmp_path)
+        siblings = crawler.SiblingIndex()
+        assert siblings.exists(str(tmp_path / "WW01" / "run_b"), "pacs-summary.csv")
+        assert not siblings.exists(str(tmp_path / "WW01" / "run_b"), "wl.csv")
+
+
+# ===========================================================================
+# parsers/manifest.py
+# ===========================================================================
+
+def _walk_with_break(path, listings, found):
+    # Phi_summary / mlc_summary style walk: stop listing a folder after its first Socwatch session
+    for f, is_file, is_dir, size, mtime_ns in crawler.listFolder(path, listings):
+        abs_path = str(Path(path) / f)
+        if is_file:
+            found.append(abs_path)
+            if file_classifier.classify(f) == file_classifier.TAG_SOCWATCH_SESSION:
+                break
+        else:
+            _walk_with_break(abs_path, listings, found)
+    return found
+
+
+class TestManifest:
+    def test_round_trip_replays_crawl(self, tmp_path):
+        tree = tmp_path / "tree"
+        TestCrawler()._make_tree(tree)
+        manifest_path = str(tmp_path / "crawl_manifest.json")
+        manifest.writeManifest(manifest.buildManifest(str(tree)), manifest_path)
+        base, listings = manifest.loadListings(manifest_path)
+        assert base == str(tree)
+        expected = crawler.crawlFiles(str(tree), ["Report"], 2)
+        assert crawler.orderedFiles(base, listings, ["Report"]) == expected
+
+    def test_records_size_and_mtime(self, tmp_path):
+        TestCrawler()._make_tree(tmp_path)
+        built = manifest.buildManifest(str(tmp_path))
+        entry = next(e for e in built["folders"]["WW01/run_a"] if e[0] == "pacs-summary.csv")
+        stat = (tmp_path / "WW01/run_a/pacs-summary.csv").stat()
+        assert entry == ["pacs-summary.csv", "f", stat.st_size, stat.st_mtime_ns, file_classifier.TAG_POWER_SUMMARY]
+
+    def test_per_folder_walk_matches_live_tree(self, tmp_path):
+        TestCrawler()._make_tree(tmp_path)
+        base = str(tmp_path)
+        listings = manifest.manifestListings(manifest.buildManifest(base), base)
+        assert _walk_with_break(base, listings, []) == _walk_with_break(base, None, [])
+
+    def test_rebased_on_moved_tree(self, tmp_path):
+        TestCrawler()._make_tree(tmp_path)
+        listings = manifest.manifestListings(manifest.buildManifest(str(tmp_path)), "/moved")
+        assert any(f == "pacs-summary.csv" for f, *_ in listings[str(Path("/moved") / "WW01" / "run_b")])
+
+    def test_unsupported_version_refused(self, tmp_path):
+        manifest_path = tmp_path / "old.json"
+        manifest_path.write_text('{"version": 0, "folders": {}}')
+        with pytest.raises(ValueError):
+            manifest.readManifest(str(manifest_path))
+
+
+# ===========================================================================
+# parsers/file_classifier.py
+# ===========================================================================
+
+class TestFileClassifier:
+    def test_default_rules(self):
+        assert file_classifier.classify("pacs-summary.csv") == file_classifier.TAG_POWER_SUMMARY
+        assert file_classifier.classify("wl_osSession.etl") == file_classifier.TAG_SOCWATCH_SESSION
+        assert file_classifier.classify("trace.etl") == file_classifier.TAG_ETL
+        assert file_classifier.classify("pacs-traces_sr.csv") == file_classifier.TAG_DAQ_TRACE
+        assert file_classifier.classify("xPU_llama-3.1_output.txt") == file_classifier.TAG_LLAMA_OUTPUT
+        assert file_classifier.classify("xPU_Model_qdq_proxy_w8a16_output.txt") == file_classifier.TAG_MS_AI_MODEL
+        assert file_classifier.classify("RUN.PROCYON-RESULT") == file_classifier.TAG_PROCYON_ARIELLE
+        assert file_classifier.classify(".PASS") == file_classifier.TAG_PASS_FAIL
+        assert file_classifier.classify("notes.txt") == file_classifier.TAG_UNCLASSIFIED
+
+    def test_priority_order_like_elif_chain(self):
+        # "_summary.csv" is both a power summary and (lower case) a socwatch_regular csv, power comes first
+        assert file_classifier.classify("socwatch_regular_summary.csv") == file_classifier.TAG_POWER_SUMMARY
+        # an etl that is a socwatch session is not a plain etl
+        assert file_classifier.classify("wl_hwSession.etl") == file_classifier.TAG_SOCWATCH_SESSION
+
+    def test_config_rules_go_first(self):
+        config = {"file_classifier_rules": [{"tag": "power_summary", "contains": ["_pwr_report.csv"], "priority": 5}]}
+        classifier = file_classifier.FileClassifier(file_classifier.configRules(config))
+        assert classifier.classify("gpu_pwr_report.csv") == file_classifier.TAG_POWER_SUMMARY
+        assert classifier.classify("pacs-summary.csv") == file_classifier.TAG_POWER_SUMMARY
+
+    def test_config_rule_same_priority_beats_builtin(self):
+        config = {"file_classifier_rules": [{"tag": "etl", "contains": ["pacs-summary"], "priority": 40}]}
+        classifier = file_classifier.FileClassifier(file_classifier.configRules(config))
+        assert classifier.classify("pacs-summary.csv") == file_classifier.TAG_ETL
+
+    def test_unknown_tag_refused(self):
+        rules = [{"tag": "no_such_parser", "contains": ["x"]}]
+        with pytest.raises(ValueError):
+            file_classifier.FileClassifier(rules, known_tags={"power_summary"})
+
+    def test_rule_without_condition_refused(self):
+        with pytest.raises(ValueError):
+            file_classifier.FileClassifier([{"tag": "power_summary", "priority": 1}])
+
+
+# ===========================================================================
+# parsers/parse_jobs.py
+# ===========================================================================
+
+def _write_power_summary(path: Path, soc_power: float):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        "Rail,Average,Min\n"
+        f"P_SOC,{soc_power},1\n"
+        "P_VCCCORE,1.2,1\n"
+        "P_VCCSA,0.4,1\n"
+        "P_VCCGT,0.6,1\n"
+        "Run Time,120,1\n"
+    )
+    return str(path)
+
+
+class TestPowerSummaryBatch:
+    def test_power_objects_in_path_order(self, tmp_path):
+        paths = [_write_power_summary(tmp_path / f"run_{i}" / "pacs-summary.csv", 1.0 + i) for i in range(3)]
+        power_objs = psp.parsePowerSummaries(paths, TEST_DAQ_TARGET)
+        assert [obj["power_path"] for obj in power_objs] == paths
+        assert [obj["power_data"]["P_SOC"] for obj in power_objs] == [1.0, 2.0, 3.0]
+        assert power_objs[2]["power_data"]["Energy (J)"] == pytest.approx(360.0)
+
+    def test_last_row_of_a_rail_wins(self, tmp_path):
+        path = tmp_path / "pacs-summary.csv"
+        path.write_text("Rail,Average\nP_SOC,1.0\n\nP_SOC,2.5\nRun Time,10\n")
+        assert psp.parsePowerSummaryCSV(str(path), TEST_DAQ_TARGET)["power_data"] == {"P_SOC": 2.5, "Run Time": 10.0, "Energy (J)": 25.0}
+
+
+class TestParseJobs:
+    def test_results_keep_job_order_on_process_pool(self, tmp_path):
+        paths = [_write_power_summary(tmp_path / f"run_{i}" / "pacs-summary.csv", 1.0 + i) for i in range(4)]
+        jobs = [(parse_jobs.POWER_SUMMARY, p, TEST_DAQ_TARGET) for p in paths]
+        results = parse_jobs.runParseJobs(jobs, 2)
+        assert [r["power_path"] for r in results] == paths
+        assert [r["power_data"]["P_SOC"] for r in results] == [1.0, 2.0, 3.0, 4.0]
+
+    def test_serial_and_pool_agree(self, tmp_path):
+        paths = [_write_power_summary(tmp_path / f"run_{i}" / "pacs-summary.csv", 2.5) for i in range(3)]
+        jobs = [(parse_jobs.POWER_SUMMARY, p, TEST_DAQ_TARGET) for p in paths]
+        assert parse_jobs.runParseJobs(jobs, 1) == parse_jobs.runParseJobs(jobs, 3)
+
+    def test_unknown_parser_raises(self):
+        with pytest.raises(ValueError):
+            parse_jobs.runParseJob("no_such_parser", "x", None)
+
+
+# ===========================================================================
+# parsers/dataset_registry.py
+# ===========================================================================
+
+def _dataset(id_path):
+    return {"ID_path": id_path, "data_label": ["a", "b"], "data_type": []}
+
+
+class TestDatasetRegistry:
+    def test_exact_and_child_paths_resolve(self):
+        registry = dataset_registry.DatasetRegistry("\\")
+        run = registry.add(_dataset("C:\\WW01\\run_1"))
+        assert registry.find("C:\\WW01\\run_1") is run
+        assert registry.find("C:\\WW01\\run_1\\Socwatch") is run
+
+    def test_sibling_with_common_prefix_not_matched(self):
+        registry = dataset_registry.DatasetRegistry("\\")
+        registry.add(_dataset("C:\\WW01\\run_1"))
+        assert registry.find("C:\\WW01\\run_10") is None
+
+    def test_first_registered_wins_for_nested_ids(self):
+        registry = dataset_registry.DatasetRegistry("\\")
+        outer = registry.add(_dataset("C:\\WW01"))
+        registry.add(_dataset("C:\\WW01\\run_1"))
+        assert registry.find("C:\\WW01\\run_1\\power") is outer
+
+    def test_datasets_keep_insertion_order(self):
+        registry = dataset_registry.DatasetRegistry("/")
+        ids = ["/data/b", "/data/a", "/data/c"]
+        for id_path in ids:
+            registry.add(_dataset(id_path))
+        assert [d["ID_path"] for d in registry.datasets] == ids
+        assert len(registry) == 3
+
+
+# ===========================================================================
+# parsers/parse_cache.py
+# ===========================================================================
+
+class TestParseCache:
+    def test_second_run_is_served_from_cache(self, tmp_path):
+        summary = _write_power_summary(tmp_path / "run" / "pacs-summary.csv", 3.0)
+        jobs = [(parse_jobs.POWER_SUMMARY, summary, TEST_DAQ_TARGET)]
+
+        cache = parse_cache.ParseCache(str(tmp_path / "cache"))
+        first = parse_jobs.runParseJobs(jobs, 1, cache)
+        cache.close()
+
+        cache = parse_cache.ParseCache(str(tmp_path / "cache"))
+        second = parse_jobs.runParseJobs(jobs, 1, cache)
+        assert (cache.hits, cache.misses) == (1, 0)
+        assert second == first
+        cache.close()
+
+    def test_changed_file_is_reparsed(self, tmp_path):
+        import os
+        summary = _write_power_summary(tmp_path / "run" / "pacs-summary.csv", 3.0)
+        cache = parse_cache.ParseCache(str(tmp_path))
+        parse_jobs.runParseJobs([(parse_jobs.POWER_SUMMARY, summary, TEST_DAQ_TARGET)], 1, cache)
+
+        _write_power_summary(Path(summary), 4.25)
+        stat = os.stat(summary)
+        os.utime(summary, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        result = parse_jobs.runParseJobs([(parse_jobs.POWER_SUMMARY, summary, TEST_DAQ_TARGET)], 1, cache)
+        assert cache.hits == 0
+        assert result[0]["power_data"]["P_SOC"] == 4.25
+        cache.close()
+
+    def test_config_section_is_part_of_the_key(self, tmp_path):
+        summary = _write_power_summary(tmp_path / "run" / "pacs-summary.csv", 3.0)
+        cache = parse_cache.ParseCache(str(tmp_path))
+        cache.put(parse_jobs.POWER_SUMMARY, summary, TEST_DAQ_TARGET, {"power_data": {}})
+        other_target = dict(TEST_DAQ_TARGET, TARGET_COLUMN="Min")
+        assert cache.get(parse_jobs.POWER_SUMMARY, summary, other_target) == (False, None)
+        assert cache.get(parse_jobs.POWER_SUMMARY, summary, TEST_DAQ_TARGET)[0] is True
+        cache.close()
+
+
+# ===========================================================================
+# parsers/power_checker.py + parsers/incremental_state.py  (incremental run)
+# ===========================================================================
+
+def _power_block(label, soc_power):
+    return {
+        "ID_path": f"/data/{label}/{soc_power}",
+        "data_label": ["WW01", label],
+        "data_type": ["POWER"],
+        "power_obj": {"power_data": {"P_SOC": soc_power}},
+    }
+
+
+class TestIncrementalPick:
+    PICKS = {"SOC_POWER_RAIL_NAME": "P_SOC", "power_pick": "MIN", "second_folder_list": []}
+
+    def test_only_labels_limits_the_recheck(self):
+        blocks = [_power_block("a", 2.0), _power_block("a", 1.0), _power_block("b", 5.0)]
+        power_checker.checkAndMarkPower(blocks, self.PICKS, {"WW01 a"})
+        assert blocks[1]["power_obj"]["picked"] == "picked"
+        assert "picked" not in blocks[2]["power_obj"]
+
+    def test_stale_pick_is_cleared(self):
+        blocks = [_power_block("a", 2.0), _power_block("a", 1.0)]
+        blocks[0]["power_obj"]["picked"] = "picked"
+        power_checker.checkAndMarkPower(blocks, self.PICKS)
+        assert blocks[0]["power_obj"]["picked"] is None
+        assert blocks[1]["power_obj"]["picked"] == "picked"
+
+    def test_state_round_trip_and_config_guard(self, tmp_path):
+        summary = _write_power_summary(tmp_path / "run" / "pacs-summary.csv", 3.0)
+        block = _power_block("a", 3.0)
+        fingerprints = {block["ID_path"]: incremental_state.datasetFingerprint([summary])}
+        state_path = incremental_state.statePath(str(tmp_path / "out"))
+        incremental_state.saveState(state_path, "cfg1", [block], fingerprints)
+
+        loaded = incremental_state.loadState(state_path, "cfg1")
+        assert loaded[block["ID_path"]]["dataset"] == block
+        assert loaded[block["ID_path"]]["fingerprint"] == fingerprints[block["ID_path"]]
+        assert incremental_state.loadState(state_path, "cfg2") == {}
+
+
+# ===========================================================================
+# parsers/socwatch_index.py
+# ===========================================================================
+
+SOCWATCH_SUMMARY = (
+    "Intel(R) SoC Watch,,\n"
+    ",,\n"
+    "CPU native model,,\n"
+    "CPU/Package_0/Core_0 = P,,\n"
+    "CPU/Package_0/Core_1 = E,,\n"
+    ",,\n"
+    "Core C-State (OS) Summary: Residency (Percentage and Time),,\n"
+    "C-State,Package_0/Core_0 (%),Package_0/Core_1 (%)\n"
+    "-------,---,---\n"
+    "C0,12.5,30\n"
+    ",,\n"
+    "S0ix Substate Summary: Residency (Percentage and Time),,\n"
+    "State,Residency (%),Time (msec)\n"
+    "S0i2.0,80.25,100\n"
+    ",,\n"
+)
+SOCWATCH_TARGETS = [
+    {"key": "CPU_model", "lookup": "CPU native model"},
+    {"key": "S0ix_Substate", "lookup": "S0ix Substate Summary: Residency (Percentage and Time)"},
+    {"key": "ACPI_Cstate", "lookup": "Core C-State (OS) Summary: Residency (Percentage and Time)"},
+]
+
+
+class TestSocwatchIndex:
+    def test_table_rows_skip_separators(self):
+        index = socwatch_index.indexBytes(SOCWATCH_SUMMARY.encode())
+        title_line = index.findTable("Core C-State (OS) Summary")
+        rows, end = index.tableRows(title_line)
+        assert rows == [["C-State", "Package_0/Core_0 (%)", "Package_0/Core_1 (%)"], ["C0", "12.5", "30"]]
+        assert index.findTable("S0ix Substate Summary") == end
+
+    def test_find_table_after_start_then_from_top(self):
+        index = socwatch_index.indexBytes(b"A title,,\n,,\nA title,,\n,,\n")
+        assert index.findTable("title", 1) == 2
+        assert index.findTable("title", 3) == 0
+        assert index.findTable("missing") is None
+
+    def test_targets_in_any_order_read_once(self, tmp_path, monkeypatch):
+        summary = tmp_path / "wl.csv"
+        summary.write_text(SOCWATCH_SUMMARY)
+        reads = []
+        read_index = socwatch_index.readSummaryIndex
+        monkeypatch.setattr(socwatch_index, "readSummaryIndex", lambda path: reads.append(path) or read_index(path))
+
+        parsed = socwatch_summary_parser.parseSocwatch(str(summary), SOCWATCH_TARGETS, parse_context.ParseContext())
+        assert reads == [str(summary)]
+        tables = {table["label"]: table["table_data"] for table in parsed["socwatch_tables"]}
+        assert tables["CPU_model"] == {"Package_0": "E"}
+        assert tables["S0ix_Substate"] == {"State": "Residency (%)", "S0i2.0": 80.25}
+        assert tables["ACPI_Cstate"] == {"C-State": "C0", "Core_0 (%)": 12.5, "Core_1 (%)": 30}
+
+    def test_matcher_reports_nested_lookups(self):
+        matcher = socwatch_index.LookupMatcher(["Core C-State", "Core C-State (OS) Summary", "Package C-State"])
+        assert matcher.match("Core C-State (OS) Summary: Residency") == ["Core C-State", "Core C-State (OS) Summary"]
+        assert matcher.match("C0,12.5,30") == []
+        assert socwatch_index.LookupMatcher([]).match("anything") == []
+
+    def test_target_hits(self):
+        index = socwatch_index.indexBytes(SOCWATCH_SUMMARY.encode())
+        hits = socwatch_index.targetHits(index, SOCWATCH_TARGETS + [{"key": "Missing", "lookup": "No such table"}])
+        assert hits == {"CPU_model": [3], "S0ix_Substate": [12], "ACPI_Cstate": [7], "Missing": []}
+
+    def test_scan_handles_quotes_crlf_and_bom(self):
+        plain = socwatch_index.scanSummary(SOCWATCH_SUMMARY.encode())
+        crlf = socwatch_index.scanSummary(b"\xef\xbb\xbf" + SOCWATCH_SUMMARY.replace("\n", "\r\n").encode())
+        assert list(crlf[0]) == list(plain[0]) and crlf[1] == plain[1]
+        quoted = socwatch_index.indexBytes(b'"Title, with comma",,\nh,1\n"",""\nNext,,\n')
+        assert quoted.tableRows(quoted.findTable("Title, with comma")) == ([["h", "1"]], 3)
+
+    def test_sidecar_serves_tables_without_rescan(self, tmp_path, monkeypatch):
+        summary = tmp_path / "wl.csv"
+        summary.write_text(SOCWATCH_SUMMARY)
+        monkeypatch.setattr(socwatch_index, "SIDECAR_MIN_SIZE", 0)
+        first = socwatch_summary_parser.parseSocwatch(str(summary), SOCWATCH_TARGETS, parse_context.ParseContext())
+        assert (tmp_path / "wl.swidx").exists()
+        assert file_classifier.classify("wl.swidx") == file_classifier.TAG_UNCLASSIFIED
+
+        def no_scan(data):
+            raise AssertionError("summary scanned again")
+        monkeypatch.setattr(socwatch_index, "scanSummary", no_scan)
+        assert socwatch_summary_parser.parseSocwatch(str(summary), SOCWATCH_TARGETS, parse_context.ParseContext()) == first
+
+    def test_stale_sidecar_is_ignored(self, tmp_path, monkeypatch):
+        summary = tmp_path / "wl.csv"
+        summary.write_text(SOCWATCH_SUMMARY)
+        monkeypatch.setattr(socwatch_index, "SIDECAR_MIN_SIZE", 0)
+        socwatch_index.readSummaryIndex(str(summary))
+        summary.write_text("CPU native model,,\nCPU/Package_0/Core_7 = P,,\n,,\n")
+        assert socwatch_index.loadSidecar(str(summary)) is None
+        index = socwatch_index.readSummaryIndex(str(summary))
+        assert index.tableRows(index.findTable("CPU native model"))[0] == [["CPU/Package_0/Core_7 = P"]]
+
+
+# ===========================================================================
+# parsers/pcie_socwatch_summary_parser.py
+# ===========================================================================
+
+PCIE_SUMMARY = (
+    "PCIe LTR Snoop Summary - Sampled: Histogram,,\n"
+    "Device,LTR < 1ms (%),LTR > 1ms (%)\n"
+    "NVM Express,10,90\n"
+    ",,\n"
+    "PCIe LPM Summary - Sampled: Approximated Residency (Percentage),,\n"
+    "Device,L0 (%),L1.2 (%)\n"
+    "-------,---,---\n"
+    "NVM Express,5.5,94.5\n"
+    "Ethernet,50,50\n"
+    ",,\n"
+)
+PCIE_TARGETS = [
+    {"key": "PCIe_LPM", "devices": ["NVM"], "lookup": "PCIe LPM Summary - Sampled: Approximated Residency (Percentage)"},
+    {"key": "PCIe_LTRsnoop", "devices": ["NVM"], "lookup": "PCIe LTR Snoop Summary - Sampled: Histogram"},
+]
+
+
+class TestPCIeSocwatchParser:
+    def test_targets_found_in_any_order(self, tmp_path):
+        summary = tmp_path / "socwatch_minimal_wl.csv"
+        summary.write_text(PCIE_SUMMARY)
+        parsed = pcie_socwatch_summary_parser.parsePCIe(str(summary), PCIE_TARGETS, parse_context.ParseContext())
+        tables = {table["label"]: table["table_data"] for table in parsed["pcie_socwatch_tables"]}
+        assert list(tables) == ["PCIe_LPM", "PCIe_LTRsnoop"]
+        assert tables["PCIe_LPM"] == {"Device_NVM Express": "NVM Express", "L0 (%)_NVM Express": "5.5", "L1.2 (%)_NVM Express": "94.5"}
+        assert tables["PCIe_LTRsnoop"]["LTR > 1ms (%)_NVM Express"] == "90"
+
+    def test_socwatch_and_pcie_from_one_read(self, tmp_path, monkeypatch):
+        summary = tmp_path / "wl.csv"
+        summary.write_text(SOCWATCH_SUMMARY + PCIE_SUMMARY)
+        reads = []
+        read_index = socwatch_index.readSummaryIndex
+        monkeypatch.setattr(socwatch_index, "readSummaryIndex", lambda path: reads.append(path) or read_index(path))
+
+        context = parse_context.ParseContext()
+        socwatch_obj, pcie_obj = socwatch_summary_parser.parseSocwatchAndPCIe(str(summary), SOCWATCH_TARGETS, PCIE_TARGETS, context)
+        assert reads == [str(summary)]
+        assert [table["label"] for table in socwatch_obj["socwatch_tables"]] == ["CPU_model", "S0ix_Substate", "ACPI_Cstate"]
+        assert [table["label"] for table in pcie_obj["pcie_socwatch_tables"]] == ["PCIe_LPM", "PCIe_LTRsnoop"]
+        assert "PCIe_LPM" in context.pcie_socwatch_header_dict
+
+
+# ===========================================================================
+# parsers/socwatch_summary_parser.py  (CPU P-state tables)
+# ===========================================================================
+
+CPU_PSTATE_TABLE = [
+    ["P-State", "Frequency (MHz)", "CPU/Package_0/Core_0 (%)", "CPU/Package_0/Core_1 (%)", "CPU/Package_0/Core_2 (%)", "CPU/Package_0/Core_0 (msec)"],
+    ["P0", "0", "10.5", "20", "30.25", "5"],
+    ["P1", "<= 400", "1.25", "2.5", "3", "5"],
+    ["P2", "401 -- 500", "2.1", "0.2", "1", "5"],
+    ["P3", "501 -- 600", "0.2", "0.1", "0.003", "5"],
+]
+CPU_CORE_TYPES = {"Core_0 (%)": "P", "Core_1 (%)": "E", "Core_2 (%)": "E"}
+
+
+class TestCpuPstateTables:
+    def _parse(self, target, tdic):
+        table = {"label": "CPU_Pstate", "table_data": [row[:] for row in CPU_PSTATE_TABLE]}
+        socwatch_summary_parser.socwatchTableTypeChecker(table, CPU_CORE_TYPES, target, tdic)
+        return table
+
+    def test_residency_averaged_per_core_type(self):
+        table = self._parse({"key": "CPU_Pstate"}, "wl.csv")
+        assert table["table_data"] == {
+            "P P-State": "P", "P 0-idle": 10.5, "P <= 400": 1.25, "P 401-500": 2.1, "P 501-600": 0.2,
+            "E P-State": "E", "E 0-idle": 25.12, "E <= 400": 2.75, "E 401-500": 0.6, "E 501-600": 0.05,
+        }
+
+    def test_per_core_table_loaded_as_matrix(self):
+        table = {"label": "CPU_Pstate", "table_data": [row[:] for row in CPU_PSTATE_TABLE]}
+        keys, residency, valid = socwatch_summary_parser.coreFreqPerCoreResidencyTable(table, CPU_CORE_TYPES)
+        # frequency bins x cores, the table keeps the cells as read for the flattener
+        assert keys == ["0-idle", "<= 400", "401-500", "501-600"] and valid.all()
+        assert residency.shape == (4, 3) and residency[2].tolist() == [2.1, 0.2, 1.0]
+        assert table["table_data"]["401-500"] == ["2.1", "0.2", "1"]
+
+    def test_per_core_buckets(self):
+        table = self._parse({"key": "CPU_Pstate", "buckets": ["400", "401-600", "601-900"]}, {"data_summary_type": "expanded"})
+        assert table["bucketized_data"] == {
+            "P-State": ["Core_0 (%) P", "Core_1 (%) E", "Core_2 (%) E"],
+            "400": [1.25, 2.5, 3.0],
+            "401-600": [2.3, 0.3, 1.003],
+            "601-900": 0,
+        }
+
+    def test_straddling_range_split_proportionally(self):
+        table = self._parse({"key": "CPU_Pstate", "buckets": ["401-450", "451-5000"]}, {"data_summary_type": "expanded"})
+        # 401-500 is half in each bucket, 0 (idle) and <= 400 are in none
+        assert table["bucketized_data"]["401-450"] == [1.05, 0.1, 0.5]
+        assert table["bucketized_data"]["451-5000"] == [1.25, 0.2, 0.503]
+
+    def test_buckets_per_core_type(self):
+        table = self._parse({"key": "CPU_Pstate", "buckets": ["400", "401-600"]}, "wl.csv")
+        assert table["bucketized_data"] == {
+            "P P-State": "P", "P 400": 1.25, "P 401-600": 2.3,
+            "E P-State": "E", "E 400": 2.75, "E 401-600": 0.65,
+        }
+
+
+# ===========================================================================
+# parsers/bucket_spec.py
+# ===========================================================================
+
+NPU_BUCKETS = ["0", "1900", "1901-2900", "2901-3899", "3900"]
+
+
+class TestBucketSpec:
+    def test_keys_found_by_interval(self):
+        spec = bucket_spec.compileBuckets(NPU_BUCKETS)
+        bucketized = spec.bucketize([("0", 10), ("800", 4), ("1900", 20), ("2400", "30"), ("3900", 5), ("4200", 1)])
+        # 800 is in no bucket, the last one takes everything above 3900
+        assert bucketized == {"0": 10.0, "1900": 20.0, "1901-2900": 30.0, "2901-3899": 0, "3900": 6.0}
+
+    def test_weight_matrix_splits_straddling_keys(self):
+        spec = bucket_spec.compileBuckets(NPU_BUCKETS)
+        weights, unknown_keys = spec.weights(["2851 -- 2950", "1900", "idle"])
+        # buckets x keys, 2851-2950 is half in 1901-2900 and half in 2901-3899
+        assert weights.tolist() == [[0, 0, 0], [0, 1, 0], [0.5, 0, 0], [0.5, 0, 0], [0, 0, 0]]
+        assert unknown_keys == ["idle"]
+        bucketized = spec.bucketize([("2851 -- 2950", ["10", "-"]), ("1900", ["1.5", "2"]), ("2851 -- 2950", ["4", "6"])])
+        # a per-core row holding a value that is not a number is left out
+        assert bucketized == {"0": 0, "1900": [1.5, 2.0], "1901-2900": [2.0, 3.0], "2901-3899": [2.0, 3.0], "3900": 0}
+
+    def test_compiled_once_per_bucket_list(self):
+        assert bucket_spec.compileBuckets(list(NPU_BUCKETS)) is bucket_spec.compileBuckets(tuple(NPU_BUCKETS))
+
+    def test_malformed_buckets_fail_at_config_load(self):
+        with pytest.raises(ValueError):
+            bucket_spec.compileTargets([{"key": "NoC_Pstate", "buckets": ["400", "300-500"]}])
+        with pytest.raises(ValueError):
+            bucket_spec.compileTargets([{"key": "NoC_Pstate", "buckets": ["1-2-3"]}])
+
+
+# ===========================================================================
+# parsers/power_trace_parser.py  (tail of a pacs trace)
+# ===========================================================================
+
+def _write_trace(path, row_num, line_end="\n", trailing=True):
+    lines = ["Time,P_SOC,P_VCCCORE"] + [f"{idx},{idx / 10},{idx % 7}" for idx in range(row_num)]
+    path.write_bytes(b"\xef\xbb\xbf" + (line_end.join(lines) + (line_end if trailing else "")).encode())
+    return [line.split(",") for line in lines[1:]]
+
+
+class TestReadTraceTail:
+    @pytest.mark.parametrize("line_end,trailing", [("\n", True), ("\r\n", True), ("\n", False)])
+    def test_tail_rows_indexed_like_all_rows(self, tmp_path, monkeypatch, line_end, trailing):
+        monkeypatch.setattr(power_trace_parser, "TAIL_BLOCK_SIZE", 16)
+        all_rows = _write_trace(tmp_path / "trace-100.csv", 500, line_end, trailing)
+        header, rows = power_trace_parser.readTraceTail(str(tmp_path / "trace-100.csv"), 40)
+        assert header == ["Time", "P_SOC", "P_VCCCORE"]
+        assert len(rows) == 500 and len(rows.rows) == 40
+        assert rows[499] == all_rows[499] and rows[460] == all_rows[460] and rows[-1] == all_rows[-1]
+        assert rows[470:480] == all_rows[470:480]
+        with pytest.raises(IndexError):
+            rows[459]
+
+    def test_short_trace_read_whole(self, tmp_path):
+        all_rows = _write_trace(tmp_path / "trace-100.csv", 30)
+        header, rows = power_trace_parser.readTraceTail(str(tmp_path / "trace-100.csv"), 40)
+        assert len(rows) == 30
+        assert rows[-5] == all_rows[-5] and rows[-50:10] == all_rows[-50:10]
+
+    def test_float_columns_of_the_tail(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(power_trace_parser, "TAIL_BLOCK_SIZE", 16)
+        all_rows = _write_trace(tmp_path / "trace-100.csv", 500)
+        header, rows = power_trace_parser.readTraceTail(str(tmp_path / "trace-100.csv"), 40)
+        power = rows.floatColumns([-1, 1])
+        assert power.shape == (40, 2)
+        assert power[:, 0].tolist() == [float(row[-1]) for row in all_rows[460:]]
+        assert power[:, 1].tolist() == [float(row[1]) for row in all_rows[460:]]
+
+    def test_float_columns_fall_back_cell_by_cell(self, tmp_path):
+        (tmp_path / "trace-100.csv").write_text("Time,P_SOC\n0,1.5\n\n2,\"2.5\"\n3,-\n")
+        header, rows = power_trace_parser.readTraceTail(str(tmp_path / "trace-100.csv"), 40)
+        power = rows.floatColumns([1])
+        assert power.shape == (4, 1) and power[0, 0] == 1.5 and power[2, 0] == 2.5
+        assert np.isnan(power[1, 0]) and np.isnan(power[3, 0])
+
+
+class TestSurgeDetector:
+    def test_surge_found_at_step_start(self):
+        # reversed power: idle for 40 samples, then the surge
+        power = np.array([0.5] * 40 + [6.0] * 30)
+        assert power_trace_parser.getInferencingStartReversed(power, ["P_VCCCORE", 2.3, 3], "f") == 40
+
+    def test_no_surge(self, capsys):
+        power = [f"{0.5 + idx % 3 / 10}" for idx in range(60)]
+        assert power_trace_parser.getInferencingStartReversed(power, ["P_VCCCORE", 2.3, 3], "f") is None
+        assert "not found" in capsys.readouterr().out
+
+    def test_rails_averaged_from_rows_or_array(self):
+        target_obj = {"P_SOC": 1, "P_VCCCORE": 2, "Run Time": -1}
+        csv_list = [["0", "1.1", "2.0"], ["1", "1.2", "4.0"], ["2", "1.3", "6.5"]]
+        expected = {"P_SOC": 1.2, "P_VCCCORE": 4.167, "Run Time": 0.3, "Energy (J)": 0.36, "Eng(J)/Token": 0.036}
+        assert power_trace_parser.getAveragePowerByRails(csv_list, 100, target_obj, 10, "P_SOC") == expected
+        power = np.array([[float(row[1]), float(row[2])] for row in csv_list])
+        assert power_trace_parser.getAveragePowerByRails(power, 100, target_obj, 10, "P_SOC") == expected
+
+
+# ===========================================================================
+# parsers/change_point.py
+# ===========================================================================
+
+
+def _reversed_power(surge_at, length=3000, seed=0):
+    # idle after inferencing, then the inferencing itself (the trace read backwards)
+    rng = np.random.default_rng(seed)
+    power = rng.uniform(0.4, 0.9, length)
+    power[surge_at:] = rng.uniform(5.0, 9.0, length - surge_at)
+    return power
+
+
+class TestChangePoint:
+    @pytest.mark.parametrize("name", ["slope", "cusum", "zscore"])
+    def test_detectors_find_the_surge(self, name):
+        detector = change_point.makeDetector(name)
+        assert abs(detector.detect(_reversed_power(2043), 1.0) - 2043) < 10
+        assert detector.detect(_reversed_power(3000), 1.0) is None
+
+    def test_slope_detector_is_the_default_rule(self):
+        power = _reversed_power(1500, seed=3)
+        rail, detector = change_point.detectionFor({}, "CPU", {"PCORE_POWER_RAIL_NAME": "P_VCCCORE"})
+        assert rail == "P_VCCCORE" and detector.settings() == [2.3, 3]
+        assert detector.detect(power) == power_trace_parser.getInferencingStartReversed(list(power) + [0.0], ["P_VCCCORE", 2.3, 3], "f")
+
+    def test_detection_per_device(self):
+        detection = {"GPU": {"rail": "GT_POWER_RAIL_NAME", "detector": "cusum", "cusum": {"threshold": 40}},
+                     "default": {"rail": "P_SOC", "detector": "zscore"}}
+        picks = {"GT_POWER_RAIL_NAME": "P_VCCGT"}
+        rail, detector = change_point.detectionFor(detection, "GPU.0", picks)
+        assert rail == "P_VCCGT" and detector.name == "cusum" and detector.threshold == 40
+        rail, detector = change_point.detectionFor(detection, "NPU", picks)
+        assert rail == "P_SOC" and detector.name == "zscore"
+
+    @pytest.mark.parametrize("entry", [{"detector": "pelt"}, {"cusum": {"treshold": 4}}])
+    def test_bad_detection_fails_at_config_load(self, entry):
+        with pytest.raises(ValueError):
+            change_point.configDetection({"inference_detection": {"CPU": entry}})
+
+
+# ===========================================================================
+# parsers/trace_cache.py
+# ===========================================================================
+
+class TestTraceCache:
+    def test_columns_as_parsed_from_the_csv(self, tmp_path):
+        path = tmp_path / "run_pacs-traces-100sr.csv"
+        all_rows = _write_trace(path, 500)
+        cache_path = trace_cache.convertTrace(str(path))
+        assert file_classifier.classify(Path(cache_path).name) == file_classifier.TAG_UNCLASSIFIED
+        cache = trace_cache.openTraceCache(str(path))
+        assert cache.header == ["Time", "P_SOC", "P_VCCCORE"] and len(cache) == 500
+        assert cache.column(1).tolist() == [float(row[1]) for row in all_rows]
+        # integer literals stay integers, as pandas reads them
+        assert cache.column(0).dtype == np.int64 and cache.column(-1).tolist() == [int(row[2]) for row in all_rows]
+
+    def test_changed_trace_is_read_from_csv(self, tmp_path):
+        path = tmp_path / "run_pacs-traces-100sr.csv"
+        _write_trace(path, 50)
+        trace_cache.convertTrace(str(path))
+        _write_trace(path, 60)
+        assert trace_cache.openTraceCache(str(path)) is None
+        assert len(trace_cache.traceColumns(str(path), ["P_SOC"])["P_SOC"]) == 60
+
+    def test_text_column_is_not_cached(self, tmp_path):
+        path = tmp_path / "run_pacs-traces-100sr.csv"
+        path.write_text("Time,P_SOC,Note\n0.0,1.5,a\n0.01,2.5,\n")
+        trace_cache.convertTrace(str(path))
+        cache = trace_cache.openTraceCache(str(path))
+        assert cache.numeric(1) and not cache.numeric(2)
+        header, rows = power_trace_parser.readTraceWindow(str(path), 10)
+        assert rows.floatColumns([1]).tolist() == [[1.5], [2.5]]
+        assert np.isnan(rows.floatColumns([1, 2])).tolist() == [[False, True], [False, True]]
+
+    def test_text_column_in_a_small_trace(self, tmp_path):
+        # the whole trace fits one tail block, the CSV tail read for the text column holds every row
+        path = tmp_path / "run_pacs-traces-100sr.csv"
+        all_rows = _write_trace(path, 2000)
+        lines = path.read_bytes().split(b"\n")
+        lines[5] = lines[5].rsplit(b",", 1)[0] + b",-"
+        path.write_bytes(b"\n".join(lines))
+        header, csv_rows = power_trace_parser.readTraceWindow(str(path), 900)
+        trace_cache.convertTrace(str(path))
+        cached_header, cached_rows = power_trace_parser.readTraceWindow(str(path), 900)
+        assert isinstance(cached_rows, power_trace_parser.CachedTail) and not trace_cache.openTraceCache(str(path)).numeric(-1)
+        assert cached_rows[-1] == all_rows[-1] and cached_rows[1100] == all_rows[1100]
+        # the CSV reader keeps every row of a trace that small
+        power = cached_rows.floatColumns([1, -1])
+        assert power.shape == (900, 2) and power.tolist() == csv_rows.floatColumns([1, -1])[-900:].tolist()
+
+    def test_window_read_like_the_csv_tail(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(power_trace_parser, "TAIL_BLOCK_SIZE", 16)
+        path = tmp_path / "run_pacs-traces-100sr.csv"
+        _write_trace(path, 500, "\r\n")
+        header, csv_rows = power_trace_parser.readTraceWindow(str(path), 40)
+        trace_cache.convertTrace(str(path))
+        cached_header, cached_rows = power_trace_parser.readTraceWindow(str(path), 40)
+        assert isinstance(cached_rows, power_trace_parser.CachedTail) and cached_header == header
+        assert (len(cached_rows), cached_rows.first_row) == (len(csv_rows), csv_rows.first_row)
+        assert cached_rows.floatColumns([-1, 1]).tolist() == csv_rows.floatColumns([-1, 1]).tolist()
+        assert cached_rows[470:480] == csv_rows[470:480]
+
+
+# ===========================================================================
+# trace_power_slicer.py
+# ===========================================================================
+
+def _slicer_trace(times):
+    rng = np.random.default_rng(3)
+    return pd.DataFrame({"Time": np.asarray(times, dtype=float), "P_SOC": rng.uniform(0, 9, len(times)),
+                         "P_INT": rng.integers(0, 20, len(times))})
+
+
+class TestSliceTrace:
+    RANGES = [{"start": 0, "end": 50, "name": "a"}, {"start": 35, "end": 35, "name": "b"},
+              {"start": 900, "end": 1000, "name": "empty"}, {"start": 120, "end": 3000, "name": "c"}]
+
+    def _slice(self, df, capsys):
+        slices = trace_power_slicer.slice_trace(df, ["P_SOC", "P_INT", "P_NONE"], self.RANGES)
+        capsys.readouterr()
+        return slices
+
+    def test_ranges_are_views_with_pandas_statistics(self, capsys):
+        df = _slicer_trace(np.arange(0, 200, 5))
+        slices = self._slice(df, capsys)
+        assert [s.time_range["name"] for s in slices] == ["a", "b", "c"]
+        for trace_slice in slices:
+            tr = trace_slice.time_range
+            expected = df[(df["Time"] >= tr["start"]) & (df["Time"] <= tr["end"])]
+            assert trace_slice.data.index.tolist() == expected.index.tolist()
+            assert np.shares_memory(trace_slice.data["P_SOC"].to_numpy(), df["P_SOC"].to_numpy())
+            for rail in ["P_SOC", "P_INT"]:
+                assert trace_slice.stats.loc["Average", rail] == expected[rail].mean()
+                assert trace_slice.stats.loc["Peak", rail] == expected[rail].max()
+                assert trace_slice.stats.loc["Min", rail] == expected[rail].min()
+                assert trace_slice.stats.loc["P95", rail] == np.percentile(expected[rail], 95)
+            # 5 ms per sample
+            assert trace_slice.stats.loc["Energy (J)", "P_SOC"] == pytest.approx(expected["P_SOC"].sum() * 0.005)
+
+    def test_unsorted_trace_keeps_file_order(self, capsys):
+        df = _slicer_trace([0, 10, 40, 30, 20, 50, 130])
+        slices = self._slice(df, capsys)
+        assert slices[0].data["Time"].tolist() == [0, 10, 40, 30, 20, 50]
+        assert slices[0].stats.loc["Average", "P_SOC"] == df["P_SOC"][:6].mean()
+
+    def test_missing_samples_are_skipped(self, capsys):
+        df = _slicer_trace(np.arange(0, 200, 5))
+        df.loc[2, "P_SOC"] = np.nan
+        df.loc[7:, "P_INT"] = np.nan
+        slices = self._slice(df, capsys)
+        assert slices[0].stats.loc["Average", "P_SOC"] == df["P_SOC"][:11].mean()
+        assert np.isnan(slices[1].stats.loc["Average", "P_INT"])
+        assert trace_power_slicer.summary_rows(slices[1])[1][2] == ""
+
+    def test_saved_slice_layout(self, tmp_path, capsys):
+        df = _slicer_trace(np.arange(0, 200, 5))
+        slices = self._slice(df, capsys)
+        trace_power_slicer.save_slices(slices[:1], str(tmp_path), "run")
+        with open(tmp_path / "000_run_a_0ms_50ms.csv", newline="") as f:
+            rows = list(csv.reader(f))
+        assert rows[0] == ["Power Rail Name", "P_SOC", "P_INT"] and rows[3] == ["Time", "P_SOC", "P_INT"]
+        assert rows[1] == ["Average", str(df["P_SOC"][:11].mean()), str(df["P_INT"][:11].mean())]
+        assert rows[2] == ["Peak", str(df["P_SOC"][:11].max()), str(df["P_INT"][:11].max())]
+        assert len(rows) == 4 + 11
+
+    def test_streamed_slices_match_loaded_ones(self, tmp_path, capsys):
+        df = _slicer_trace(np.arange(0, 200, 5) / 1000)
+        trace = tmp_path / "run_pacs-traces-200sr.csv"
+        df.to_csv(trace, index=False)
+        df["Time"] = df["Time"] * 1000
+        loaded = self._slice(df, capsys)
+        trace_power_slicer.save_slices(loaded, str(tmp_path / "loaded"), "run")
+        streamed = trace_power_slicer.stream_slices(str(trace), ["P_SOC", "P_INT", "P_NONE"], self.RANGES,
+                                                    str(tmp_path / "streamed"), "run", chunk_rows=7)
+        capsys.readouterr()
+        assert sorted(p.name for p in (tmp_path / "streamed").iterdir()) == sorted(p.name for p in (tmp_path / "loaded").iterdir())
+        for idx, (loaded_slice, streamed_slice) in enumerate(zip(loaded, streamed)):
+            assert streamed_slice.samples == loaded_slice.samples
+            # percentiles are estimated when streamed
+            exact = ["Average", "Peak", "Min", "Energy (J)"]
+            assert streamed_slice.stats.columns.tolist() == loaded_slice.stats.columns.tolist()
+            assert np.allclose(streamed_slice.stats.loc[exact].to_numpy(), loaded_slice.stats.loc[exact].to_numpy(), rtol=1e-12, atol=0)
+            name = trace_power_slicer.slice_filename(idx, "run", loaded_slice.time_range)
+            loaded_lines = (tmp_path / "loaded" / name).read_text().splitlines()
+            streamed_lines = (tmp_path / "streamed" / name).read_text().splitlines()
+            assert streamed_lines[2:] == loaded_lines[2:]
+
+    @pytest.mark.parametrize("stream", [False, True])
+    def test_csv_values_parsed_round_trip(self, tmp_path, capsys, stream):
+        # pandas' default float parser reads this as 0.2206996847448419, one unit off in the last digit
+        trace = tmp_path / "run_pacs-traces-200sr.csv"
+        trace.write_text("Time,P_SOC\n0,0.22069968474484192\n0.005,0.5\n")
+        ranges = [{"start": 0, "end": 5, "name": "a"}]
+        if stream:
+            trace_power_slicer.stream_slices(str(trace), ["P_SOC"], ranges, str(tmp_path), "run", chunk_rows=7)
+        else:
+            df = trace_power_slicer.load_trace_file(str(trace), ["P_SOC"])
+            assert df["P_SOC"][0] == float("0.22069968474484192")
+            trace_power_slicer.save_slices(trace_power_slicer.slice_trace(df, ["P_SOC"], ranges), str(tmp_path), "run")
+        capsys.readouterr()
+        lines = (tmp_path / "000_run_a_0ms_5ms.csv").read_text().splitlines()
+        assert lines[2] == "Peak,0.5" and lines[4] == "0.0,0.22069968474484192"
+
+    def test_short_streamed_slices_have_exact_percentiles(self, tmp_path, capsys):
+        df = _slicer_trace(np.arange(0, 1000, 5) / 1000)
+        trace = tmp_path / "run_pacs-traces-200sr.csv"
+        df.to_csv(trace, index=False)
+        df["Time"] = df["Time"] * 1000
+        # 31 samples across two chunks, and a range longer than a chunk
+        ranges = [{"start": 300, "end": 450, "name": "short"}, {"start": 0, "end": 995, "name": "long"}]
+        loaded = trace_power_slicer.slice_trace(df, ["P_SOC", "P_INT"], ranges)
+        streamed = trace_power_slicer.stream_slices(str(trace), ["P_SOC", "P_INT"], ranges, str(tmp_path / "out"), "run", chunk_rows=64)
+        capsys.readouterr()
+        percentiles = ["P50", "P95", "P99"]
+        assert streamed[0].samples == 31
+        assert streamed[0].stats.loc[percentiles].equals(loaded[0].stats.loc[percentiles])
+        # more samples than a chunk, estimated from the histogram
+        assert not streamed[1].stats.loc[percentiles].equals(loaded[1].stats.loc[percentiles])
+
+    def test_histogram_takes_lower_samples(self):
+        rng = np.random.default_rng(1)
+        values = rng.normal(0.5, 2, 5000)
+        histogram = trace_power_slicer.RailHistogram()
+        for chunk in np.array_split(np.sort(values)[::-1], 10):
+            histogram.add(chunk)
+        assert histogram.counts.sum() == len(values)
+        for q in trace_power_slicer.PERCENTILES:
+            estimate = histogram.percentile(q, values.min(), values.max())
+            assert abs(estimate - np.percentile(values, q)) <= histogram.width
+
+    def test_batch_summary_has_a_column_per_run_and_range(self, tmp_path, capsys):
+        pytest.importorskip("openpyxl")
+        import openpyxl
+        for run in ["it1", "it2"]:
+            (tmp_path / "runs" / run).mkdir(parents=True)
+            _slicer_trace(np.arange(0, 200, 5) / 1000).to_csv(tmp_path / "runs" / run / "run_pacs-traces-200sr.csv", index=False)
+        (tmp_path / "runs" / "notes.csv").write_text("Time\n")
+        runs = trace_power_slicer.batch_slice(str(tmp_path / "runs"), ["P_SOC", "P_INT"], self.RANGES, str(tmp_path / "out"), jobs=1)
+        capsys.readouterr()
+        assert [name for name, slices in runs] == ["it1_run_pacs-traces-200sr", "it2_run_pacs-traces-200sr"]
+        assert len(list((tmp_path / "out" / "it2_run_pacs-traces-200sr").iterdir())) == 3
+        rows = list(openpyxl.load_workbook(tmp_path / "out" / trace_power_slicer.BATCH_SUMMARY)["Power_Summary"].values)
+        assert rows[0] == ("Run",) + ("it1_run_pacs-traces-200sr",) * 3 + ("it2_run_pacs-traces-200sr",) * 3
+        assert rows[1] == ("Power Rail", "a", "b", "c", "a", "b", "c")
+        assert rows[2][1] == pytest.approx(runs[0][1][0].stats.loc["Average", "P_SOC"])
+
+    @pytest.mark.parametrize("stream", [False, True])
+    def test_npz_holds_every_slice_and_its_range(self, tmp_path, capsys, stream):
+        df = _slicer_trace(np.arange(0, 200, 5) / 1000)
+        trace = tmp_path / "run_pacs-traces-200sr.csv"
+        df.to_csv(trace, index=False)
+        if stream:
+            slices = trace_power_slicer.stream_slices(str(trace), ["P_SOC", "P_INT"], self.RANGES, str(tmp_path / "out"),
+                                                      "run", chunk_rows=7, output_format="npz")
+        else:
+            slices = trace_power_slicer.slice_trace(trace_power_slicer.load_trace_file(str(trace), ["P_SOC", "P_INT"]),
+                                                    ["P_SOC", "P_INT"], self.RANGES)
+            trace_power_slicer.save_output(slices, str(tmp_path / "out"), "run", "npz")
+        capsys.readouterr()
+        assert [p.name for p in (tmp_path / "out").iterdir()] == ["run_slices.npz"]
+        with np.load(tmp_path / "out" / "run_slices.npz") as npz:
+            metadata = json.loads(str(npz["metadata"]))
+            assert sorted(npz.files) == ["metadata", "slice_000", "slice_001", "slice_002"]
+            assert [(m["name"], m["start"], m["end"]) for m in metadata] == [("a", 0, 50), ("b", 35, 35), ("c", 120, 3000)]
+            assert metadata[2]["columns"] == ["Time", "P_SOC", "P_INT"]
+            assert metadata[2]["statistics"]["Peak"] == slices[2].stats.loc["Peak"].tolist()
+            expected = df[df["Time"] >= 0.12].to_numpy(dtype=np.float64) * [1000, 1, 1]
+            assert npz["slice_002"].dtype == np.float64 and np.array_equal(npz["slice_002"], expected)
+
+    def test_parquet_needs_pyarrow(self, tmp_path, capsys, monkeypatch):
+        monkeypatch.setattr(trace_power_slicer, "pq", None)
+        slices = self._slice(_slicer_trace(np.arange(0, 200, 5)), capsys)
+        with pytest.raises(ValueError):
+            trace_power_slicer.save_output(slices, str(tmp_path), "run", "parquet")
@@ -0,0 +1,65 @@
+"""
+Micro-benchmark of the file classifier (parsers/file_classifier.py), in files per second.
+
+    python -m tools.bench_file_classifier                      # synthetic campaign file names
+    python -m tools.bench_file_classifier --manifest <file>    # file names of a crawl manifest
+    python -m tools.bench_file_classifier -c config\\PTL_default.config   # include config rules
+"""
+
+import time
+import json
+import argparse
+from collections import Counter
+import parsers.file_classifier as fcl
+import parsers.manifest as mnf
+
+
+# what a typical run folder holds, most names are not parsed at all
+SYNTHETIC_NAMES = [
+    "pacs-summary.csv", "pacs-traces_sr.csv", "hopper-results.json", "vpt_output.log",
+    "wl_hwSession.etl", "wl_osSession.etl", "wl_Session.etl", "wl_summary.csv", "wl.csv",
+    "trace.etl", "xPU_Model_PSD1_v0_a_qdq_proxy_w8a16_output.txt",
+    "NPU_llama-3.1-8b-instruct-npu-ov_2026-01-15_18-17-57.txt", "socwatch_regular_wl.csv",
+    "socwatch_minimal_wl.csv", "1h_bl_result.xml", "run.procyon-result", ".PASS",
+    "screenshot_0001.png", "console.log", "sysinfo.txt", "MSTeams_diag.log", "readme.md",
+]
+
+
+def main() :
+    parser = argparse.ArgumentParser(prog='file classifier benchmark')
+    parser.add_argument('--manifest', help='crawl manifest, classify its file names instead of the synthetic set')
+    parser.add_argument('-c', '--config', help='config json, its file_classifier_rules are compiled in as well')
+    parser.add_argument('-n', '--repeat', type=int, default=200000, help='number of file names to classify')
+    args = parser.parse_args()
+
+    rules = None
+    if args.config is not None :
+        with open(args.config, "r") as config_file:
+            rules = fcl.configRules(json.load(config_file))
+
+    if args.manifest is not None :
+        manifest = mnf.readManifest(args.manifest)
+        names = [entry[0] for entries in manifest["folders"].values() for entry in entries if entry[1] == "f"]
+    else :
+        names = SYNTHETIC_NAMES
+    if not names :
+        print("no file names to classify")
+        return
+    names = (names * (args.repeat // len(names) + 1))[:args.repeat]
+
+    start = time.perf_counter()
+    classifier = fcl.FileClassifier(rules)
+    compile_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    tags = Counter(classifier.classify(f) for f in names)
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(classifier.rules)} rules compiled in {compile_time * 1000:.2f} ms")
+    print(f"{len(names)} files classified in {elapsed:.3f} s : {len(names) / elapsed:,.0f} files/s")
+    for tag, count in tags.most_common() :
+        print(f"    {tag:<20} {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark of the inferencing window detection (parsers/power_trace_parser.py) on a synthetic 1 kHz pacs trace.
+
+    python -m tools.bench_surge_detector                     # 10 minute trace, 8 s inferencing at the end
+    python -m tools.bench_surge_detector --minutes 30 -d 20  # longer trace and inferencing
+"""
+
+import io
+import os
+import time
+import contextlib
+import random
+import tempfile
+import argparse
+import parsers.power_trace_parser as ptp
+
+
+RAILS = ["P_SOC", "P_VCCCORE", "P_VCCGT", "P_VCCSA", "P_SOC+MEMORY"]
+
+
+def writeSyntheticTrace(path, row_num, infer_row_num, tail_row_num) :
+    # idle rails, then P_VCCCORE surging for infer_row_num rows, then tail_row_num idle rows to the end
+    rng = random.Random(0)
+    surge_start = row_num - tail_row_num - infer_row_num
+    with open(path, "w", newline="") as trace_file :
+        trace_file.write(",".join(["Time (ms)"] + RAILS) + "\n")
+        for idx in range(row_num) :
+            core = rng.uniform(5.0, 9.0) if surge_start <= idx < surge_start + infer_row_num else rng.uniform(0.4, 0.9)
+            trace_file.write(f"{idx},{rng.uniform(1.0, 3.0):.4f},{core:.4f},{rng.uniform(0.1, 0.5):.4f},{rng.uniform(0.1, 0.3):.4f},{rng.uniform(2.0, 4.0):.4f}\n")
+    return surge_start
+
+
+def timed(function, repeat) :
+    best = None
+    for _ in range(repeat) :
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main() :
+    parser = argparse.ArgumentParser(prog='surge detector benchmark')
+    parser.add_argument('--minutes', type=float, default=10, help='length of the synthetic trace')
+    parser.add_argument('-d', '--duration', type=float, default=8, help='inferencing duration in seconds')
+    parser.add_argument('-n', '--repeat', type=int, default=5, help='runs per measurement, the best one is shown')
+    args = parser.parse_args()
+
+    sampling_rate = 1000
+    time_scale = 1000 / sampling_rate
+    infer_duration = args.duration * 1000
+    row_num = int(args.minutes * 60 * sampling_rate)
+    infer_row_num = round(infer_duration / time_scale)
+
+    with tempfile.TemporaryDirectory() as tmp_dir :
+        path = os.path.join(tmp_dir, f"bench_pacs-traces-{sampling_rate}.csv")
+        surge_start = writeSyntheticTrace(path, row_num, infer_row_num, 2 * sampling_rate)
+        print(f"synthetic trace: {row_num} rows at {sampling_rate} Hz ({os.path.getsize(path) / 2**20:.1f} MB), inferencing {args.duration} s from row {surge_start}")
+
+        picks = {"SOC_POWER_RAIL_NAME": "P_SOC", "PCORE_POWER_RAIL_NAME": "P_VCCCORE"}
+        daq_target = {rail: -1 for rail in RAILS}
+        daq_target["Run Time"] = -1
+
+        def wholeFile() :
+            block = {"power_obj": {}, "trace_obj": {"file_path": path},
+                     "model_output_obj": {"model_output_status": "successful",
+                                          "model_output_data": {"duration": [args.duration, "s"], "device": ["CPU"], "total_token_gen": [1000]}}}
+            with contextlib.redirect_stdout(io.StringIO()) :
+                ptp.averageInferencingPower([block], daq_target, picks)
+            return block["trace_obj"]
+
+        trace_obj, whole_time = timed(wholeFile, args.repeat)
+
+        header, rows = ptp.readTraceTail(path, row_num)
+        target_obj = ptp.getTargetedRailIndexObject(header, daq_target)
+        rails = ptp.averagedRails(target_obj)
+        power = rows.floatColumns([target_obj["P_VCCCORE"]] + [target_obj[rail] for rail in rails])
+        reversed_power = ptp.getReversedPower(power[:, 0], rows.first_row, len(rows), infer_duration, time_scale)
+        window = power[trace_obj["inf_start"]:trace_obj["inf_end"], 1:]
+        _, detect_time = timed(lambda: ptp.getInferencingStartReversed(reversed_power, ["P_VCCCORE", 2.3, 3], path), args.repeat * 20)
+        _, average_time = timed(lambda: ptp.getAveragePowerByRails(window, time_scale, target_obj, 1000, "P_SOC"), args.repeat * 20)
+
+    print(f"inf_start {trace_obj['inf_start']}, inf_end {trace_obj['inf_end']}")
+    print(f"averageInferencingPower (read + detect + average) : {whole_time * 1000:9.2f} ms")
+    print(f"getInferencingStartReversed ({len(reversed_power)} samples)  : {detect_time * 1000:9.3f} ms")
+    print(f"getAveragePowerByRails ({len(window)} rows x {len(RAILS)} rails) : {average_time * 1000:9.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Converts pacs traces (*pacs-traces*-NNNsr.csv) to the binary columns of parsers/trace_cache.py, written next
+to each trace as <trace name>.ptcol. ParseAll (inferencing only power), trace_power_slicer.py and
+trace_cache.traceColumns() read a converted trace from there instead of parsing the CSV again.
+
+    python -m tools.convert_traces <folder or trace> [...]     # every trace not converted yet (or changed since)
+    python -m tools.convert_traces <folder> --force -j 8       # convert them all again on 8 processes
+
+A .ptcol goes stale when its trace changes (size or modification time), the CSV is then read until it is
+converted again.
+"""
+
+import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import parsers.trace_cache as tcache
+
+
+def convertJob(trace_path) :
+    # (trace path, size in bytes, error), runs in a worker process
+    try :
+        tcache.convertTrace(trace_path)
+        return trace_path, os.path.getsize(trace_path), None
+    except (OSError, ValueError, UnicodeDecodeError) as e :
+        return trace_path, 0, f"{type(e).__name__}: {e}"
+
+
+def main() :
+    parser = argparse.ArgumentParser(prog='pacs trace converter')
+    parser.add_argument('paths', nargs='+', help='trace files, or folders searched (recursively) for pacs traces')
+    parser.add_argument('--force', action='store_true', help='convert traces again even if their .ptcol is up to date')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='worker processes, 0 uses every CPU core')
+    args = parser.parse_args()
+
+    traces = list()
+    for path in args.paths :
+        traces.extend(tcache.findTraces(path) if os.path.isdir(path) else [path])
+    pending = [path for path in traces if args.force or tcache.openTraceCache(path) is None]
+    print(f"{len(traces)} traces, {len(traces) - len(pending)} already converted")
+    if not pending :
+        return
+
+    workers = min(args.jobs if args.jobs > 0 else (os.cpu_count() or 1), len(pending))
+    start = time.perf_counter()
+    if workers == 1 :
+        results = [convertJob(path) for path in pending]
+    else :
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(convertJob, pending))
+    elapsed = time.perf_counter() - start
+
+    converted = 0
+    size = 0
+    for path, trace_size, error in results :
+        if error is None :
+            converted += 1
+            size += trace_size
+        else :
+            print(f"failed {path} : {error}")
+    print(f"{converted} traces converted in {elapsed:.2f} s ({size / 2**20 / elapsed:,.1f} MB/s of CSV)")
+
+
+if __name__ == "__main__":
+    main()
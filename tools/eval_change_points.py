@@ -0,0 +1,117 @@
+"""
+Runs every change point detector (parsers/change_point.py) over a folder of pacs traces and reports where
+each one puts the inferencing and how often they agree, to tune the "inference_detection" thresholds.
+
+    python -m tools.eval_change_points <folder>                          # P-core rail, default thresholds
+    python -m tools.eval_change_points <folder> -c config\\PTL_default.config --device GPU
+    python -m tools.eval_change_points <folder> --rail P_VCCSA -d 20 --csv detections.csv
+
+The detectors search the same window as ParseAll: the last inferencing duration (-d) plus TIME_BUFFER of
+every trace. Positions are reported in ms before the end of the trace.
+"""
+
+import os
+import csv
+import json
+import time
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import parsers.power_trace_parser as ptp
+import parsers.change_point as cpt
+import parsers.trace_cache as tcache
+
+
+def evaluateTrace(job) :
+    # (path, {detector: ms before the trace end or None}, error), runs in a worker process
+    path, rail, entry, infer_duration = job
+    try :
+        time_scale = 1000 / ptp.getSamplingRate(path)
+        header, rows = ptp.readTraceWindow(path, int((infer_duration + ptp.TIME_BUFFER) / time_scale) + 1)
+        power = rows.floatColumns([ptp.railColumn(header, {}, rail)])[:, 0]
+        target_power_reversed = ptp.getReversedPower(power, rows.first_row, len(rows), infer_duration, time_scale)
+        # the last sample is not part of any step, as in ParseAll
+        reversed_power = target_power_reversed[:len(target_power_reversed)-1]
+        found = dict()
+        for name, detector in cpt.entryDetectors(entry).items() :
+            idx = detector.detect(reversed_power, time_scale) if len(reversed_power) > 0 else None
+            found[name] = None if idx is None else idx * time_scale
+        return path, found, None
+    except (OSError, ValueError, KeyError, IndexError) as e :
+        return path, None, f"{type(e).__name__}: {e}"
+
+
+def agreeing(first, second, tolerance) :
+    # both missed the surge, or found it within tolerance ms of each other
+    if first is None or second is None :
+        return first is None and second is None
+    return abs(first - second) <= tolerance
+
+
+def main() :
+    parser = argparse.ArgumentParser(prog='change point detector evaluation')
+    parser.add_argument('folder', help='folder searched (recursively) for pacs traces')
+    parser.add_argument('-c', '--config', help='config json, its DAQ_target rail names and "inference_detection" section are used')
+    parser.add_argument('--device', default='CPU', help='device whose "inference_detection" entry gives the rail and thresholds')
+    parser.add_argument('--rail', help='rail to run the detectors on, instead of the one of the device entry')
+    parser.add_argument('-d', '--duration', type=float, default=10, help='inferencing duration in seconds, sets the searched window')
+    parser.add_argument('-t', '--tolerance', type=float, default=100, help='ms two detections can be apart and still agree')
+    parser.add_argument('-j', '--jobs', type=int, default=0, help='worker processes, 0 uses every CPU core')
+    parser.add_argument('--csv', help='write the position found by each detector for every trace to this csv')
+    args = parser.parse_args()
+
+    config = dict()
+    picks = dict()
+    if args.config is not None :
+        with open(args.config, "r") as config_file:
+            config = json.load(config_file)
+        if "DAQ_target" in config :
+            picks = {key: value for key, value in config["DAQ_target"].items() if key.endswith("_RAIL_NAME")}
+    entry = cpt.deviceEntry(cpt.configDetection(config), args.device)
+    rail = args.rail if args.rail is not None else cpt.entryRail(entry, picks or {"PCORE_POWER_RAIL_NAME":ptp.P_CORE})
+    detectors = list(cpt.entryDetectors(entry))
+
+    traces = tcache.findTraces(args.folder)
+    if not traces :
+        print(f"no pacs traces in {args.folder}")
+        return
+    jobs = [(path, rail, entry, args.duration * 1000) for path in traces]
+    workers = min(args.jobs if args.jobs > 0 else (os.cpu_count() or 1), len(jobs))
+
+    start = time.perf_counter()
+    if workers == 1 :
+        results = [evaluateTrace(job) for job in jobs]
+    else :
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(evaluateTrace, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+    elapsed = time.perf_counter() - start
+
+    evaluated = [(path, found) for path, found, error in results if error is None]
+    for path, found, error in results :
+        if error is not None :
+            print(f"skipped {path} : {error}")
+    print(f"{len(evaluated)} traces, rail {rail}, evaluated in {elapsed:.2f} s ({len(results) / elapsed:,.1f} traces/s, {workers} workers)")
+
+    for name in detectors :
+        positions = np.array([found[name] for _, found in evaluated if found[name] is not None])
+        median = f", median {np.median(positions):.0f} ms before the end" if len(positions) > 0 else ""
+        print(f"    {name:<8} found {len(positions)}/{len(evaluated)}{median}")
+    if evaluated :
+        print(f"agreement within {args.tolerance:g} ms :")
+        for first, second in itertools.combinations(detectors, 2) :
+            agreed = sum(agreeing(found[first], found[second], args.tolerance) for _, found in evaluated)
+            print(f"    {first:<8} {second:<8} {agreed}/{len(evaluated)} ({agreed / len(evaluated):.0%})")
+        agreed = sum(all(agreeing(found[first], found[second], args.tolerance) for first, second in itertools.combinations(detectors, 2)) for _, found in evaluated)
+        print(f"    all detectors     {agreed}/{len(evaluated)} ({agreed / len(evaluated):.0%})")
+
+    if args.csv is not None :
+        with open(args.csv, "w", newline="") as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(["trace"] + [f"{name} (ms before end)" for name in detectors])
+            for path, found in evaluated :
+                writer.writerow([path] + ["" if found[name] is None else found[name] for name in detectors])
+
+
+if __name__ == "__main__":
+    main()
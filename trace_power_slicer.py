@@ -7,16 +7,34 @@ Trace files have -NNNsr.csv suffix, where NNN is the sample rate.
 Time values in trace files are in seconds, but are converted to milliseconds for processing.
 """
 
+import numpy as np
 import pandas as pd
 import argparse
 import os
+import io
+import re
+import csv
+import glob
 import json
+import time
+import shutil
+import zipfile
+import warnings
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import List, Dict, Iterable, Iterator, NamedTuple, Optional, Tuple
+import parsers.trace_cache as trace_cache
 try:
     import openpyxl
 except ImportError:
     openpyxl = None
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
 
 
 def parse_sample_rate(filename: str) -> int:
@@ -29,9 +47,47 @@ def parse_sample_rate(filename: str) -> int:
     return 100  # default
 
 
-def load_trace_file(filepath: str) -> pd.DataFrame:
-    """Load the power trace CSV file and convert time to milliseconds"""
-    df = pd.read_csv(filepath)
+def rail_columns(header: List[str], power_rails: Optional[List[str]]) -> List[str]:
+    """Time column and the given power rails found in header, in file order. Every column when none is found."""
+    if power_rails is None:
+        return header
+    wanted = set(power_rails)
+    columns = header[:1] + [col for col in header[1:] if col in wanted]
+    # without any rail keep them all, slice_trace then lists what is available
+    return columns if len(columns) > 1 else header
+
+
+def load_cached_trace(filepath: str, power_rails: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+    """
+    Load the time column and the given power rails (every column if None) from the .ptcol
+    next to the trace (python -m tools.convert_traces). Only those columns are read from disk.
+
+    Returns None when the trace was not converted, or a wanted column is not numeric in it.
+    """
+    cache = trace_cache.openTraceCache(filepath)
+    if cache is None or len(set(cache.header)) != len(cache.header):
+        return None
+    columns = rail_columns(cache.header, power_rails)
+    indexes = [cache.header.index(col) for col in columns]
+    if not all(cache.numeric(idx) for idx in indexes):
+        return None
+    return pd.DataFrame({col: cache.column(idx) for col, idx in zip(columns, indexes)}, copy=False)
+
+
+def load_trace_file(filepath: str, power_rails: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Load the power trace and convert time to milliseconds.
+
+    With power_rails, only the time column and those rails are loaded (the rails that exist).
+    A converted trace is loaded from its .ptcol, otherwise the CSV is parsed.
+    """
+    df = load_cached_trace(filepath, power_rails)
+    if df is None:
+        usecols = None
+        if power_rails is not None:
+            usecols = rail_columns(pd.read_csv(filepath, nrows=0).columns.tolist(), power_rails)
+        # correctly rounded floats, the values a .ptcol holds
+        df = pd.read_csv(filepath, usecols=usecols, float_precision='round_trip')
     # Convert time from seconds to milliseconds
     time_col = df.columns[0]
     df[time_col] = df[time_col] * 1000
@@ -41,19 +97,91 @@ def load_trace_file(filepath: str) -> pd.DataFrame:
     return df
 
 
+class TraceSlice(NamedTuple):
+    """One time range of a trace: its rows and the statistics of every rail over them."""
+    data: pd.DataFrame          # time column and rails of the range, a view of the trace when it is sorted by time
+                                # (no rows when streamed, only the columns)
+    time_range: Dict
+    stats: pd.DataFrame         # a row per SLICE_STATISTICS name, a column per rail
+    samples: int                # rows of the range
+
+
+# statistics computed for every (range, rail), in the order of the rows of TraceSlice.stats
+SLICE_STATISTICS = ['Average', 'Peak', 'Min', 'P50', 'P95', 'P99', 'Energy (J)']
+PERCENTILES = [50, 95, 99]
+
+
+def range_bounds(times: np.ndarray, time_ranges: List[Dict]) -> Optional[np.ndarray]:
+    """
+    Rows of every time range, resolved at once on the time column.
+
+    Args:
+        times: Time column in milliseconds
+        time_ranges: List of dicts with 'start', 'end' keys in milliseconds, both included
+
+    Returns:
+        (len(time_ranges), 2) array of the first and past-the-last row of each range,
+        None when the time column is not sorted (or holds NaN)
+    """
+    if len(times) > 1 and not np.all(times[1:] >= times[:-1]):
+        return None
+    starts = np.array([tr['start'] for tr in time_ranges], dtype=np.float64)
+    ends = np.array([tr['end'] for tr in time_ranges], dtype=np.float64)
+    first = np.searchsorted(times, starts, side='left')
+    last = np.searchsorted(times, ends, side='right')
+    return np.column_stack((first, np.maximum(first, last)))
+
+
+def sample_period(times: np.ndarray) -> float:
+    """Median time between two samples in milliseconds (0 with less than two samples)."""
+    if len(times) < 2:
+        return 0.0
+    return float(np.median(np.diff(times)))
+
+
+def range_statistics(values: np.ndarray, period_ms: float) -> np.ndarray:
+    """
+    SLICE_STATISTICS of every rail over the rows of one range, reduced over all rails at once.
+
+    Args:
+        values: (rows, rails) float64 array, each rail contiguous (Fortran order)
+        period_ms: Time between two samples, for the energy
+
+    Returns:
+        (len(SLICE_STATISTICS), rails) array. NaN samples are skipped, as pandas does.
+    """
+    # summing a contiguous column matches pandas' mean to the last digit, and partitions run along it too
+    if not np.isnan(values).any():
+        sums = values.sum(axis=0)
+        return np.vstack((sums / len(values), values.max(axis=0), values.min(axis=0),
+                          np.percentile(values.T, PERCENTILES, axis=1), sums * period_ms / 1000))
+    with warnings.catch_warnings():
+        # a rail without any number in the range
+        warnings.simplefilter('ignore', RuntimeWarning)
+        sums = np.nansum(values, axis=0)
+        counts = np.count_nonzero(~np.isnan(values), axis=0)
+        return np.vstack((np.where(counts > 0, sums / np.maximum(counts, 1), np.nan),
+                          np.nanmax(values, axis=0), np.nanmin(values, axis=0),
+                          np.nanpercentile(values.T, PERCENTILES, axis=1),
+                          np.where(counts > 0, sums * period_ms / 1000, np.nan)))
+
+
 def slice_trace(df: pd.DataFrame, 
                 power_rails: List[str], 
-                time_ranges: List[Dict]) -> List[Tuple[pd.DataFrame, Dict]]:
+                time_ranges: List[Dict]) -> List[TraceSlice]:
     """
     Slice the trace file by power rails and time ranges.
-    
+
+    All ranges are looked up at once on the time column (sorted in a trace), so every slice is
+    a view of the trace rather than a copy, and its statistics are reduced over all rails together.
+
     Args:
         df: Input DataFrame (with time in milliseconds)
         power_rails: List of power rail column names to include
         time_ranges: List of dicts with 'start', 'end', 'name' keys in milliseconds
         
     Returns:
-        List of (sliced_df, time_range_dict) tuples
+        List of TraceSlice, one per time range with data
     """
     results = []
     
@@ -72,55 +200,103 @@ def slice_trace(df: pd.DataFrame,
     if not valid_rails:
         print(f"Error: None of the specified power rails found. Available rails: {available_rails[:10]}...")
         return results
-    
+
+    columns = [time_col] + valid_rails
+    trace = df if df.columns.tolist() == columns else df[columns]
+    times = trace[time_col].to_numpy()
+    values = trace[valid_rails].to_numpy(dtype=np.float64)
+    if not values.flags['F_CONTIGUOUS']:
+        values = np.asfortranarray(values)
+    period_ms = sample_period(times)
+    bounds = range_bounds(times, time_ranges)
+
     # Process each time range
-    for tr in time_ranges:
+    for idx, tr in enumerate(time_ranges):
         start_ms = tr['start']
         end_ms = tr['end']
         name = tr.get('name', '')
-        # Filter by time range
-        mask = (df[time_col] >= start_ms) & (df[time_col] <= end_ms)
-        sliced = df.loc[mask, [time_col] + valid_rails].copy()
-        
+        if bounds is not None:
+            rows = slice(*bounds[idx])
+        else:
+            # unsorted trace, every row in the range is kept in file order
+            rows = np.flatnonzero((times >= start_ms) & (times <= end_ms))
+        sliced = trace.iloc[rows]
         if len(sliced) == 0:
             print(f"Warning: No data found in time range [{start_ms}, {end_ms}] ({name})")
             continue
-        
-        # Calculate averages and peaks for each power rail
-        # Create summary rows to insert at the beginning
-        header_row_summary = {col: col for col in sliced.columns}
-        header_row_summary[time_col] = 'Power Rail Name'  # For summary section
-        
-        header_row_data = {col: col for col in sliced.columns}  # For data section (keeps "Time")
-        
-        avg_row = {}
-        avg_row[time_col] = 'Average'
-        for rail in valid_rails:
-            avg_row[rail] = sliced[rail].mean()
-        
-        peak_row = {}
-        peak_row[time_col] = 'Peak'
-        for rail in valid_rails:
-            peak_row[rail] = sliced[rail].max()
-        
-        # Insert header (with Power Rail Name), average, peak, another header (with Time), then data
-        summary_df = pd.DataFrame([header_row_summary, avg_row, peak_row, header_row_data])
-        sliced = pd.concat([summary_df, sliced], ignore_index=True)
-        
-        results.append((sliced, tr))
-        print(f"Sliced {len(sliced)-4} rows for time range [{start_ms}, {end_ms}] ms ({name})")
+
+        range_values = values[rows] if bounds is not None else np.asfortranarray(values[rows])
+        stats = pd.DataFrame(range_statistics(range_values, period_ms), index=SLICE_STATISTICS, columns=valid_rails)
+        results.append(TraceSlice(sliced, tr, stats, len(sliced)))
+        print(f"Sliced {len(sliced)} rows for time range [{start_ms}, {end_ms}] ms ({name})")
     
     return results
 
 
-def create_summary_excel(slices: List[Tuple[pd.DataFrame, Dict]], 
+def summary_rows(trace_slice: TraceSlice) -> List[List]:
+    """
+    Rows written above the data of a slice: a header (with Power Rail Name), the Average and
+    Peak of each rail, then another header (with the time column name).
+    """
+    data = trace_slice.data
+    time_col = data.columns[0]
+    rails = data.columns[1:].tolist()
+    averages = trace_slice.stats.loc['Average'].tolist()
+    peaks = trace_slice.stats.loc['Peak'].tolist()
+    # an integer rail peaks at an integer
+    peaks = [int(peak) if pd.api.types.is_integer_dtype(data[rail].dtype) and np.isfinite(peak) else peak
+             for rail, peak in zip(rails, peaks)]
+    # empty cell for a rail without any number in the range, as pandas writes NaN
+    return [['Power Rail Name'] + rails,
+            ['Average'] + ['' if pd.isna(value) else value for value in averages],
+            ['Peak'] + ['' if pd.isna(value) else value for value in peaks],
+            [time_col] + rails]
+
+
+def slice_column_name(idx: int, tr: Dict) -> str:
+    """Column of a slice in the summary: its name if available, otherwise its time range."""
+    name = tr.get('name', '')
+    return name if name else f"Slice_{idx}_({int(tr['start'])}-{int(tr['end'])}ms)"
+
+
+def statistics_table(slices: List[TraceSlice]) -> pd.DataFrame:
+    """Every SLICE_STATISTICS value of every slice and rail, a row per (slice, rail)."""
+    tables = []
+    for idx, trace_slice in enumerate(slices):
+        table = trace_slice.stats.T.rename_axis('Power Rail').reset_index()
+        table.insert(0, 'Slice', slice_column_name(idx, trace_slice.time_range))
+        table.insert(2, 'Samples', trace_slice.samples)
+        tables.append(table)
+    return pd.concat(tables, ignore_index=True)
+
+
+def excel_value(value):
+    """A cell value for openpyxl: NaN as an empty cell, numpy scalars as Python ones."""
+    if isinstance(value, (float, np.floating)) and np.isnan(value):
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def append_table(worksheet, table: pd.DataFrame):
+    """Append a header row then a row per row of table to a (write-only) worksheet."""
+    worksheet.append(table.columns.tolist())
+    for row in table.itertuples(index=False, name=None):
+        worksheet.append([excel_value(value) for value in row])
+
+
+def create_summary_excel(slices: List[TraceSlice], 
                          output_dir: str,
                          base_filename: str):
     """
-    Create a summary Excel file with transposed average data.
+    Create a summary Excel file with transposed average data, and a Rail_Statistics sheet
+    with every statistic of every slice and rail.
+
+    The workbook is written in write-only mode, row by row, so its size does not slow it down.
     
     Args:
-        slices: List of (sliced_df, time_range_dict) tuples
+        slices: List of TraceSlice
         output_dir: Output directory
         base_filename: Base name for output files
     """
@@ -129,93 +305,608 @@ def create_summary_excel(slices: List[Tuple[pd.DataFrame, Dict]],
         print("Install with: pip install openpyxl")
         return
     
-    # Extract power rail names from first slice (excluding the 4 summary rows)
-    first_df = slices[0][0]
-    power_rails = list(first_df.columns)[1:]  # Skip Time column
-    
-    # Build summary data structure
-    summary_data = {'Power Rail': power_rails}
-    
-    for idx, (sliced_df, tr) in enumerate(slices):
-        start_ms = tr['start']
-        end_ms = tr['end']
-        name = tr.get('name', '')
-        # Use name if available, otherwise use time range
-        col_name = name if name else f"Slice_{idx}_({int(start_ms)}-{int(end_ms)}ms)"
-        # Average row is at index 1 (after first header row)
-        avg_values = sliced_df.iloc[1, 1:].values  # Skip first column (Power Rail Name/Average)
-        summary_data[col_name] = avg_values
-    
-    # Add WL_start, WL_end, WL_duration columns
-    # These represent the time ranges for each slice (same for all power rails)
-    wl_starts = []
-    wl_ends = []
-    wl_durations = []
-    
-    for sliced_df, tr in slices:
-        wl_starts.append(tr['start'])
-        wl_ends.append(tr['end'])
-        wl_durations.append(tr['end'] - tr['start'])
+    # Extract power rail names from first slice
+    power_rails = slices[0].stats.columns.tolist()
     
-    # For each power rail, add the time range info (will be the same across rows but conceptually represents the workload)
-    # Actually, let's add these as additional metadata rows instead
-    
-    # Create DataFrame
-    summary_df = pd.DataFrame(summary_data)
+    # Header row, then a row per power rail with its average in every slice
+    header_row = ['Power Rail'] + [slice_column_name(idx, trace_slice.time_range) for idx, trace_slice in enumerate(slices)]
+    averages = [trace_slice.stats.loc['Average'] for trace_slice in slices]
     
     # Add workload metadata as separate rows at the bottom
-    wl_start_row = ['WL_start (ms)'] + wl_starts + [None] * (len(summary_data) - len(wl_starts) - 1)
-    wl_end_row = ['WL_end (ms)'] + wl_ends + [None] * (len(summary_data) - len(wl_ends) - 1)
-    wl_duration_row = ['WL_duration (ms)'] + wl_durations + [None] * (len(summary_data) - len(wl_durations) - 1)
+    # These represent the time ranges for each slice (same for all power rails)
+    wl_start_row = ['WL_start (ms)'] + [trace_slice.time_range['start'] for trace_slice in slices]
+    wl_end_row = ['WL_end (ms)'] + [trace_slice.time_range['end'] for trace_slice in slices]
+    wl_duration_row = ['WL_duration (ms)'] + [trace_slice.time_range['end'] - trace_slice.time_range['start'] for trace_slice in slices]
     
     # Save to Excel
     output_filename = f"{base_filename}_summary.xlsx"
     output_path = os.path.join(output_dir, output_filename)
     
-    with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-        summary_df.to_excel(writer, sheet_name='Power_Summary', index=False)
-        
-        # Add metadata rows
-        workbook = writer.book
-        worksheet = writer.sheets['Power_Summary']
-        
-        start_row = len(summary_df) + 3  # Add some space
-        worksheet.append([])  # Empty row
-        worksheet.append(wl_start_row)
-        worksheet.append(wl_end_row)
-        worksheet.append(wl_duration_row)
+    workbook = openpyxl.Workbook(write_only=True)
+    worksheet = workbook.create_sheet('Power_Summary')
+    worksheet.append(header_row)
+    for rail in power_rails:
+        worksheet.append([rail] + [excel_value(average[rail]) for average in averages])
+    worksheet.append([])  # Empty row
+    worksheet.append(wl_start_row)
+    worksheet.append(wl_end_row)
+    worksheet.append(wl_duration_row)
+    append_table(workbook.create_sheet('Rail_Statistics'), statistics_table(slices))
+    workbook.save(output_path)
     
     print(f"Summary Excel created: {output_path}")
 
 
-def save_slices(slices: List[Tuple[pd.DataFrame, Dict]], 
+def slice_filename(idx: int, base_filename: str, tr: Dict) -> str:
+    """Format: 000_basename_name_startms_endms.csv or 000_basename_startms_endms.csv"""
+    start_ms = tr['start']
+    end_ms = tr['end']
+    name = tr.get('name', '')
+    if name:
+        return f"{idx:03d}_{base_filename}_{name}_{start_ms:.0f}ms_{end_ms:.0f}ms.csv"
+    return f"{idx:03d}_{base_filename}_{start_ms:.0f}ms_{end_ms:.0f}ms.csv"
+
+
+def save_slices(slices: List[TraceSlice], 
                 output_dir: str,
                 base_filename: str):
     """
-    Save sliced data to CSV files with sequential numbering.
+    Save sliced data to CSV files with sequential numbering, each below its summary_rows.
     
     Args:
-        slices: List of (sliced_df, time_range_dict) tuples
+        slices: List of TraceSlice
         output_dir: Output directory
         base_filename: Base name for output files
     """
     os.makedirs(output_dir, exist_ok=True)
     
-    for idx, (sliced_df, tr) in enumerate(slices):
-        start_ms = tr['start']
-        end_ms = tr['end']
-        name = tr.get('name', '')
-        # Format: 000_basename_name_startms_endms.csv or 000_basename_startms_endms.csv
-        if name:
-            output_filename = f"{idx:03d}_{base_filename}_{name}_{start_ms:.0f}ms_{end_ms:.0f}ms.csv"
-        else:
-            output_filename = f"{idx:03d}_{base_filename}_{start_ms:.0f}ms_{end_ms:.0f}ms.csv"
-        output_path = os.path.join(output_dir, output_filename)
+    for idx, trace_slice in enumerate(slices):
+        output_path = os.path.join(output_dir, slice_filename(idx, base_filename, trace_slice.time_range))
         
-        sliced_df.to_csv(output_path, index=False, header=False)
+        with open(output_path, 'w', newline='') as f:
+            csv.writer(f, lineterminator=os.linesep).writerows(summary_rows(trace_slice))
+            trace_slice.data.to_csv(f, index=False, header=False, lineterminator=os.linesep)
         print(f"Saved: {output_path}")
 
 
+# --format choices, save_output writes them
+OUTPUT_FORMATS = ['csv', 'npz', 'parquet']
+
+
+def slice_metadata(idx: int, trace_slice: TraceSlice) -> Dict:
+    """Range (start, end, name), columns and statistics of a slice, kept with the binary formats."""
+    tr = trace_slice.time_range
+    stats = trace_slice.stats
+    return {'index': idx, 'name': tr.get('name', ''), 'start': tr['start'], 'end': tr['end'],
+            'samples': trace_slice.samples, 'columns': trace_slice.data.columns.tolist(),
+            'statistics': {stat: [None if pd.isna(value) else float(value) for value in stats.loc[stat]]
+                           for stat in stats.index}}
+
+
+def slice_rows(trace_slice: TraceSlice) -> Iterator[np.ndarray]:
+    """Rows of a loaded slice, as one float64 (rows, columns) array."""
+    yield trace_slice.data.to_numpy(dtype=np.float64)
+
+
+def save_slices_npz(slices: List[TraceSlice], output_path: str, row_blocks: Iterable[Iterator[np.ndarray]]):
+    """
+    Save all slices in one .npz: slice_NNN is the float64 (rows, columns) array of slice NNN and
+    metadata a JSON string with the slice_metadata of every slice.
+
+    The arrays are written block by block (as np.savez lays them out, uncompressed), so a
+    streamed slice is never held in memory.
+    """
+    with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_STORED, allowZip64=True) as npz:
+        for idx, (trace_slice, blocks) in enumerate(zip(slices, row_blocks)):
+            shape = (trace_slice.samples, len(trace_slice.data.columns))
+            with npz.open(f'slice_{idx:03d}.npy', 'w', force_zip64=True) as f:
+                np.lib.format.write_array_header_1_0(f, {'descr': '<f8', 'fortran_order': False, 'shape': shape})
+                for rows in blocks:
+                    f.write(rows.astype('<f8', order='C', copy=False).tobytes())
+        with npz.open('metadata.npy', 'w') as f:
+            metadata = [slice_metadata(idx, trace_slice) for idx, trace_slice in enumerate(slices)]
+            np.lib.format.write_array(f, np.array(json.dumps(metadata)))
+
+
+def save_slices_parquet(slices: List[TraceSlice], output_path: str, row_blocks: Iterable[Iterator[np.ndarray]]):
+    """
+    Save all slices in one .parquet table: a 'slice' column (index of the slice) then the time
+    column and rails as float64. The slice_metadata of every slice is in the 'slices' key of
+    the schema metadata, as JSON.
+    """
+    columns = slices[0].data.columns.tolist()
+    metadata = [slice_metadata(idx, trace_slice) for idx, trace_slice in enumerate(slices)]
+    schema = pa.schema([('slice', pa.int32())] + [(col, pa.float64()) for col in columns],
+                       metadata={b'slices': json.dumps(metadata).encode('utf-8')})
+    with pq.ParquetWriter(output_path, schema) as writer:
+        for idx, blocks in enumerate(row_blocks):
+            for rows in blocks:
+                arrays = [pa.array(np.full(len(rows), idx, dtype=np.int32))]
+                arrays += [pa.array(rows[:, col_idx]) for col_idx in range(len(columns))]
+                writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+
+
+def save_output(slices: List[TraceSlice],
+                output_dir: str,
+                base_filename: str,
+                output_format: str = 'csv',
+                row_blocks: Optional[Iterable[Iterator[np.ndarray]]] = None):
+    """
+    Save the slices in one of OUTPUT_FORMATS: a CSV per slice (save_slices), or every slice in
+    one <base_filename>_slices.npz / .parquet file with typed float columns.
+
+    Args:
+        slices: List of TraceSlice
+        output_dir: Output directory
+        base_filename: Base name for output files
+        output_format: One of OUTPUT_FORMATS
+        row_blocks: Rows of each slice as float64 arrays (for slices without rows), slice_rows by default
+    """
+    if output_format == 'csv':
+        save_slices(slices, output_dir, base_filename)
+        return
+    if output_format == 'parquet' and pq is None:
+        raise ValueError("parquet output needs pyarrow (pip install pyarrow)")
+    os.makedirs(output_dir, exist_ok=True)
+    if row_blocks is None:
+        row_blocks = (slice_rows(trace_slice) for trace_slice in slices)
+    output_path = os.path.join(output_dir, f"{base_filename}_slices.{output_format}")
+    if output_format == 'npz':
+        save_slices_npz(slices, output_path, row_blocks)
+    else:
+        save_slices_parquet(slices, output_path, row_blocks)
+    print(f"Saved: {output_path} ({len(slices)} slices)")
+
+
+# trace files a batch slices, and the summary workbook it writes
+TRACE_NAME = re.compile(r'-\d+sr\.csv$')
+BATCH_SUMMARY = 'Power_Summary.xlsx'
+# rows read at a time with --stream
+STREAM_CHUNK_ROWS = 200_000
+# bins of the histogram the percentiles of a streamed slice are estimated from
+HISTOGRAM_BINS = 4096
+
+
+def trace_chunks(filepath: str, power_rails: List[str], chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """
+    Time column (in milliseconds) and the given power rails of the trace, chunk_rows rows at a time.
+
+    A converted trace is read from its .ptcol (memory-mapped), otherwise the CSV is read in
+    chunks of those columns only, so memory does not grow with the trace.
+    """
+    df = load_cached_trace(filepath, power_rails)
+    if df is not None:
+        chunks = (df.iloc[start:start + chunk_rows] for start in range(0, len(df), chunk_rows))
+    else:
+        usecols = rail_columns(pd.read_csv(filepath, nrows=0).columns.tolist(), power_rails)
+        chunks = pd.read_csv(filepath, usecols=usecols, float_precision='round_trip', chunksize=chunk_rows)
+    for chunk in chunks:
+        time_col = chunk.columns[0]
+        yield chunk.assign(**{time_col: chunk[time_col] * 1000})
+
+
+class RailHistogram:
+    """
+    Counts of the samples of one rail in HISTOGRAM_BINS bins of a power of two width. Bins are
+    merged two by two (the width doubles) when the samples no longer fit in them. A percentile
+    read from it is within one bin width, about (peak - min) / 2048, of the exact one (or within
+    the gap between the two samples it lies between, when they are further apart).
+    """
+
+    def __init__(self):
+        self.width = None
+        self.first = 0      # bin i holds [(first + i) * width, (first + i + 1) * width)
+        self.last = 0       # last bin with samples, counted as first
+        self.counts = np.zeros(HISTOGRAM_BINS, dtype=np.int64)
+
+    def add(self, values: np.ndarray):
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        low = values.min()
+        high = values.max()
+        if self.width is None:
+            span = high - low if high > low else max(abs(high), 1.0) * 2.0 ** -20
+            self.width = 2.0 ** np.ceil(np.log2(span / (HISTOGRAM_BINS - 1)))
+            self.first = self.last = int(np.floor(low / self.width))
+        while True:
+            first = min(self.first, int(np.floor(low / self.width)))
+            last = max(self.last, int(np.floor(high / self.width)))
+            if last - first < HISTOGRAM_BINS:
+                break
+            self.widen()
+        if first < self.first:
+            # room for the lower samples, the bins moved out are empty
+            shift = self.first - first
+            self.counts = np.concatenate((np.zeros(shift, dtype=np.int64), self.counts[:HISTOGRAM_BINS - shift]))
+        self.first = first
+        self.last = last
+        bins = np.floor(values / self.width).astype(np.int64) - self.first
+        self.counts += np.bincount(bins, minlength=HISTOGRAM_BINS)
+
+    def widen(self):
+        first = self.first // 2
+        merged = (self.first + np.arange(HISTOGRAM_BINS)) // 2 - first
+        self.counts = np.bincount(merged, weights=self.counts, minlength=HISTOGRAM_BINS).astype(np.int64)
+        self.first = first
+        self.last //= 2
+        self.width *= 2
+
+    def percentile(self, q: float, low: float, high: float) -> float:
+        """Linear interpolation between the samples around rank q, as np.percentile, within the bin found."""
+        total = self.counts.sum()
+        if total == 0:
+            return np.nan
+        rank = q / 100 * (total - 1)
+        cumulative = np.cumsum(self.counts)
+        found = int(np.searchsorted(cumulative, rank, side='right'))
+        before = cumulative[found - 1] if found > 0 else 0
+        value = (self.first + found + (rank - before + 0.5) / self.counts[found]) * self.width
+        return float(min(max(value, low), high))
+
+
+class StreamedSlice:
+    """
+    One time range of a streamed trace: its rows are appended to a part file as chunks arrive
+    (CSV text, or float64 rows for the binary formats) and its statistics are accumulated,
+    sums (for the average and energy), peaks, mins and a RailHistogram per rail.
+
+    The rail values of the first keep_rows samples are kept as well, so the percentiles of a
+    slice that never grows past them are exact. They go to the histograms when it does.
+    """
+
+    def __init__(self, tr: Dict, rails: List[str], part_path: str, binary: bool = False,
+                 keep_rows: int = STREAM_CHUNK_ROWS):
+        self.time_range = tr
+        self.rails = rails
+        self.part_path = part_path
+        self.binary = binary
+        self.part_file = None
+        self.columns = None     # the rows of the first chunk with data, none kept
+        self.samples = 0
+        self.counts = np.zeros(len(rails), dtype=np.int64)
+        self.sums = np.zeros(len(rails))
+        self.peaks = np.full(len(rails), -np.inf)
+        self.mins = np.full(len(rails), np.inf)
+        self.keep_rows = keep_rows
+        self.kept = []          # (rows, rails) values while samples <= keep_rows, None after
+        self.histograms = [RailHistogram() for _ in rails]
+
+    def add(self, rows: pd.DataFrame, values: np.ndarray):
+        if self.part_file is None:
+            self.columns = rows.iloc[:0]
+            self.part_file = open(self.part_path, 'wb') if self.binary else open(self.part_path, 'w', newline='')
+        if self.binary:
+            self.part_file.write(rows.to_numpy(dtype='<f8').tobytes())
+        else:
+            rows.to_csv(self.part_file, index=False, header=False, lineterminator=os.linesep)
+        self.samples += len(rows)
+        with warnings.catch_warnings():
+            # a rail without any number in the rows
+            warnings.simplefilter('ignore', RuntimeWarning)
+            self.counts += np.count_nonzero(~np.isnan(values), axis=0)
+            self.sums += np.nansum(values, axis=0)
+            self.peaks = np.fmax(self.peaks, np.nanmax(values, axis=0))
+            self.mins = np.fmin(self.mins, np.nanmin(values, axis=0))
+        if self.kept is not None:
+            # a copy, not a view holding on to the whole chunk
+            self.kept.append(values.copy())
+            if self.samples <= self.keep_rows:
+                return
+            values = np.concatenate(self.kept)
+            self.kept = None
+        for rail, histogram in enumerate(self.histograms):
+            histogram.add(values[:, rail])
+
+    def stats(self, period_ms: float) -> pd.DataFrame:
+        found = self.counts > 0
+        columns = [np.where(found, self.sums / np.maximum(self.counts, 1), np.nan),
+                   np.where(found, self.peaks, np.nan), np.where(found, self.mins, np.nan)]
+        if self.kept is not None:
+            # exact, as slice_trace computes them
+            values = np.asfortranarray(np.concatenate(self.kept))
+            columns.extend(range_statistics(values, period_ms)[SLICE_STATISTICS.index('P50'):SLICE_STATISTICS.index('P99') + 1])
+        else:
+            for q in PERCENTILES:
+                columns.append([histogram.percentile(q, low, high)
+                                for histogram, low, high in zip(self.histograms, self.mins, self.peaks)])
+        columns.append(np.where(found, self.sums * period_ms / 1000, np.nan))
+        return pd.DataFrame(np.vstack(columns), index=SLICE_STATISTICS, columns=self.rails)
+
+    def close(self):
+        if self.part_file is not None:
+            self.part_file.close()
+
+
+def stream_slices(filepath: str,
+                  power_rails: List[str],
+                  time_ranges: List[Dict],
+                  output_dir: str,
+                  base_filename: str,
+                  chunk_rows: int = STREAM_CHUNK_ROWS,
+                  output_format: str = 'csv') -> List[TraceSlice]:
+    """
+    Slice a trace too large to load, chunk_rows rows at a time, and save the slices as save_output does.
+
+    The rows of every chunk are routed to the time ranges they fall in, and written to a part file
+    per range with data. Statistics are accumulated chunk by chunk, so memory is bounded by the
+    chunk size. Averages may differ from slice_trace in the last digit (the sums are added up
+    chunk by chunk), the percentiles of a slice of more than chunk_rows samples are estimated
+    (see RailHistogram) and the energy takes the sample period of the first chunk.
+
+    Args:
+        filepath: Trace file
+        power_rails: List of power rail column names to include
+        time_ranges: List of dicts with 'start', 'end', 'name' keys in milliseconds
+        output_dir: Output directory
+        base_filename: Base name for output files
+        chunk_rows: Rows read at a time
+        output_format: One of OUTPUT_FORMATS
+
+    Returns:
+        List of TraceSlice (without rows), one per time range with data
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    streamed = None
+    period_ms = 0.0
+    row_num = 0
+    try:
+        for chunk in trace_chunks(filepath, power_rails, chunk_rows):
+            time_col = chunk.columns[0]
+            if streamed is None:
+                available_rails = chunk.columns[1:].tolist()
+                valid_rails = [rail for rail in power_rails if rail in available_rails]
+                for rail in power_rails:
+                    if rail not in available_rails:
+                        print(f"Warning: Power rail '{rail}' not found in trace file")
+                if not valid_rails:
+                    print(f"Error: None of the specified power rails found. Available rails: {available_rails[:10]}...")
+                    return []
+                streamed = [StreamedSlice(tr, valid_rails, os.path.join(output_dir, f".{base_filename}_{idx}.part"),
+                                          output_format != 'csv', chunk_rows)
+                            for idx, tr in enumerate(time_ranges)]
+                period_ms = sample_period(chunk[time_col].to_numpy())
+
+            if chunk.columns.tolist() != [time_col] + valid_rails:
+                chunk = chunk[[time_col] + valid_rails]
+            times = chunk[time_col].to_numpy()
+            values = np.asfortranarray(chunk[valid_rails].to_numpy(dtype=np.float64))
+            bounds = range_bounds(times, time_ranges)
+            for idx, streamed_slice in enumerate(streamed):
+                tr = streamed_slice.time_range
+                if bounds is not None:
+                    rows = slice(*bounds[idx])
+                else:
+                    rows = np.flatnonzero((times >= tr['start']) & (times <= tr['end']))
+                sliced = chunk.iloc[rows]
+                if len(sliced) > 0:
+                    streamed_slice.add(sliced, values[rows])
+            row_num += len(chunk)
+    except BaseException:
+        # no part file left behind
+        for streamed_slice in streamed or []:
+            streamed_slice.close()
+            if os.path.exists(streamed_slice.part_path):
+                os.remove(streamed_slice.part_path)
+        raise
+    finally:
+        for streamed_slice in streamed or []:
+            streamed_slice.close()
+    if streamed is None:
+        print(f"Error: No data in trace file {filepath}")
+        return []
+    print(f"Streamed {row_num} rows in chunks of {chunk_rows}")
+
+    results = []
+    part_paths = []
+    for streamed_slice in streamed:
+        tr = streamed_slice.time_range
+        if streamed_slice.samples == 0:
+            print(f"Warning: No data found in time range [{tr['start']}, {tr['end']}] ({tr.get('name', '')})")
+            continue
+        results.append(TraceSlice(streamed_slice.columns, tr, streamed_slice.stats(period_ms), streamed_slice.samples))
+        part_paths.append(streamed_slice.part_path)
+        print(f"Sliced {streamed_slice.samples} rows for time range [{tr['start']}, {tr['end']}] ms ({tr.get('name', '')})")
+
+    try:
+        if output_format == 'csv':
+            for idx, (trace_slice, part_path) in enumerate(zip(results, part_paths)):
+                output_path = os.path.join(output_dir, slice_filename(idx, base_filename, trace_slice.time_range))
+                with open(output_path, 'w', newline='') as f:
+                    csv.writer(f, lineterminator=os.linesep).writerows(summary_rows(trace_slice))
+                    with open(part_path, 'r', newline='') as part_file:
+                        shutil.copyfileobj(part_file, f)
+                print(f"Saved: {output_path}")
+        elif results:
+            blocks = (part_rows(part_path, len(trace_slice.data.columns), chunk_rows)
+                      for trace_slice, part_path in zip(results, part_paths))
+            save_output(results, output_dir, base_filename, output_format, blocks)
+    finally:
+        for part_path in part_paths:
+            os.remove(part_path)
+    return results
+
+
+def part_rows(part_path: str, column_num: int, chunk_rows: int) -> Iterator[np.ndarray]:
+    """float64 rows of a binary part file (see StreamedSlice), chunk_rows at a time."""
+    with open(part_path, 'rb') as part_file:
+        while True:
+            rows = np.fromfile(part_file, dtype='<f8', count=chunk_rows * column_num)
+            if len(rows) == 0:
+                return
+            yield rows.reshape(-1, column_num)
+
+
+def find_traces(pattern: str) -> List[str]:
+    """Trace files (-NNNsr.csv) in a folder, searched recursively, or matching a glob pattern."""
+    if os.path.isdir(pattern):
+        paths = [os.path.join(root, f) for root, dirs, files in os.walk(pattern) for f in files]
+    else:
+        paths = glob.glob(pattern, recursive=True)
+    return sorted(path for path in paths if TRACE_NAME.search(os.path.basename(path)) and os.path.isfile(path))
+
+
+def run_names(trace_files: List[str]) -> List[str]:
+    """Name of each run: its trace file name, or its path below the common folder when two share a name."""
+    names = [Path(path).stem for path in trace_files]
+    if len(set(names)) == len(names):
+        return names
+    root = os.path.commonpath([os.path.abspath(os.path.dirname(path)) for path in trace_files])
+    return [os.path.splitext(os.path.relpath(os.path.abspath(path), root))[0].replace(os.sep, '_') for path in trace_files]
+
+
+def slice_run(job: Tuple) -> Tuple[str, int, List[TraceSlice], str]:
+    """
+    Slice one trace of a batch and save its slices, runs in a worker process.
+
+    Returns:
+        (trace file, its size in bytes, its slices without their rows, error or None)
+    """
+    trace_file, run_name, power_rails, time_ranges, output_dir, stream, chunk_rows, output_format = job
+    try:
+        # the messages of every run would interleave
+        with contextlib.redirect_stdout(io.StringIO()):
+            if stream:
+                slices = stream_slices(trace_file, power_rails, time_ranges, output_dir, run_name, chunk_rows, output_format)
+            else:
+                slices = slice_trace(load_trace_file(trace_file, power_rails), power_rails, time_ranges)
+                save_output(slices, output_dir, run_name, output_format)
+        # rows stay in the worker, they are saved already
+        slices = [trace_slice._replace(data=trace_slice.data.iloc[:0]) for trace_slice in slices]
+        return trace_file, os.path.getsize(trace_file), slices, None
+    except (OSError, ValueError, KeyError, IndexError, pd.errors.ParserError) as e:
+        return trace_file, 0, [], f"{type(e).__name__}: {e}"
+
+
+def create_batch_summary_excel(runs: List[Tuple[str, List[TraceSlice]]],
+                               power_rails: List[str],
+                               output_path: str):
+    """
+    Create one summary Excel file for a batch: the Power_Summary sheet has a column per
+    (run, range) with the average of each rail, below a row naming the run. Rail_Statistics
+    has every statistic of every run, slice and rail.
+
+    Args:
+        runs: List of (run name, its slices)
+        power_rails: Rails in the order of the rows, the ones no run has are left out
+        output_path: Excel file written
+    """
+    if openpyxl is None:
+        print("Warning: openpyxl not installed. Skipping Excel summary generation.")
+        print("Install with: pip install openpyxl")
+        return
+
+    found = set()
+    for run_name, slices in runs:
+        for trace_slice in slices:
+            found.update(trace_slice.stats.columns)
+    rails = [rail for rail in dict.fromkeys(power_rails) if rail in found]
+
+    run_row = ['Run']
+    header_row = ['Power Rail']
+    columns = []
+    wl_starts = ['WL_start (ms)']
+    wl_ends = ['WL_end (ms)']
+    wl_durations = ['WL_duration (ms)']
+    for run_name, slices in runs:
+        for idx, trace_slice in enumerate(slices):
+            tr = trace_slice.time_range
+            run_row.append(run_name)
+            header_row.append(slice_column_name(idx, tr))
+            columns.append(trace_slice.stats.loc['Average'].reindex(rails).tolist())
+            wl_starts.append(tr['start'])
+            wl_ends.append(tr['end'])
+            wl_durations.append(tr['end'] - tr['start'])
+
+    tables = []
+    for run_name, slices in runs:
+        if slices:
+            table = statistics_table(slices)
+            table.insert(0, 'Run', run_name)
+            tables.append(table)
+
+    # written in write-only mode, row by row (see create_summary_excel)
+    workbook = openpyxl.Workbook(write_only=True)
+    worksheet = workbook.create_sheet('Power_Summary')
+    worksheet.append(run_row)
+    worksheet.append(header_row)
+    for rail_idx, rail in enumerate(rails):
+        worksheet.append([rail] + [excel_value(values[rail_idx]) for values in columns])
+    worksheet.append([])  # Empty row
+    worksheet.append(wl_starts)
+    worksheet.append(wl_ends)
+    worksheet.append(wl_durations)
+    if tables:
+        append_table(workbook.create_sheet('Rail_Statistics'), pd.concat(tables, ignore_index=True))
+    workbook.save(output_path)
+
+    print(f"Summary Excel created: {output_path}")
+
+
+def batch_slice(pattern: str,
+                power_rails: List[str],
+                time_ranges: List[Dict],
+                output_dir: str,
+                stream: bool = False,
+                chunk_rows: int = STREAM_CHUNK_ROWS,
+                jobs: int = 0,
+                output_format: str = 'csv') -> List[Tuple[str, List[TraceSlice]]]:
+    """
+    Slice every trace of a folder (or matching a glob pattern) on a process pool.
+
+    The slices of each run are saved in a folder of their own under output_dir, and a single
+    BATCH_SUMMARY workbook gets the averages of every run and range.
+
+    Args:
+        pattern: Folder searched recursively for -NNNsr.csv traces, or a glob pattern
+        power_rails: List of power rail column names to include
+        time_ranges: List of dicts with 'start', 'end', 'name' keys in milliseconds
+        output_dir: Output directory
+        stream: Read each trace in chunks (see stream_slices)
+        chunk_rows: Rows read at a time when streamed
+        jobs: Worker processes, 0 uses every CPU core
+        output_format: One of OUTPUT_FORMATS, for the slices of each run
+
+    Returns:
+        List of (run name, its slices without their rows), for the runs sliced
+    """
+    trace_files = find_traces(pattern)
+    if not trace_files:
+        print(f"Error: No trace file (-NNNsr.csv) found in {pattern}")
+        return []
+    names = run_names(trace_files)
+    batch = [(trace_file, name, power_rails, time_ranges, os.path.join(output_dir, name), stream, chunk_rows, output_format)
+             for trace_file, name in zip(trace_files, names)]
+    workers = min(jobs if jobs > 0 else (os.cpu_count() or 1), len(batch))
+    print(f"Slicing {len(batch)} trace file(s) on {workers} process(es)")
+
+    start = time.perf_counter()
+    if workers == 1:
+        results = [slice_run(job) for job in batch]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(slice_run, batch))
+    elapsed = time.perf_counter() - start
+
+    runs = []
+    size = 0
+    for name, (trace_file, trace_size, slices, error) in zip(names, results):
+        if error is not None:
+            print(f"Failed: {trace_file} : {error}")
+        elif not slices:
+            print(f"Warning: No slices generated for {trace_file}")
+        else:
+            print(f"{name}: {len(slices)} slice(s), {trace_size / 2**20:,.1f} MB")
+            runs.append((name, slices))
+            size += trace_size
+    if runs:
+        os.makedirs(output_dir, exist_ok=True)
+        create_batch_summary_excel(runs, power_rails, os.path.join(output_dir, BATCH_SUMMARY))
+    print(f"\n{len(runs)}/{len(batch)} run(s) sliced in {elapsed:.2f} s "
+          f"({size / 2**20 / elapsed:,.1f} MB/s of trace, {workers} process(es))")
+    return runs
+
+
 def load_config(config_path: str) -> Dict:
     """Load configuration from JSON file"""
     with open(config_path, 'r') as f:
@@ -239,16 +930,30 @@ def select_trace_file() -> str:
 
 def main():
     parser = argparse.ArgumentParser(description='Slice power trace files by power rails and time ranges')
-    parser.add_argument('trace_file', nargs='?', help='Path to the power trace CSV file (optional, will open file dialog if not provided)')
+    parser.add_argument('trace_file', nargs='?', help='Path to the power trace CSV file (optional, will open file dialog if not provided), '
+                        'or a folder / glob pattern of trace files to slice them all')
     parser.add_argument('--config', '-c', help='Path to JSON config file with power rails and time ranges')
     parser.add_argument('--rails', '-r', nargs='+', help='Power rail column names to include')
     parser.add_argument('--time-ranges', '-t', nargs='+', 
                         help='Time ranges in format "start:end" (in milliseconds), e.g., "0:10000" "20000:40000"')
     parser.add_argument('--output-dir', '-o', default='./sliced_output', 
                         help='Output directory for sliced files (default: ./sliced_output)')
+    parser.add_argument('--stream', action='store_true',
+                        help='Read the trace in chunks instead of loading it, for traces too large for memory')
+    parser.add_argument('--chunk-rows', type=int, default=STREAM_CHUNK_ROWS,
+                        help=f'Rows read at a time with --stream (default: {STREAM_CHUNK_ROWS})')
+    parser.add_argument('--jobs', '-j', type=int, default=0,
+                        help='Processes slicing the traces of a folder or glob pattern (default: 0, every CPU core)')
+    parser.add_argument('--format', '-f', choices=OUTPUT_FORMATS, default='csv',
+                        help='Slice output: a CSV per slice, or every slice in one .npz / .parquet file (default: csv)')
     
     args = parser.parse_args()
     
+    if args.format == 'parquet' and pq is None:
+        print("Error: pyarrow not installed, it is needed for --format parquet.")
+        print("Install with: pip install pyarrow")
+        return
+    
     # Handle trace file selection
     trace_file = args.trace_file
     if trace_file is None:
@@ -281,21 +986,31 @@ def main():
             start, end = map(float, tr.split(':'))
             time_ranges.append({'start': start, 'end': end, 'name': f'Range_{idx}'})
     
-    # Load trace file
-    df = load_trace_file(trace_file)
+    if os.path.isdir(trace_file) or glob.has_magic(trace_file):
+        # Slice every trace of the batch, with one summary for all of them
+        batch_slice(trace_file, power_rails, time_ranges, args.output_dir, args.stream, args.chunk_rows, args.jobs, args.format)
+        return
     
     # Extract base filename
     base_filename = Path(trace_file).stem
     
-    # Slice the trace
-    slices = slice_trace(df, power_rails, time_ranges)
+    if args.stream:
+        # Slice and save the trace chunk by chunk
+        slices = stream_slices(trace_file, power_rails, time_ranges, args.output_dir, base_filename, args.chunk_rows, args.format)
+    else:
+        # Load trace file
+        df = load_trace_file(trace_file, power_rails)
+        
+        # Slice the trace
+        slices = slice_trace(df, power_rails, time_ranges)
     
     if not slices:
         print("No slices generated. Please check your configuration.")
         return
     
     # Save slices
-    save_slices(slices, args.output_dir, base_filename)
+    if not args.stream:
+        save_output(slices, args.output_dir, base_filename, args.format)
     
     # Create summary Excel
     create_summary_excel(slices, args.output_dir, base_filename)